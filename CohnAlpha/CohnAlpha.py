@@ -4,6 +4,7 @@ import matplotlib.pyplot as pyplot     # For plotting data summaries
 from scipy.optimize import curve_fit   # For fitting the curve
 from scipy import signal               # For welch (fourier transform)
 import hdf5
+import loader as ld
 from pathlib import Path               # For path manipulation (replaces os)
 
 
@@ -36,6 +37,8 @@ class CohnAlpha:
 
         # set quiet variable first for print statements
         self.quiet = settings['Input/Output Settings']['Quiet mode']
+        self.time_column = settings['Input/Output Settings'].get('Time column', 0)
+        self.cache_dir, self.cache_limit = ld.cacheSettings(settings['Input/Output Settings'])
         self.print("Reading in input file/folder data...")
 
         # Required Parameters
@@ -98,7 +101,10 @@ class CohnAlpha:
         if self.input_file_ext == '.hist':
             list_data_array = np.loadtxt(input, delimiter=',',skiprows=5)
         else:
-            list_data_array = np.loadtxt(input, usecols=0, dtype=float)
+            list_data_array, _ = ld.readColumns(input,
+                                                self.time_column,
+                                                cacheDir=self.cache_dir,
+                                                cacheLimit=self.cache_limit)
 
         return list_data_array
 
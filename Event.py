@@ -1,11 +1,21 @@
 '''The file that defines and stores Event objects.
 Eliminate repetition. It's likely only used for Rossi and Feynman. Cohn Alpha uses np.loadtxt(). All methods should use the same loading schemes.
+
+Events are stored in a columnar EventArray (one contiguous array of
+times and one of channels). The per-row Event object and the list
+loader are kept as a compatibility shim for older code.
 '''
 
 
 
 # Necessary imports.
-from tqdm import tqdm
+import numpy as np
+import loader as ld
+
+
+
+# The channel value stored when a measurement has no channel data.
+NO_CHANNEL = -1
 
 
 
@@ -31,15 +41,216 @@ class Event:
 
 
 
-def createEventsListFromTxtFile(path:str,
+class EventArray:
+
+    '''The class that stores a whole measurement in columnar form. Times
+    are kept in a contiguous float64 array and channels in a contiguous
+    int16 array, where NO_CHANNEL marks measurements without channel data.
+
+    Indexing with an integer or iterating returns Event objects, so
+    code written for a list of Events keeps working unchanged.'''
+
+
+    def __init__(self, times = None, channels = None):
+
+        '''Initializes the event array from time and channel data.
+
+        Inputs:
+        - times: an array-like of measurement times (in nanoseconds).
+        If not given, creates an empty event array.
+        - channels: an array-like of channels parallel to times, or a
+        single channel value shared by every measurement. If not
+        given, assumes no channel data.'''
+
+
+        # Store the times as a contiguous float64 array.
+        self.times = np.ascontiguousarray([] if times is None else times, dtype=np.float64)
+        # Store the channels, filling in the no channel marker or the shared channel if needed.
+        if channels is None:
+            self.channels = np.full(len(self.times), NO_CHANNEL, dtype=np.int16)
+        elif np.isscalar(channels):
+            self.channels = np.full(len(self.times), channels, dtype=np.int16)
+        else:
+            self.channels = np.ascontiguousarray(channels, dtype=np.int16)
+        # Both columns must describe the same measurements.
+        if self.times.ndim != 1 or self.channels.shape != self.times.shape:
+            raise ValueError('The times and channels must be one dimensional arrays of the same length.')
+
+
+    @classmethod
+    def fromEventList(cls, events: list):
+
+        '''Creates an event array from a list of Event objects.
+
+        Inputs:
+        - events: the list of Event objects.
+
+        Outputs:
+        - the equivalent EventArray.'''
+
+
+        return cls(np.fromiter((event.time for event in events), dtype=np.float64, count=len(events)),
+                   np.fromiter((NO_CHANNEL if event.channel is None else event.channel for event in events),
+                               dtype=np.int16,
+                               count=len(events)))
+
+
+    @classmethod
+    def concatenate(cls, arrays: list):
+
+        '''Joins several event arrays end to end without sorting.
+
+        Inputs:
+        - arrays: the list of EventArrays to join.
+
+        Outputs:
+        - the joined EventArray.'''
+
+
+        if len(arrays) == 0:
+            return cls()
+        return cls(np.concatenate([array.times for array in arrays]),
+                   np.concatenate([array.channels for array in arrays]))
+
+
+    @classmethod
+    def merge(cls, arrays: list):
+
+        '''Merges several event arrays into one time-ordered event array.
+
+        Inputs:
+        - arrays: the list of EventArrays to merge.
+
+        Outputs:
+        - the merged EventArray, sorted from least to greatest time.'''
+
+
+        return cls.concatenate(arrays).sort()
+
+
+    def __len__(self):
+
+        '''Returns the number of measurements.'''
+
+
+        return len(self.times)
+
+
+    def __getitem__(self, key):
+
+        '''Returns a single Event for an integer index, or
+        an EventArray for a slice, mask, or index array.'''
+
+
+        # Integer indices give back an Event for list compatibility.
+        if isinstance(key, (int, np.integer)):
+            channel = int(self.channels[key])
+            return Event(float(self.times[key]), None if channel == NO_CHANNEL else channel)
+        return EventArray(self.times[key], self.channels[key])
+
+
+    def __iter__(self):
+
+        '''Iterates over the measurements as Event objects.'''
+
+
+        for i in range(len(self)):
+            yield self[i]
+
+
+    def hasChannels(self):
+
+        '''Returns whether any measurement carries channel data.'''
+
+
+        return bool(np.any(self.channels != NO_CHANNEL))
+
+
+    def isSorted(self):
+
+        '''Returns whether the times are ordered from least to greatest.'''
+
+
+        return bool(np.all(self.times[1:] >= self.times[:-1]))
+
+
+    def sort(self):
+
+        '''Sorts the measurements in place from least to greatest
+        time. Ties keep their original order, like list.sort().
+
+        Outputs:
+        - the event array itself, to allow chaining.'''
+
+
+        if not self.isSorted():
+            order = np.argsort(self.times, kind='stable')
+            self.times = self.times[order]
+            self.channels = self.channels[order]
+        return self
+
+
+    def window(self, start: float, end: float):
+
+        '''Returns the measurements with start <= time < end as
+        views into this event array. Assumes the array is sorted.
+
+        Inputs:
+        - start: the beginning of the time window.
+        - end: the end of the time window (exclusive).
+
+        Outputs:
+        - an EventArray sharing memory with this one.'''
+
+
+        first, last = np.searchsorted(self.times, [start, end], side='left')
+        return EventArray(self.times[first:last], self.channels[first:last])
+
+
+    def channelList(self):
+
+        '''Returns the sorted array of distinct channels present.'''
+
+
+        return np.unique(self.channels)
+
+
+    def channel(self, channel: int):
+
+        '''Returns the measurements recorded on a single channel.
+
+        Inputs:
+        - channel: the channel to select. Use None (or NO_CHANNEL)
+        to select measurements without channel data.
+
+        Outputs:
+        - an EventArray with only that channel's measurements.'''
+
+
+        mask = self.channels == (NO_CHANNEL if channel is None else channel)
+        return EventArray(self.times[mask], self.channels[mask])
+
+
+    def toEventList(self):
+
+        '''Converts the event array into the legacy list of Event objects.'''
+
+
+        return list(self)
+
+
+
+def createEventArrayFromTxtFile(path:str,
                                 timeCol:int = 0,
                                 channel:int = None,
                                 isColumn:bool = True,
                                 quiet:bool = False,
-                                folder:bool = False):
-    
-    '''Creates an event list from a text file.
-    
+                                folder:bool = False,
+                                cacheDir:str = None,
+                                cacheLimit:float = None):
+
+    '''Creates an event array from a text file.
+
     Inputs:
     - path: a string that indicates the absolute path of the input file.
     - timeCol: a integer indicating which column in the 
@@ -53,44 +264,62 @@ def createEventsListFromTxtFile(path:str,
     be silenced. If not given, assumes False (uses print statements).
     - folder: a boolean indicating whether or not this file is for 
     folder analysis. If not given, assumes False (single file).
+    - cacheDir: the folder of the parsed column cache. If not 
+    given, the file is parsed every time and not cached.
+    - cacheLimit: the size limit of the cache in megabytes.
     
     Outputs:
-    - events: the list containing one Event 
-    object for each row in the text file.'''
+    - an EventArray holding every row in the text file.'''
 
 
-    # Initialize the list.
-    events = []
-    # If not in quiet nor folder mode, print 
+    # Determine whether the channel data should be read from a column.
+    readChannels = isColumn and channel is not None
+    # If not in quiet nor folder mode, print
     # that data loading is in progress.
     if not quiet and not folder:
         print('Loading data...')
-    # Open the given file in read mode.
-    with open(path, 'r') as file:
-        # If not in folder mode, make a progress bar.
-        if not folder:
-            file = tqdm(file)
-        # For each line in the file:
-        for line in file:
-            # Get rid of trailing and leading 
-            # whitespace and split the columns up.
-            columns = line.strip().split()
-            # Save the time data from the appropriate column.
-            timeIn = columns[timeCol]
-            if isColumn:
-                # If there is no channel column, set the channel to None.
-                if channel is None:
-                    # Store the time data in an event object.
-                    event = Event(float(timeIn))
-                # Otherwise, save the channel data from the appropriate column.
-                else:
-                    channelIn = columns[channel]
-                    # Store the time and channel data in an event object.
-                    event = Event(float(timeIn), int(channelIn))
-            else:
-                event = Event(float(timeIn), channel)
-            # Add the current Event to the events list.  
-            events.append(event)
-    file.close()
-    # Return the events list.
-    return events
+    # Read the needed columns straight into arrays instead of
+    # building one object per line.
+    times, channels = ld.readColumns(path,
+                                     timeCol,
+                                     channel if readChannels else None,
+                                     cacheDir=cacheDir,
+                                     cacheLimit=cacheLimit)
+    # Store the columns in an event array.
+    if readChannels:
+        return EventArray(times, channels)
+    return EventArray(times, None if isColumn else channel)
+
+
+
+def createEventsListFromTxtFile(path:str,
+                                timeCol:int = 0,
+                                channel:int = None,
+                                isColumn:bool = True,
+                                quiet:bool = False,
+                                folder:bool = False):
+
+    '''Creates an event list from a text file. Kept for code
+    that still expects Event objects; new code should use
+    createEventArrayFromTxtFile instead.
+
+    Inputs:
+    - path: a string that indicates the absolute path of the input file.
+    - timeCol: a integer indicating which column in the 
+    file holds the time data. If not given, assumes column 0.
+    - channel: an integer indicating which column in the file 
+    holds the channel data or what the channel for all data 
+    points should be. If not given, assumes no channel column.
+    - isColumn: a boolean that determines whether channel is a column 
+    or channel value. If not given, assumes True (channel is a column).
+    - quiet: a boolean indicating whether or not print statements should 
+    be silenced. If not given, assumes False (uses print statements).
+    - folder: a boolean indicating whether or not this file is for 
+    folder analysis. If not given, assumes False (single file).
+    
+    Outputs:
+    - events: the list containing one Event
+    object for each row in the text file.'''
+
+
+    return createEventArrayFromTxtFile(path, timeCol, channel, isColumn, quiet, folder).toEventList()
@@ -1,5 +1,9 @@
 import numpy as np
 import Event as evt
+from lmx import kernels
+from lmx.feynman import moments
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
 from scipy.optimize import curve_fit
 import matplotlib.pyplot as plt
 import os
@@ -11,6 +15,319 @@ def YFit(tau, gamma, alpha):
 # -------------------------------------------------------------------------------------
 
 
+# The default length (in ns) of a jump between measurements that is treated as dead time.
+GAP_THRESHOLD = 1e13
+
+
+def liveIntervals(times: np.ndarray, threshold: float = GAP_THRESHOLD):
+
+    '''Finds the live intervals of a measurement. A jump between two 
+    consecutive measurements longer than the threshold (ex: between two 
+    measurement ranges, or while the acquisition is down) is dead time, 
+    and splits the measurement into intervals.
+
+    Requires:
+    - times: the measurement times, sorted from least to greatest.
+    - threshold: the length of the shortest jump that is dead time.
+
+    Returns the start and end times of each live interval, as two arrays.'''
+
+    gaps = np.flatnonzero(np.diff(times) > threshold)
+    return times[np.concatenate(([0], gaps + 1))], times[np.append(gaps, len(times) - 1)]
+
+
+def liveGates(intervals: tuple, tau: int):
+
+    '''Counts the gates of width tau that are live from start to end. 
+    In each live interval these are the gates after the one holding its 
+    first measurement and before the one holding its last measurement; 
+    those two gates are only partly live, and the gates inside the dead 
+    time between intervals are not live at all.
+
+    Requires:
+    - intervals: the start and end times of each live interval.
+    - tau: the gate width.'''
+
+    first = (np.asarray(intervals[0]) / tau).astype(np.int64)
+    last = (np.asarray(intervals[1]) / tau).astype(np.int64)
+    return int(np.sum(np.maximum(last - first - 1, 0)))
+
+
+def measuredTime(meas_time: float, intervals: tuple):
+
+    '''Drops the live intervals of a measurement without any gaps. 
+    Its gates are then all counted, as if no intervals were given, 
+    over the length of its single live interval.
+
+    Requires:
+    - meas_time: the total measurement time, or -1.
+    - intervals: the live intervals (see liveIntervals), or None.
+
+    Returns the measurement time and live intervals to count with.'''
+
+    if intervals is not None and len(intervals[0]) == 1:
+        return intervals[1][0] - intervals[0][0], None
+    return meas_time, intervals
+
+
+def gateFrequencies(times: np.ndarray, tau: int):
+
+    '''Counts the events in each random trigger gate with array operations,
+    the way randomCounts does (gates without events are not counted and the
+    last gate is only counted if it has more than one measurement).
+    
+    Requires:
+    - times: the measurement times, sorted from least to greatest.
+    - tau: the gate width.
+    
+    Returns the number of gates holding each number of events.'''
+
+    # Convert the times into gate indices and find the runs of equal gates.
+    gates = (times / tau).astype(np.int64)
+    boundaries = np.flatnonzero(np.diff(gates)) + 1
+    lengths = np.diff(np.concatenate(([0], boundaries, [len(gates)])))
+    if len(lengths) and lengths[-1] == 1:
+        lengths = lengths[:-1]
+    # The run lengths are the gate counts, so count how many gates hold each count.
+    return np.bincount(lengths, minlength=1)
+
+
+def gateEnd(times: np.ndarray, tau: int, gate: int):
+
+    '''Finds the index of the first measurement past a gate.
+
+    Requires:
+    - times: the measurement times, sorted from least to greatest.
+    - tau: the gate width.
+    - gate: the gate index.'''
+
+    # int(time/tau) never decreases with time, so the search 
+    # only needs correcting for rounding at the gate edge.
+    index = int(np.searchsorted(times, (gate + 1) * tau))
+    while index < len(times) and int(times[index] / tau) <= gate:
+        index += 1
+    while index > 0 and int(times[index - 1] / tau) > gate:
+        index -= 1
+    return index
+
+
+def liveFrequencies(times: np.ndarray, tau: int, intervals: tuple, counter = None):
+
+    '''Counts the events in each live gate (see liveGates). The measurements 
+    of each live interval are counted with the gate counter, and the gates 
+    holding the first and last measurement of the interval are then taken 
+    out again, along with their measurements.
+
+    Requires:
+    - times: the measurement times, sorted from least to greatest.
+    - tau: the gate width.
+    - intervals: the start and end times of each live interval.
+    - counter: the function that counts the gates of sorted times the way 
+    randomCounts does. If not given, uses the compiled kernel if it is 
+    selected and gateFrequencies otherwise.
+
+    Returns the number of live gates holding each number of events, 
+    without the empty gates.'''
+
+    if counter is None:
+        counter = kernels.randomCounts if kernels.compiled() else gateFrequencies
+    frequencies = np.zeros(1, dtype=np.int64)
+    lows = np.searchsorted(times, intervals[0])
+    highs = np.searchsorted(times, intervals[1], side='right')
+    for low, high in zip(lows, highs):
+        inside = times[low:high]
+        first, last = int(inside[0] / tau), int(inside[-1] / tau)
+        # An interval within one gate has no live gates.
+        if first == last:
+            continue
+        counts = np.asarray(counter(inside, tau), dtype=np.int64)
+        # The first gate is always counted, the last one only if it has more than one measurement.
+        edges = [gateEnd(inside, tau, first), len(inside) - gateEnd(inside, tau, last - 1)]
+        if edges[1] == 1:
+            edges.pop()
+        counts = counts - np.bincount(edges, minlength=len(counts))
+        frequencies = np.pad(frequencies, (0, max(len(counts) - len(frequencies), 0)))
+        frequencies[:len(counts)] += counts
+    return frequencies[:np.max(np.flatnonzero(frequencies), initial=0) + 1]
+
+
+def addCounts(frequencies: np.ndarray, counts):
+
+    '''Adds gate counts to a frequency array, growing it as needed.
+
+    Requires:
+    - frequencies: the current frequency of each count.
+    - counts: the counts of the gates to add.'''
+
+    added = np.bincount(np.asarray(counts, dtype=np.int64))
+    if len(added) > len(frequencies):
+        frequencies = np.concatenate((frequencies, np.zeros(len(added) - len(frequencies), dtype=np.int64)))
+    frequencies[:len(added)] += added
+    return frequencies
+
+
+class GateCounter:
+    def __init__(self, taus: list, threshold: float = GAP_THRESHOLD):
+
+        '''
+        Description:
+            - Counts the random trigger gates of many gate widths over a 
+            stream of time-ordered blocks of measurements, one block at a 
+            time. The gate still open at the end of a block is carried over 
+            to the next, so the result matches randomCounts on the whole 
+            measurement. Only one frequency array per gate width is kept, so 
+            the memory grows with the number of gate widths times the 
+            largest count in a gate, not with the number of measurements.
+
+            The live intervals of the measurement (see liveIntervals) are 
+            found along the way, and the gates at the edges of each interval 
+            are kept aside so that they can be left out (see liveFrequencies).
+
+        Inputs:
+            - taus (the gate widths)
+            - threshold (the length of the shortest jump that is dead time)
+        '''
+
+        self.taus = list(taus)
+        self.frequencies = [np.zeros(1, dtype=np.int64) for _ in self.taus]
+        # The gate index and count of the gate still being filled, for each gate width.
+        self.prev = [None] * len(self.taus)
+        self.count = [0] * len(self.taus)
+        # The counts of the first and last gates of the finished intervals, and whether
+        # the first gate of the current interval is still being filled, for each gate width.
+        self.edges = [[] for _ in self.taus]
+        self.opening = [True] * len(self.taus)
+        self.last = 0.0
+        self.threshold = threshold
+        self.starts = []
+        self.ends = []
+
+
+    def recordGates(self, index: int, counts):
+
+        '''Records finished gates of one gate width, keeping the count of 
+        the first gate of an interval aside as an edge.
+
+        Requires:
+        - index: the index of the gate width.
+        - counts: the counts of the finished gates, in time order.'''
+
+        if len(counts) == 0:
+            return
+        if self.opening[index]:
+            self.edges[index].append(counts[0])
+            self.opening[index] = False
+        self.frequencies[index] = addCounts(self.frequencies[index], counts)
+
+
+    def countGates(self, index: int, segments: list, breaks: list):
+
+        '''Adds the gates of one block of measurement times for one gate width.
+
+        Requires:
+        - index: the index of the gate width.
+        - segments: the measurement times of the block, sorted from least to 
+        greatest and split into the parts that belong to each live interval.
+        - breaks: whether each segment starts a new live interval.'''
+
+        for times, new in zip(segments, breaks):
+            # The gate still open at a gap is the last gate of its interval.
+            if new and self.prev[index] is not None:
+                if not self.opening[index]:
+                    self.edges[index].append(self.count[index])
+                self.recordGates(index, [self.count[index]])
+                self.prev[index] = None
+                self.opening[index] = True
+            # Convert the times into gate indices and find the runs of equal gates.
+            gates = (times / self.taus[index]).astype(np.int64)
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(gates)) + 1))
+            lengths = np.diff(np.append(starts, len(gates)))
+            # The first run continues the carried gate if it is the same gate.
+            if self.prev[index] is not None and gates[0] == self.prev[index]:
+                lengths[0] += self.count[index]
+            elif self.prev[index] is not None:
+                self.recordGates(index, [self.count[index]])
+            # Every run but the last is a finished gate.
+            self.recordGates(index, lengths[:-1])
+            self.prev[index] = gates[starts[-1]]
+            self.count[index] = lengths[-1]
+
+
+    def update(self, times: np.ndarray, pool: ThreadPoolExecutor = None):
+
+        '''Adds the next block of measurement times for every gate width.
+
+        Requires:
+        - times: the measurement times of the block, sorted from least to 
+        greatest and after those of the previous blocks.
+        - pool: a thread pool that counts the gate widths at the same time. 
+        If not given, they are counted one after the other.'''
+
+        if len(times) == 0:
+            return
+        # Split the block at the gaps; the first part starts an interval if there is a gap before it.
+        gaps = np.flatnonzero(np.diff(times) > self.threshold) + 1
+        segments = np.split(times, gaps)
+        breaks = [not self.ends or times[0] - self.ends[-1] > self.threshold] + [True] * len(gaps)
+        if pool is None:
+            for index in range(len(self.taus)):
+                self.countGates(index, segments, breaks)
+        else:
+            list(pool.map(self.countGates, range(len(self.taus)), [segments] * len(self.taus), [breaks] * len(self.taus)))
+        # Record the live intervals, extending the last one if this block continues it.
+        if not breaks[0]:
+            self.ends[-1] = segments[0][-1]
+        for segment, new in zip(segments, breaks):
+            if new:
+                self.starts.append(segment[0])
+                self.ends.append(segment[-1])
+        self.last = times[-1]
+
+
+    def intervals(self):
+
+        '''Returns the start and end times of the live intervals found so far, as two arrays.'''
+
+        return np.array(self.starts), np.array(self.ends)
+
+
+    def probabilities(self, meas_time: float = -1, live: bool = False):
+
+        '''Converts the gates counted so far into probabilities.
+
+        Requires:
+        - meas_time: the total measurement time. If not 
+        given, assumes the time of the last measurement.
+        - live: if true, only the gates that are live from start to 
+        end are counted (see liveGates), and meas_time is not used. 
+        Without any gaps, every gate of the single live interval is 
+        counted instead, with its length as the measurement time.
+
+        Returns the probability list of each gate width.'''
+
+        if live and len(self.starts) == 1:
+            live = False
+            meas_time = self.ends[0] - self.starts[0]
+        if meas_time == -1:
+            meas_time = self.last
+        result = []
+        for index, tau in enumerate(self.taus):
+            frequencies = self.frequencies[index].copy()
+            if live:
+                # Take out the edge gates of every interval; the final gate was never recorded.
+                frequencies -= np.bincount(np.asarray(self.edges[index], dtype=np.int64), minlength=len(frequencies))
+                frequencies = frequencies[:np.max(np.flatnonzero(frequencies), initial=0) + 1]
+                num_gates = liveGates(self.intervals(), tau)
+            else:
+                # The final gate is only recorded if it has more than one measurement.
+                if self.count[index] > 1:
+                    frequencies = addCounts(frequencies, [self.count[index]])
+                num_gates = int(meas_time/tau)
+            frequencies[0] += num_gates - np.sum(frequencies)
+            result.append((frequencies/num_gates).tolist())
+        return result
+
+
 class FeynmanY:
     def __init__(self, 
                  tau_range: list[int] = [30, 3000], 
@@ -39,28 +356,56 @@ class FeynmanY:
         self.pred = None
         self.m1 = {}
         self.m2 = {}
+        self.y = {}
+        self.y2 = {}
 
 
 
-    def randomCounts(self, triggers: list[evt.Event], tau: int, meas_time: float = -1):
+    def randomCounts(self, triggers, tau: int, meas_time: float = -1, intervals: tuple = None):
 
-        '''Converts a list of Events into random trigger gate frequencies.
+        '''Converts an EventArray (or a list of Events) into random trigger gate frequencies.
         
         Requires:
-        - triggers: the list of Events. Assumes the 
-        list is sorted from least to greatest time.
-        - tau: the gate width.'''
-
+        - triggers: the EventArray or list of Events. Assumes 
+        it is sorted from least to greatest time.
+        - tau: the gate width.
+        - meas_time: the total measurement time. If not 
+        given, assumes the time of the last measurement.
+        - intervals: the live intervals (see liveIntervals). If 
+        given, only the gates that are live from start to end are 
+        counted (see liveFrequencies) and meas_time is not used. 
+        Without any gaps, every gate of the single live interval is 
+        counted instead, with its length as the measurement time.'''
+
+        meas_time, intervals = measuredTime(meas_time, intervals)
+        # Count only the live gates of each interval, with the compiled kernel or array operations.
+        if intervals is not None:
+            array = triggers.times if isinstance(triggers, evt.EventArray) else np.array([event.time for event in triggers])
+            frequencies = liveFrequencies(array, tau, intervals)
+            num_gates = liveGates(intervals, tau)
+            frequencies[0] += num_gates - np.sum(frequencies)
+            return (frequencies/num_gates).tolist()
+        # Get the measurement times as a plain list.
+        if isinstance(triggers, evt.EventArray):
+            times = triggers.times.tolist()
+        else:
+            times = [event.time for event in triggers]
         # Convert the list of times into gate indices.
         if meas_time == -1:
-            meas_time = triggers[-1]
+            meas_time = times[-1]
         num_gates = int(meas_time/tau)
+        # Count the gates with the compiled kernel if it is selected.
+        if kernels.compiled():
+            array = triggers.times if isinstance(triggers, evt.EventArray) else np.array(times)
+            frequencies = kernels.randomCounts(array, tau).tolist()
+            frequencies[0] += num_gates - sum(frequencies)
+            return [freq/num_gates for freq in frequencies]
         frequencies = []
         count = 1
-        prev = int(triggers[0].time/tau)
+        prev = int(times[0]/tau)
         # For all measurements:
-        for measurement in triggers[1:]:
-            cur = int(measurement.time/tau)
+        for time in times[1:]:
+            cur = int(time/tau)
             # If still in the same gate, increment the count.
             if cur == prev:
                 count += 1
@@ -73,7 +418,7 @@ class FeynmanY:
                 frequencies[count] += 1
                 # Reset variables.
                 count = 1
-                prev = int(measurement.time/tau)
+                prev = cur
         if count != 1:
             while count > len(frequencies)-1:
                 frequencies.append(0)
@@ -84,6 +429,165 @@ class FeynmanY:
         return frequencies
 
 
+    def gateFrequencies(self, times: np.ndarray, tau: int):
+
+        '''Counts the events in each random trigger gate with array operations
+        (see the gateFrequencies function).
+        
+        Requires:
+        - times: the measurement times, sorted from least to greatest.
+        - tau: the gate width.
+        
+        Returns the number of gates holding each number of events.'''
+
+        return gateFrequencies(times, tau)
+
+
+    def movingCounts(self, times: np.ndarray, tau: int, meas_time: float = -1, intervals: tuple = None):
+
+        '''Converts sorted measurement times into moving gate probabilities.
+        Instead of splitting the measurement into back to back gates, a gate
+        of width tau is started at every time between 0 and meas_time - tau,
+        so the gates overlap and every measurement is counted in many gates.
+        The probabilities estimate the same distribution as randomCounts, and
+        can be given to computeMoments the same way.
+
+        The number of measurements in the gate [s, s+tau) only changes when s
+        passes a measurement time t (the measurement leaves the gate) or t-tau
+        (it enters the gate). Between two of these times it is constant: it is
+        the number of entries minus the number of exits so far, a prefix sum
+        over all these times in order, weighted by the length of the interval.
+
+        Requires:
+        - times: the measurement times, sorted from least to greatest.
+        - tau: the gate width.
+        - meas_time: the total measurement time. If not 
+        given, assumes the time of the last measurement.
+        - intervals: the live intervals (see liveIntervals). If given, 
+        the gates start at every time that keeps them inside one 
+        live interval instead, and meas_time is not used.
+
+        Returns the probability of each number of measurements in a gate.'''
+
+        if intervals is None:
+            intervals = ([0], [times[-1] if meas_time == -1 else meas_time])
+        frequencies = np.zeros(1)
+        total = 0
+        for start, end in zip(*intervals):
+            span = end - tau - start
+            if span <= 0:
+                continue
+            inside = times[np.searchsorted(times, start):np.searchsorted(times, end, side='right')]
+            # Both shifted copies of the times are sorted, so the stable sort only has to merge them.
+            edges = np.concatenate((inside - tau, inside, [start, start + span]))
+            steps = np.concatenate((np.ones(len(inside), dtype=np.int64), np.full(len(inside), -1, dtype=np.int64), [0, 0]))
+            order = np.argsort(edges, kind='stable')
+            edges = np.clip(edges[order], start, start + span)
+            counts = np.cumsum(steps[order])[:-1]
+            # Gates starting outside the interval are left out by the clipping, as zero length intervals.
+            lengths = np.diff(edges)
+            added = np.bincount(counts[lengths > 0], weights=lengths[lengths > 0])
+            frequencies = np.pad(frequencies, (0, max(len(added) - len(frequencies), 0)))
+            frequencies[:len(added)] += added
+            total += span
+        if total <= 0:
+            raise ValueError('The gate width ' + str(tau) + ' is longer than the measurement.')
+        return frequencies / total
+
+
+    def randomCountsAll(self, triggers, taus: list, meas_time: float = -1, workers: int = 1, quiet: bool = True, moving: bool = False, intervals: tuple = None):
+
+        '''Converts an EventArray into random trigger gate frequencies for many 
+        gate widths at once. Every gate width is counted from the same array of 
+        times, and the gate widths are split across a pool of threads. The 
+        result for each gate width matches randomCounts.
+        
+        Requires:
+        - triggers: the EventArray. Assumes it is sorted from least to greatest time.
+        - taus: the gate widths.
+        - meas_time: the total measurement time. If not 
+        given, assumes the time of the last measurement.
+        - workers: the number of threads.
+        - quiet: whether or not to hide the progress bar.
+        - moving: whether to use overlapping moving gates (see
+        movingCounts) instead of back to back gates.
+        - intervals: the live intervals (see liveIntervals). If 
+        given, only the gates that are live from start to end are 
+        counted (see liveFrequencies) and meas_time is not used. 
+        Without any gaps, every gate of the single live interval is 
+        counted instead, with its length as the measurement time 
+        (moving gates are always kept inside the interval).
+
+        Returns the probability list of each gate width.'''
+
+        if not moving:
+            meas_time, intervals = measuredTime(meas_time, intervals)
+        times = np.ascontiguousarray(triggers.times, dtype=np.float64)
+        if meas_time == -1:
+            meas_time = times[-1]
+        # The compiled kernel releases the GIL, as do the numpy operations on large arrays.
+        counter = kernels.randomCounts if kernels.compiled() else self.gateFrequencies
+
+        def probabilities(tau):
+            if moving:
+                return self.movingCounts(times, tau, meas_time, intervals).tolist()
+            if intervals is None:
+                frequencies = counter(times, tau).astype(np.int64)
+                num_gates = int(meas_time/tau)
+            else:
+                frequencies = liveFrequencies(times, tau, intervals, counter)
+                num_gates = liveGates(intervals, tau)
+            frequencies[0] += num_gates - np.sum(frequencies)
+            return (frequencies/num_gates).tolist()
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            return list(tqdm(pool.map(probabilities, taus), total=len(taus), disable=quiet))
+
+
+    def randomCountsFromBlocks(self, blocks, tau: int, meas_time: float = -1):
+
+        '''Converts a stream of time-ordered EventArray blocks into random 
+        trigger gate frequencies, holding only one block in memory. The 
+        gate that is open at the end of a block is carried over to the 
+        next, so the result matches randomCounts on the whole measurement.
+        
+        Requires:
+        - blocks: an iterable of EventArrays, sorted from least to greatest time.
+        - tau: the gate width.
+        - meas_time: the total measurement time. If not 
+        given, assumes the time of the last measurement.'''
+
+        return self.randomCountsFromBlocksAll(blocks, [tau], meas_time)[0]
+
+
+    def randomCountsFromBlocksAll(self, blocks, taus: list, meas_time: float = -1, workers: int = 1, threshold: float = None):
+
+        '''Converts a stream of time-ordered EventArray blocks into random 
+        trigger gate frequencies for many gate widths in one pass (see 
+        GateCounter), counting the gate widths of each block on a pool of 
+        threads. The result for each gate width matches randomCounts on the 
+        whole measurement.
+        
+        Requires:
+        - blocks: an iterable of EventArrays, sorted from least to greatest time.
+        - taus: the gate widths.
+        - meas_time: the total measurement time. If not 
+        given, assumes the time of the last measurement.
+        - workers: the number of threads.
+        - threshold: if given, only the gates that are live from start 
+        to end are counted, with the jumps between measurements longer 
+        than this as dead time (see liveIntervals), and meas_time is 
+        not used.
+        
+        Returns the probability list of each gate width.'''
+
+        counter = GateCounter(taus) if threshold is None else GateCounter(taus, threshold)
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            for block in blocks:
+                counter.update(block.times, pool)
+        return counter.probabilities(meas_time, threshold is not None)
+
+
     def FeynmanY_histogram(self,
                            probabilities, 
                            show_plot: bool = False,  
@@ -129,20 +633,33 @@ class FeynmanY:
         - probabilities (numpy array): index representing the bin count, and value representing frequency
         '''
 
-        moment1, moment2 = 0, 0
-        for i in range(len(probabilities)):
-            moment1 += (i)*probabilities[i]
-            moment2 += (i)*(i-1)*probabilities[i]
-        moment2 /= 2
-        self.m1[tau] = moment1
-        self.m2[tau] = moment2
+        self.computeAllMoments([probabilities], [tau])
+
+    def computeAllMoments(self, probabilities: list, taus: list):
+
+        '''Creates the two moments, Y, and Y2 of many tau values at once, 
+        with a single vectorized call over every tau value and count.
+        
+        Requires:
+        - probabilities: the probability list of each tau value
+        - taus: the tau values
+
+        Returns the lists of Y and Y2 values.'''
+
+        result = moments.feynmanMoments(moments.frequencyArray(probabilities), taus)
+        for i, tau in enumerate(taus):
+            self.m1[tau] = result['m1'][i]
+            self.m2[tau] = result['m2'][i]
+            self.y[tau] = result['Y'][i]
+            self.y2[tau] = result['Y2'][i]
+        return result['Y'].tolist(), result['Y2'].tolist()
     
     def computeYY2(self, tau: int):
-        # If moments 1 or 2 are not defined for this tau, throw an error.
-        if self.m1.get(tau) is None or self.m2.get(tau) is None:
+        # If the moments are not defined for this tau, throw an error.
+        if self.y.get(tau) is None or self.y2.get(tau) is None:
             raise ValueError()
         # Otherwise, return Y and Y2.
-        return (2*self.m2[tau] + self.m1[tau] - self.m1[tau]*self.m1[tau])/self.m1[tau] - 1, (self.m2[tau] - self.m1[tau]*self.m1[tau]/2)/(tau*1e-9)
+        return self.y[tau], self.y2[tau]
 
 
     def plot(self, taus, ys, save_fig: bool = False, show_plot: bool = False, save_dir: str = './'):
@@ -38,7 +38,9 @@ def main(editorIn: edit.Editor, queue: list[str]):
                                          editor.parameters.settings['General Settings']['Verbose iterations'],
                                          editor.parameters.settings['Histogram Visual Settings'],
                                          editor.parameters.settings['Line Fitting Settings'],
-                                         editor.parameters.settings['Scatter Plot Settings'])
+                                         editor.parameters.settings['Scatter Plot Settings'],
+                                         backend=editor.parameters.settings['General Settings'].get('Kernel backend', 'auto'),
+                                         workers=editor.parameters.settings['General Settings'].get('Workers', 1))
                     editor.log('Ran the entire Feynman Y analysis on file ' 
                                 + editor.parameters.settings['Input/Output Settings']['Input file/folder'] 
                                 + '.\n')
@@ -11,14 +11,17 @@ Imported as "td" (time difference)
 # Necessary imports.
 import numpy as np
 from . import plots as plt
+from . import engine as eng
+from lmx import kernels
 import Event as evt
+import loader as ld
 import lmxReader as lmx
 import os
-import json
+import copy
+from concurrent.futures import ProcessPoolExecutor
 
 from tkinter import *               # for the gui--TODO: implement
 from tqdm import tqdm               # for the progress bar
-import math                         # used in the unmaintained MARBE functions
 from . import rossiAlpha as ra      # to import some of the functions used across the entire rossi alpha method
 
 # to allow for importing global files of the same name
@@ -33,43 +36,55 @@ sys.path = ogPath
 # ----------------driving the calculations of the timeDifCalcs class objects----------------
 
 
-def createTimeDifs(timeDifs:dict, settings:dict, settingsPath: str, curFolder:int = 0):
+def createTimeDifs(timeDifs:dict, settings:dict, settingsPath: str, curFolder:int = 0, binned: bool = False, bin_width: float = None):
     
     '''Create Rossi Alpha time differences for files or for a subfolder
     
     Inputs:
     - timeDifs: the calling class's dictionary of time differences 
     - settings: the dictionary holding the runtime settings
-    - curFolder: the current folder being analyzed'''
+    - curFolder: the current folder being analyzed
+    - binned: whether to bin the time differences as they are calculated. If 
+    True, only the histogram counts are stored (in timeDifs['Histogram counts']).
+    - bin_width: the bin width to bin with, if not the one in the settings'''
     
 
+    # Select the compiled or numpy kernels.
+    kernels.setBackend(settings['General Settings'].get('Kernel backend', 'auto'))
     # Clear out the current time difference data and methods.
     timeDifs['Time differences'].clear()
     timeDifs['Time difference method'].clear()
+    timeDifs['Histogram counts'].clear()
+    timeDifs['Histogram totals'].clear()
     # If methods is a list, create a time difference for each instance.
     if isinstance(settings['RossiAlpha Settings']['Time difference method'], list):
-        for method in settings['RossiAlpha Settings']['Time difference method']:
-            timeDifs['Time differences'].append(timeDifCalcs(
-                                                            io=settings['Input/Output Settings'],
-                                                            reset_time=settings['RossiAlpha Settings']['Reset time'], 
-                                                            method=method, 
-                                                            digital_delay=settings['RossiAlpha Settings']['Digital delay'],
-                                                            folderNum=curFolder,
-                                                            sort_data=settings['General Settings']['Sort data']))
-            timeDifs['Time difference method'].append(method)
+        methods = settings['RossiAlpha Settings']['Time difference method']
     # Otherwise, just create one with the given method.
     else:
+        methods = [settings['RossiAlpha Settings']['Time difference method']]
+    # The events are loaded once and shared by every method.
+    events = None
+    for method in methods:
         timeDifs['Time differences'].append(timeDifCalcs(
                                                         io=settings['Input/Output Settings'],
                                                         reset_time=settings['RossiAlpha Settings']['Reset time'], 
-                                                        method=settings['RossiAlpha Settings']['Time difference method'], 
+                                                        method=method, 
                                                         digital_delay=settings['RossiAlpha Settings']['Digital delay'],
                                                         folderNum=curFolder,
-                                                        sort_data=settings['General Settings']['Sort data']))
-        timeDifs['Time difference method'].append(settings['RossiAlpha Settings']['Time difference method'])
-    # For each time difs object, compute the time differences.
-    for i in range(0,len(timeDifs['Time differences'])):
-        timeDifs['Time differences'][i] = timeDifs['Time differences'][i].calculateTimeDifsFromEvents()
+                                                        sort_data=settings['General Settings']['Sort data'],
+                                                        events=events))
+        timeDifs['Time difference method'].append(method)
+        if timeDifs['Time differences'][-1].pregenerated == '':
+            events = timeDifs['Time differences'][-1].events
+    # When binning directly, keep only the histogram counts.
+    if binned:
+        if bin_width is None:
+            bin_width = settings['RossiAlpha Settings']['Bin width']
+        timeDifs['Histogram counts'].extend(calculateMethods(timeDifs['Time differences'], bin_width))
+        timeDifs['Time differences'].clear()
+        return
+    # Compute the time differences of every method in one pass over the events.
+    timeDifs['Time differences'][:] = calculateMethods(timeDifs['Time differences'])
     # save single file time differences if specified
     if settings['Input/Output Settings']['Save time differences'] and curFolder == 0:
         path = ['RossiAlpha', 'time differences']
@@ -77,7 +92,117 @@ def createTimeDifs(timeDifs:dict, settings:dict, settingsPath: str, curFolder:in
         hdf5.writeHDF5Data(timeDifs['Time differences'], key, path, settings, 'processing_data', settingsPath)
 
 
-def folderAnalyzer(timeDifs: dict, settings: dict, settingsPath:str, numFolders: int) -> bool:
+def calculateMethods(calculators: list, bin_width: float = None) -> list:
+    '''Calculates the time differences (or histogram counts) of several time difference
+    objects. Objects that share the same events and reset time are calculated together
+    in a single pass over the events, sharing the window search between methods.
+
+    Inputs:
+    - calculators: the list of timeDifCalcs objects
+    - bin_width: the width of each histogram bin. If given, the time differences
+    are binned as they are calculated and only the histogram counts are kept.
+
+    Outputs:
+    - list: the time differences (or histogram counts) of each object, in order
+    '''
+    results = [None] * len(calculators)
+    groups = {}
+    for index, calculator in enumerate(calculators):
+        # Use the pregenerated time differences if available, 
+        # reading only the ones within this reset time.
+        if calculator.pregenerated != '':
+            calculator.timeDifs, _ = hdf5.readSortedArray(calculator.pregenerated, calculator.reset_time)
+            if bin_width is None:
+                results[index] = calculator.timeDifs
+            else:
+                calculator.counts = eng.histogramTimeDifs([calculator.timeDifs], calculator.reset_time, bin_width)
+                results[index] = calculator.counts
+        # Otherwise, group the objects by the data they calculate from.
+        else:
+            source = id(calculator.events) if calculator.events is not None else calculator.stream
+            groups.setdefault((source, calculator.reset_time), []).append(index)
+    for indices in groups.values():
+        first = calculators[indices[0]]
+        methods = [calculators[index].method for index in indices]
+        digital_delay = next((calculators[index].digital_delay for index in indices if calculators[index].method == 'dd'), None)
+        # Stream LMX files block by block.
+        if first.events is None:
+            chunks = eng.streamMethodTimeDifs(lmx.iterLMXArrays(first.stream),
+                                              first.reset_time,
+                                              methods,
+                                              digital_delay)
+        elif bin_width is None:
+            chunks = [eng.methodTimeDifs(first.events.times,
+                                         first.events.channels,
+                                         first.reset_time,
+                                         methods,
+                                         digital_delay)[0]]
+        else:
+            chunks = eng.methodTimeDifChunks(first.events.times,
+                                             first.events.channels,
+                                             first.reset_time,
+                                             methods,
+                                             digital_delay)
+        if bin_width is None:
+            chunks = list(chunks)
+            for index in indices:
+                calculator = calculators[index]
+                parts = [chunk[calculator.method] for chunk in chunks if calculator.method in chunk]
+                calculator.timeDifs = np.concatenate(parts) if len(parts) else np.array([])
+                results[index] = calculator.timeDifs
+                # Save the time differences for later runs if requested.
+                if calculator.export:
+                    calculator.exportTimeDifs()
+        else:
+            counts = eng.histogramMethodTimeDifs(chunks, first.reset_time, bin_width, methods)
+            for index in indices:
+                calculators[index].counts = counts[calculators[index].method]
+                results[index] = calculators[index].counts
+    return results
+
+
+def folderWorkers(settings: dict) -> int:
+    '''Returns the number of worker processes to use for folder analysis.
+
+    Inputs:
+    - settings: the dictionary that contains all of the runtime settings.
+
+    Outputs:
+    - int: the Workers setting, or the number of CPUs if it is null (1 if the setting is missing)
+    '''
+    workers = settings['General Settings'].get('Workers', 1)
+    if workers is None or workers < 1:
+        return os.cpu_count() or 1
+    return workers
+
+
+def folderHistograms(settings: dict, settingsPath: str, folder: int, keepCounts: bool = False, bin_width: float = None) -> tuple:
+    '''Computes the Rossi Alpha histograms of one subfolder and adds them to
+    a new accumulator per time difference method, ready to be merged with the
+    accumulators of the other subfolders. Runs in a worker process during
+    parallel folder analysis.
+
+    Inputs:
+    - settings: the runtime settings, with the input set to this subfolder
+    - settingsPath: string indicating path to settings file
+    - folder: the number of the subfolder
+    - keepCounts: whether to also return the histogram counts themselves
+    - bin_width: the bin width to bin with, if not the one in the settings
+
+    Outputs:
+    - list: a RossiHistogramAccumulator for each time difference method
+    - list: the histogram counts for each time difference method (None if not kept)
+    '''
+    timeDifs = {'Time differences': [],
+                'Time difference method': [],
+                'Histogram counts': [],
+                'Histogram totals': []}
+    createTimeDifs(timeDifs, settings, settingsPath, folder, True, bin_width)
+    accumulators = [plt.RossiHistogramAccumulator().add(counts) for counts in timeDifs['Histogram counts']]
+    return accumulators, (timeDifs['Histogram counts'] if keepCounts else None)
+
+
+def folderAnalyzer(timeDifs: dict, settings: dict, settingsPath:str, numFolders: int, binned: bool = False, keepFolders: bool = False, bin_width: float = None) -> bool:
     '''Create Rossi Alpha time differences for folders
 
     The indicies will hold each subfolder's data within the index for a given time difference method
@@ -87,6 +212,14 @@ def folderAnalyzer(timeDifs: dict, settings: dict, settingsPath:str, numFolders:
     - settings: the dictionary that contains all of the runtime settings.
     - numFolders
     - window: the gui window, if in gui mode.
+    - binned: whether to bin the time differences as they are calculated. If 
+    True, the subfolder histograms are only combined into one accumulator per method
+    (in timeDifs['Histogram totals']), and the subfolders are analyzed in parallel when 
+    more than one worker is set.
+    - keepFolders: when binning, whether to also store the histogram counts of each 
+    subfolder (in timeDifs['Histogram counts']). They are always kept with verbose iterations,
+    where every subfolder is plotted.
+    - bin_width: when binning, the bin width to bin with, if not the one in the settings
 
     Outputs:
     - bool: true if analysis was successful, false otherwise
@@ -94,34 +227,73 @@ def folderAnalyzer(timeDifs: dict, settings: dict, settingsPath:str, numFolders:
 
     original = settings['Input/Output Settings']['Input file/folder']
     numSets = ra.getNumSets(settings)
+    # the key holding the data for each subfolder
+    key = 'Histogram counts' if binned else 'Time differences'
+    workers = min(folderWorkers(settings), numFolders) if binned else 1
+    keepCounts = keepFolders or settings['General Settings']['Verbose iterations']
     
     # hold a list of all the time difference data across all folders
     combinedTimeDifs = [[] for _ in range(numSets)]
-    
-    print("Calculating time differences...")
-    # iterate through all of the folders (1-based indexing)
-    for folder in tqdm(range(1, numFolders + 1)):
-
-        # Add the folder number to the input.
-        settings['Input/Output Settings']['Input file/folder'] = original + '/' + str(folder)
+    # when binning, the subfolder histograms are merged as they come in
+    totals = [plt.RossiHistogramAccumulator() for _ in range(numSets)]
 
-        # check if the folder exists. if not, abort
-        if not os.path.isdir(settings['Input/Output Settings']['Input file/folder']):
-            print('ERROR: Folder ', settings['Input/Output Settings']['Input file/folder'], ' does not exist on this path. Please review the RossiAlpha documentation.')
+    # check that every folder exists before starting. if not, abort
+    for folder in range(1, numFolders + 1):
+        if not os.path.isdir(original + '/' + str(folder)):
+            print('ERROR: Folder ', original + '/' + str(folder), ' does not exist on this path. Please review the RossiAlpha documentation.')
             print('Aborting...\n')
-            settings['Input/Output Settings']['Input file/folder'] = original
             return False
-        
-        # compute the time difs for this subfolder and add to the list
-        createTimeDifs(timeDifs, settings, settingsPath, folder)
-        for i in range(numSets):
-            combinedTimeDifs[i].append(timeDifs['Time differences'][i])
+    
+    print("Calculating time differences...")
+    if workers > 1:
+        # give each subfolder its own copy of the settings pointing at its input
+        folderSettings = []
+        for folder in range(1, numFolders + 1):
+            folderSettings.append(copy.deepcopy(settings))
+            folderSettings[-1]['Input/Output Settings']['Input file/folder'] = original + '/' + str(folder)
+        # the results come back in folder order, whichever worker finishes first
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(folderHistograms,
+                               folderSettings,
+                               [settingsPath] * numFolders,
+                               range(1, numFolders + 1),
+                               [keepCounts] * numFolders,
+                               [bin_width] * numFolders)
+            for accumulators, counts in tqdm(results, total=numFolders):
+                for i in range(numSets):
+                    totals[i].merge(accumulators[i])
+                    if keepCounts:
+                        combinedTimeDifs[i].append(counts[i])
+    else:
+        # iterate through all of the folders (1-based indexing)
+        for folder in tqdm(range(1, numFolders + 1)):
+
+            # Add the folder number to the input.
+            settings['Input/Output Settings']['Input file/folder'] = original + '/' + str(folder)
+            
+            # bin this subfolder and merge its histograms into the totals
+            if binned:
+                accumulators, counts = folderHistograms(settings, settingsPath, folder, keepCounts, bin_width)
+                for i in range(numSets):
+                    totals[i].merge(accumulators[i])
+                    if keepCounts:
+                        combinedTimeDifs[i].append(counts[i])
+            # or compute the time difs for this subfolder and add to the list
+            else:
+                createTimeDifs(timeDifs, settings, settingsPath, folder)
+                for i in range(numSets):
+                    combinedTimeDifs[i].append(timeDifs[key][i])
     
     # set the class object to the calculated combined time differences
     timeDifs['Time differences'].clear()
     timeDifs['Time difference method'].clear()
-    for i in range(len(combinedTimeDifs)):
-        timeDifs['Time differences'].append(combinedTimeDifs[i])
+    timeDifs['Histogram counts'].clear()
+    timeDifs['Histogram totals'].clear()
+    if binned:
+        timeDifs['Histogram totals'].extend(totals)
+    if not binned or keepCounts:
+        for i in range(len(combinedTimeDifs)):
+            timeDifs[key].append(combinedTimeDifs[i])
     # append the time difference methods
     for i in range(numSets):
         if isinstance(settings['RossiAlpha Settings']['Time difference method'], list):
@@ -133,7 +305,7 @@ def folderAnalyzer(timeDifs: dict, settings: dict, settingsPath:str, numFolders:
     settings['Input/Output Settings']['Input file/folder'] = original
     
     # save time difference data for folders
-    if settings['Input/Output Settings']['Save time differences']:
+    if settings['Input/Output Settings']['Save time differences'] and not binned:
         path = ['RossiAlpha', 'time differences']
         key = [f'{i}' for i in range(1, numFolders + 1)]
         hdf5.writeHDF5Data(timeDifs['Time differences'][0], key, path, settings, 'processing_data', settingsPath)
@@ -147,7 +319,7 @@ class timeDifCalcs:
     '''The time differences object that stores 
     events and calculates time differences.'''
 
-    def __init__(self, io: dict, reset_time: float = None, method: str = 'aa', digital_delay: int = None, folderNum = 0, sort_data: bool = False):
+    def __init__(self, io: dict, reset_time: float = None, method: str = 'aa', digital_delay: int = None, folderNum = 0, sort_data: bool = False, events: evt.EventArray = None):
         
         '''Initializes a time difference object. Autogenerates variables where necessary.
     
@@ -158,7 +330,10 @@ class timeDifCalcs:
         - reset_time: the maximum time difference allowed. If 
         not given, will autogenerate the best reset time.
         - method: the method of calculating time 
-        differences (assumes aa).'''
+        differences (assumes aa).
+        - events: the already loaded (and sorted, if applicable) events 
+        of the input, shared with other time difference objects. If not 
+        given, the events are loaded from the input.'''
         
 
         # If a reset time is given, use it.
@@ -170,10 +345,10 @@ class timeDifCalcs:
         # Store the method of analysis.
         self.method = method
         # When considering digital delay, store given digital delay.
-        if self.method == 'dd':
-            self.digital_delay = digital_delay
-        # Initialize the blank time differences.
+        self.digital_delay = digital_delay if self.method == 'dd' else None
+        # Initialize the blank time differences and histogram counts.
         self.timeDifs = None
+        self.counts = None
         self.export = io['Save time differences']
         self.overwrite = io['Overwrite lower reset times']
         self.outputFolder = io['Save directory']
@@ -191,27 +366,40 @@ class timeDifCalcs:
         # self.outputName = io['Output name']
         self.folderNum = folderNum
         self.file_name = os.path.abspath(self.outputFolder) + '/' + self.outputName + '/' + (str(self.folderNum) + '/' if self.folderNum != 0 else '') + self.method + '/'
+        self.input = os.path.abspath(io['Input file/folder'])
+        self.sort_data = sort_data
+        # Reuse the saved time differences with the shortest reset time that 
+        # covers this one, as long as they were made from the same data and settings.
         self.pregenerated = ''
         if os.path.exists(self.file_name):
-            for time_dif_data in os.listdir(self.file_name):
-                if len(time_dif_data) > 3 and time_dif_data[-3:] == '.td' and time_dif_data[:-3].isnumeric() and int(time_dif_data[:-3]) >= self.reset_time:
-                    self.pregenerated = self.file_name + time_dif_data
+            saved = [int(time_dif_data[:-3]) for time_dif_data in os.listdir(self.file_name)
+                     if time_dif_data.endswith('.h5') and time_dif_data[:-3].isnumeric() and int(time_dif_data[:-3]) >= self.reset_time]
+            for reset in sorted(saved):
+                attributes = hdf5.readArrayAttributes(self.file_name + str(reset) + '.h5')
+                if attributes is not None and all(key in attributes and attributes[key] == value for key, value in self.storeAttributes().items()):
+                    self.pregenerated = self.file_name + str(reset) + '.h5'
                     break
-        if self.pregenerated == '':
-            # Create empty data and time difference lists.
-            self.events = []
+        self.stream = None
+        if self.pregenerated == '' and events is not None:
+            # Share the events that were already loaded.
+            self.events = events
+        elif self.pregenerated == '':
             # Load the data according to its file type.
             if io['Input file/folder'].endswith(".txt"):
-                self.events = evt.createEventsListFromTxtFile(io['Input file/folder'],
-                                                    io['Time column'],
-                                                    io['Channels column'],
-                                                    True,
-                                                    io['Quiet mode'],
-                                                    self.folderNum != 0)
+                self.events = evt.createEventArrayFromTxtFile(io['Input file/folder'],
+                                                              io['Time column'],
+                                                              io['Channels column'],
+                                                              True,
+                                                              io['Quiet mode'],
+                                                              self.folderNum != 0,
+                                                              *ld.cacheSettings(io))
             elif io['Input file/folder'].endswith(".lmx"):
-                self.events =  lmx.readLMXFile(io['Input file/folder'])
+                # LMX files are time ordered, so stream them in blocks instead of loading them.
+                self.events = None
+                self.stream = io['Input file/folder']
             # If folder analysis:
             else:
+                channelFiles = []
                 # For each file in the specified folder:
                 for filename in os.listdir(io['Input file/folder']):
                     if len(filename) >= 14:
@@ -219,39 +407,49 @@ class timeDifCalcs:
                         ntxt = filename[len(filename)-6:]
                         channel = filename[8:len(filename)-6]
                         if board == 'board0ch' and ntxt == '_n.txt' and channel.isnumeric() and int(channel) >= 0:
-                            # Change the input file to this file.
-                            # Add the data from this file to the events list.
-                            self.events.extend(evt.createEventsListFromTxtFile(io['Input file/folder'] + "/" + filename,
-                                                                        io['Time column'],
-                                                                        int(channel),
-                                                                        False,
-                                                                        io['Quiet mode'],
-                                                                        True))
+                            # Add the data from this file to the events.
+                            channelFiles.append(evt.createEventArrayFromTxtFile(io['Input file/folder'] + "/" + filename,
+                                                                                io['Time column'],
+                                                                                int(channel),
+                                                                                False,
+                                                                                io['Quiet mode'],
+                                                                                True,
+                                                                                *ld.cacheSettings(io)))
+                self.events = evt.EventArray.concatenate(channelFiles)
             # Sort the data if applicable.
-            if sort_data:
-                self.events.sort(key=lambda Event: Event.time)
+            if sort_data and self.events is not None:
+                self.events.sort()
+
+    def storeAttributes(self):
+
+        '''Returns the settings saved alongside exported time differences. Saved 
+        time differences are only reused if all of these settings match.
+
+        Outputs:
+        - a dictionary of the settings that produced the time differences.'''
+        
+
+        attributes = {'Input file/folder': self.input, 'Method': self.method, 'Sort data': bool(self.sort_data)}
+        if self.method == 'dd':
+            attributes['Digital delay'] = self.digital_delay
+        return attributes
 
     def exportTimeDifs(self):
+
+        '''Saves the time differences as a sorted, chunked, and compressed binary 
+        file named after the reset time. Later runs with the same or a shorter 
+        reset time read only the part of the file they need.'''
+        
+
         if self.pregenerated == '':
-            file_check = os.path.abspath(self.outputFolder) + '/'
-            if not os.path.exists(file_check):
-                os.mkdir(file_check)
-            file_check += self.outputName + '/'
-            if not os.path.exists(file_check):
-                os.mkdir(file_check)
-            if self.folderNum != 0:
-                file_check += str(self.folderNum) + '/'
-                if not os.path.exists(file_check):
-                    os.mkdir(file_check)
-            file_check += self.method + '/'
-            if not os.path.exists(file_check):
-                os.mkdir(file_check)
+            os.makedirs(self.file_name, exist_ok=True)
             if self.overwrite:
                 for time_dif_data in os.listdir(self.file_name):
-                    if len(time_dif_data) > 3 and time_dif_data[-3:] == '.td' and time_dif_data[:-3].isnumeric() and int(time_dif_data[:-3]) <= self.reset_time:
+                    if time_dif_data.endswith('.h5') and time_dif_data[:-3].isnumeric() and int(time_dif_data[:-3]) <= self.reset_time:
                         os.remove(self.file_name + time_dif_data)
-            with open(self.file_name + str(int(self.reset_time)) + '.td','w') as file:
-                json.dump({"Time differences":self.timeDifs.tolist()},file,indent=2)
+            attributes = self.storeAttributes()
+            attributes['Reset time'] = self.reset_time
+            hdf5.writeSortedArray(self.file_name + str(int(self.reset_time)) + '.h5', self.timeDifs, attributes)
 
     def calculateTimeDifsFromEvents(self):
 
@@ -261,244 +459,97 @@ class timeDifCalcs:
         Outputs:
         - the calculated time differences.'''
         
-        # Construct the empty time differences array, store the total 
-        # number of data points, and initialize the indexing variable.
-        
-        if self.pregenerated != '':
-            with open(self.pregenerated,'r') as file:
-                self.timeDifs = np.array([item for item in json.load(file)['Time differences'] if item <= self.reset_time])
-            return self.timeDifs
-        time_diffs = np.array([])
-        n = len(self.events)
-        i = 0
-        prevent = False
-        # Iterate through the whole time vector.
-        while i < len(self.events):
-            # Create an empty channel bank.
-            ch_bank = set()
-            # Iterate through the rest of the vector
-            # starting 1 after the current data point.
-            for j in range(i + 1, n):
-                # If the current time difference exceeds the 
-                # reset time range, break to the next data point.
-                if self.events[j].time - self.events[i].time > self.reset_time:
-                    break
-                # If the method is any and all, continue. Otherwise, assure 
-                # that the channels are different between the two data points.
-                if((self.method == 'aa') or self.events[j].channel != self.events[i].channel):
-                    # If the method is any and all or cross_correlation, continue. Otherwise, 
-                    # check that the current data point's channel is not in the bank.
-                    if(self.method == 'aa' or 
-                       self.method == 'cc' or 
-                       self.events[j].channel not in ch_bank):
-                        # Add the current time difference to the list.
-                        time_diffs = np.append(time_diffs,(self.events[j].time - self.events[i].time))
-                    # If digital delay is on:
-                    elif(self.method == 'dd'):
-                        # Skip to the nearest data point after the
-                        # current one with the digital delay added.
-                        stamped_time = self.events[i].time
-                        while self.events[i].time < stamped_time + self.digital_delay:
-                           i += 1
-                        prevent = True
-                    # Add the current channel to the channel bank if considering channels.
-                    if(self.method != "aa"):
-                        ch_bank.add(self.events[j].channel)
-            # Iterate to the next data point without double counting for digital delay.
-            if not prevent:
-                i += 1
-            else:
-                prevent = False
-        # Store the time differences array.
-        self.timeDifs = time_diffs
-        
-        # NOTE: the code commented out below saves time differences to a folder with text files
-        # as we move to exporting to hdf5, this is no longer needed
-        
-        # if self.export:
-        #     self.exportTimeDifs()
-
-        # Return the time differences array.
-        return self.timeDifs
+        # Calculate, store, and return the time differences array.
+        return calculateMethods([self])[0]
     
 
-    # NOTE: this function is not currently maintained
-    def calculateTimeDifsAndBin(self, 
-                                input:str,
-                                bin_width:int = None, 
-                                save_fig:bool = False, 
-                                show_plot:bool = True, 
-                                save_dir:str= './', 
-                                plot_opts:dict = None, 
-                                folder:bool = False, 
-                                verbose:bool = False):
-        
-        '''Simultaneously calculates the time differences for 
-        the timeDifs object and adds them to a new histogram.
-        
+    def calculateHistogram(self, bin_width: float):
+
+        '''Returns and stores the histogram counts of the time differences,
+        binning them as they are calculated instead of storing them. Only 
+        the counts and one chunk of time differences are held in memory.
+
         Inputs:
-        - bin width: the width of each histogram bin. If 
-        not given, will autogenerate a reasonable width.
-        TODO: Actually do this.
-        - save_fig: whether or not the figures should be saved 
-        to the given directory after creation (assumes False).
-        - show_plot: whether or not the figures should be 
-        shown to the user upon creation (assumes True).
-        - save_dir: if save_fig is True, what directory the figures 
-        will be saved in (assumes the current working directory).
-        - plot_opts: all the matplotlib plot parameters.
-        - folder: whether or not this plot is for folder analysis.
-        - verbose: whether or not folder analysis should output file results.
-        
+        - bin_width: the width of each histogram bin.
+
         Outputs:
-        - RossiHistogram object
-        - histogram: the list of counts for each histogram bin.
-        - bin_centers: the time at the center of each bin.
-        - bin_edges: the time on the edge of each bin.
-        '''
-        
-        
-        # Store the number of data points, the number of bins, 
-        # and initialize the data point index and histogram array.
-        n = len(self.events)
-        i = 0
-        num_bins = int(self.reset_time / bin_width)
-        histogram = np.zeros(num_bins)
-        prevent = False
-        # Iterate through the whole time vector.
-        while i < len(self.events):
-            # Create an empty channel bank.
-            ch_bank = set()
-            # Iterate through the rest of the vector
-            # starting 1 after the current data point.
-            for j in range(i + 1, n):
-                # If the current time difference exceeds the 
-                # reset time range, break to the next data point.
-                if self.events[j].time - self.events[i].time > self.reset_time:
-                    break
-                # If the method is any and all, continue. Otherwise, assure 
-                # that the channels are different between the two data points.
-                if((self.method == 'aa') or self.events[j].channel != self.events[i].channel):
-                    # If the method is any and all or cross_correlation, continue. Otherwise, 
-                    # check that the current data point's channel is not in the bank.
-                    if(self.method == 'aa' or self.method == 'cc' or self.events[j].channel not in ch_bank):
-                        # Store the current time difference.
-                        thisDif = self.events[j].time - self.events[i].time
-                        # Calculate the bin index for the current time difference.
-                        binIndex = int((thisDif) / bin_width)
-                        # If the calculated index is exactly at the end 
-                        # of the time range, put it into the last bin.
-                        if(binIndex == num_bins):
-                            binIndex -= 1
-                        # Increase the histogram count in the appropriate bin.
-                        histogram[binIndex] += 1    
-                    # If digital delay is on:
-                    elif(self.method == 'dd'):
-                        # Skip to the nearest data point after the
-                        # current one with the digital delay added.
-                        stamped_time = self.events[i]
-                        while self.events[i].time < stamped_time + self.digital_delay:
-                           i += 1
-                        prevent = True
-                    # Add the current channel to the channel bank if considering channels.
-                    if(self.method != "aa"):
-                        ch_bank.add(self.events[j].channel)
-            # Iterate to the next data point.
-            if not prevent:
-                i += 1
-            else:
-                prevent = False
-        # Normalize the histogram.
-        bin_edges = np.linspace(0, self.reset_time, num_bins + 1)
-        bin_centers = 0.5 * (bin_edges[1:] + bin_edges[:-1])
-        # Constuct the rossiHistogram object and plot accordingly.
-        rossiHistogram = plt.RossiHistogram(bin_width= bin_width, reset_time=self.reset_time)
-        rossiHistogram.initFromHist(histogram,bin_centers,bin_edges)
-        rossiHistogram.plotFromHist(input,self.method,plot_opts,save_fig,show_plot,save_dir,folder,verbose)
-        # Return the rossiHistogram object and related NP arrays.
-        return rossiHistogram, histogram, bin_centers, bin_edges
+        - the integer count in each histogram bin.'''
+
+
+        # Calculate, store, and return the histogram counts.
+        return calculateMethods([self], bin_width)[0]
 
 
 
 #------------------------ functions for MARBE ----------------------------------------
-#------------ NOTE: these are not currently maintained -------------------------------
+
+def marbeError(counts: np.ndarray) -> np.ndarray:
+    '''
+    Computes the average relative bin error of combined folder histograms,
+    the quantity MARBE keeps under the "Max avg relative bin err" setting
+
+    Inputs:
+    - counts: histogram counts with one folder per row (second to last axis) and one
+    bin per column (last axis). Leading axes (ex: one per time difference method) are kept.
+
+    Outputs:
+    - the average relative bin error of each combined histogram
+    '''
+    numFolders = counts.shape[-2]
+    uncertainties = np.std(counts, axis=-2, ddof=1) * numFolders
+    # replace zero uncertainties with the average of the nonzero ones (see analyze.replace_zeroes)
+    nonzero = uncertainties != 0
+    numNonzero = np.sum(nonzero, axis=-1, keepdims=True)
+    average = np.sum(uncertainties, axis=-1, keepdims=True) / np.maximum(numNonzero, 1)
+    uncertainties = np.where(nonzero | (numNonzero == 0), uncertainties, average)
+    totals = np.sum(counts, axis=-2).astype(np.float64)
+    return np.sum(uncertainties * totals, axis=-1) / np.sum(totals * totals, axis=-1)
+
 
 def computeMARBE(timeDifs: dict, hist: dict, settings: dict, numFolders: int):
     '''
-    Executes the trial and error portion of MARBE calculation
+    Finds the narrowest bin width whose average relative bin error is under the
+    "Max avg relative bin err" setting for every time difference method
+
+    Every trial bin width is an integer multiple of a base bin width of 1, so
+    the histograms of each trial width are summed from the base histogram of 
+    each folder (see eng.rebinCounts) and the time differences are never used.
+    The error falls as the bins widen, so the width is found by bisection between 1
+    and the widest width that still leaves 4 bins (used if no width meets the cap).
 
     Inputs:
-    - timeDifs: dictionary of time difference data
+    - timeDifs: dictionary holding the base histogram counts of each folder (in timeDifs['Histogram counts'])
     - hist: dictionary of histogram data
     - settings: dictionary of runtime settings
     - numFolders: int indicating number of folders
     '''
-    settings['RossiAlpha Settings']['Bin width'] = math.ceil(settings['RossiAlpha Settings']['Reset time'] / 1000)
-    bestBinFound = False
-    # hold a list of time difference data for the first time diff method listed
-    # (which is the one used for MARBE calculations)
-    timeDifsMARBE = timeDifs['Time differences'][0].copy()
-    bestAvgUncertainty = -1
+    reset = settings['RossiAlpha Settings']['Reset time']
     uncertaintyCap = settings['RossiAlpha Settings']['Max avg relative bin err']
-    while not bestBinFound:
-        RA_hist_array = []
-        RA_std_dev = []
-        RA_hist_total = []
-        uncertainties = []
-        for folder in range(1, numFolders+1):
-            plt.marbePlot(timeDifsMARBE[folder-1],
-                          hist,
-                          settings['RossiAlpha Settings']['Bin width'],
-                          settings['RossiAlpha Settings']['Reset time'])
-            # If this is the first folder, initialize the histogram array.
-            if folder == 1:
-                for histogram in hist['Histogram']:
-                    RA_hist_array.append(histogram.counts)
-            # Otherwise, add the counts to the histogram array.
-            else:
-                for i in range(0, len(hist['Histogram'])):
-                    RA_hist_array[i] = np.vstack((RA_hist_array[i], hist['Histogram'][i].counts))
-
-        # Compute the histogram standard deviation and total.
-        RA_std_dev.append(np.std(RA_hist_array[0], axis=0, ddof=1))
-        RA_hist_total.append(np.sum(RA_hist_array[0], axis=0))
-        # Calculate the uncertainties and replace zeroes.
-        uncertainties.append(RA_std_dev[0] * numFolders)
-        uncertainties[0] = analyze.replace_zeroes(uncertainties[0])
-        # Add the time difference centers and uncertainties to the total histogram.
-        avg_uncertainty = 0.0
-        total_counts_squared = 0
-        for j in range(0, len(RA_hist_total[0])):
-            avg_uncertainty += uncertainties[0][j] * RA_hist_total[0][j]
-            total_counts_squared += RA_hist_total[0][j] * RA_hist_total[0][j]
-        avg_uncertainty /= total_counts_squared
-
-        # determine if best bin was found or if we must continue
-        if avg_uncertainty < uncertaintyCap:
-            bestAvgUncertainty = settings['RossiAlpha Settings']['Bin width']
-            if settings['RossiAlpha Settings']['Bin width'] == 1:
-                bestBinFound = True
+    # one base histogram per method (first axis) and folder (second axis)
+    baseCounts = np.array(timeDifs['Histogram counts'])
+
+    def meetsCap(width: int) -> bool:
+        return bool(np.all(marbeError(eng.rebinCounts(baseCounts, width)) < uncertaintyCap))
+
+    narrow, wide = 1, max(int(reset / 4), 1)
+    if meetsCap(narrow):
+        wide = narrow
+    elif meetsCap(wide):
+        # the cap is met at the wide end and missed at the narrow end
+        while wide - narrow > 1:
+            middle = (narrow + wide) // 2
+            if meetsCap(middle):
+                wide = middle
             else:
-                settings['RossiAlpha Settings']['Bin width'] -= 1
-        else:
-            if settings['RossiAlpha Settings']['Bin width'] == bestAvgUncertainty - 1:
-                settings['RossiAlpha Settings']['Bin width'] = bestAvgUncertainty
-                bestBinFound = True
-            else:
-                if settings['RossiAlpha Settings']['Reset time'] / (settings['RossiAlpha Settings']['Bin width'] + 1) < 4:
-                    bestBinFound = True
-                else:
-                    settings['RossiAlpha Settings']['Bin width'] += 1 
-        
-        # clean up histogram memory
-        hist['Histogram'].clear()
+                narrow = middle
+    settings['RossiAlpha Settings']['Bin width'] = wide
+    hist['Bin width'] = wide
 
 
 def prepMARBE(timeDifs: dict, hist: dict, settings: dict, settingsPath: str, numFolders: int, window: Tk = None):
     '''Function to prepare for automatic bin width computation using MARBE when a bin width is not specified for folder analysis
     
-    NOTE: Automatic bin width calculation is not properly supported for multiple time difference methods at once; it will
-    default to the method listed first in the settings
+    With several time difference methods, the bin width found is the narrowest one that meets the error cap for all of them
     
     Inputs:
     - timeDifs
@@ -508,29 +559,29 @@ def prepMARBE(timeDifs: dict, hist: dict, settings: dict, settingsPath: str, num
     - numFolders: int, holds the number of folders
     - window: the gui window, if applicable
     '''
-    # TODO: temp variable, delete when multiple method MARBE is supported; hold original methods
-    timeDifMethods = settings['RossiAlpha Settings']['Time difference method']
     original = settings['Input/Output Settings']['Input file/folder']
 
-    print('Generating time differences...')
-    successful = folderAnalyzer(timeDifs, settings, settingsPath, numFolders)
+    # bin each folder straight into a base histogram with bins of width 1
+    print('Generating base histograms...')
+    successful = folderAnalyzer(timeDifs, settings, settingsPath, numFolders, True, True, 1)
     if not successful:
         return False
     # Restore the original folder pathway.
     settings['Input/Output Settings']['Input file/folder'] = original
 
-    if isinstance(settings['RossiAlpha Settings']['Time difference method'], list):
-        settings['RossiAlpha Settings']['Time difference method'] = settings['RossiAlpha Settings']['Time difference method'][0]
-        print('Automatic bin width calculation is currently only supported for 1 time difference method at a time.', 
-                    'Defaulting to', 
-                    settings['RossiAlpha Settings']['Time difference method'],
-                    'method for the bin width calculation portion.')
     print("Testing different bin widths...")
         
     # compute MARBE
     computeMARBE(timeDifs, hist, settings, numFolders)
 
+    # sum the histograms of the chosen bin width from the base histograms
+    width = settings['RossiAlpha Settings']['Bin width']
+    for i, baseCounts in enumerate(timeDifs['Histogram counts']):
+        counts = eng.rebinCounts(np.array(baseCounts), width)
+        timeDifs['Histogram counts'][i] = list(counts)
+        timeDifs['Histogram totals'][i] = plt.RossiHistogramAccumulator()
+        for folderCounts in counts:
+            timeDifs['Histogram totals'][i].add(folderCounts)
+
     print('Best bin width for your settings is ' + str(settings['RossiAlpha Settings']['Bin width']) + '\n')
-    # restore original time diff settings in case of change
-    settings['RossiAlpha Settings']['Time difference method'] = timeDifMethods
     return True
\ No newline at end of file
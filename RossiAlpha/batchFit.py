@@ -0,0 +1,339 @@
+'''Batched fitting of Rossi Alpha histograms. Fits many histograms
+at once (ex: every subfolder, every time difference method, and every
+fit window) with a vectorized Levenberg-Marquardt solver that uses the
+closed-form Jacobian of the exponential decay and starts from a
+log-linear guess, instead of one curve_fit call with numerical
+derivatives per histogram.
+
+The model is the one of RossiHistogramFit and Fit_With_Weighting: the
+offset B is the mean of the last 5% of the bins, and A and alpha of
+A*exp(alpha*x) are fitted to the counts above it within the fit window,
+with A >= 0 and alpha <= 0. The uncertainties follow curve_fit: without
+weights the covariance is scaled by the reduced chi squared, with
+weights (absolute sigma) it is not.
+
+Imported as "bf" (batch fit)
+'''
+
+
+
+# Necessary imports.
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+
+
+# The maximum number of Levenberg-Marquardt iterations.
+MAX_ITERATIONS = 200
+# The relative change of the parameters and of the cost at which a fit has converged.
+TOLERANCE = 1e-10
+
+
+def offsets(counts: np.ndarray):
+
+    '''Finds the offset B of each histogram: the mean of its last 5% of
+    bins (all of its bins if it has fewer than 20), as the fit classes do.
+
+    Inputs:
+    - counts: the histogram counts, one histogram per row of the last axis.
+
+    Outputs:
+    - the offset of each histogram.'''
+
+
+    counts = np.asarray(counts, dtype=np.float64)
+    return np.mean(counts[..., -int(counts.shape[-1] * 0.05):], axis=-1)
+
+
+
+def initialGuess(x: np.ndarray, y: np.ndarray, weights: np.ndarray):
+
+    '''Finds the starting A and alpha of each fit from a straight line fit
+    of log(y) against x, weighting each point by y (the inverse of the
+    variance of log(y) for counts). Fits with fewer than two positive
+    points start from their largest count and a decay over the window.
+
+    Inputs:
+    - x: the bin centers.
+    - y: the counts above the offset, one fit per row.
+    - weights: the weight of each point, zero outside the fit window.
+
+    Outputs:
+    - the starting A and alpha of each fit.'''
+
+
+    positive = (weights > 0) & (y > 0)
+    w = np.where(positive, y, 0.0)
+    logY = np.log(np.where(positive, y, 1.0))
+    s0 = np.sum(w, axis=-1)
+    sx = np.sum(w * x, axis=-1)
+    sy = np.sum(w * logY, axis=-1)
+    sxx = np.sum(w * x * x, axis=-1)
+    sxy = np.sum(w * x * logY, axis=-1)
+    det = s0 * sxx - sx * sx
+    valid = (np.sum(positive, axis=-1) >= 2) & (det > 0)
+    det = np.where(valid, det, 1.0)
+    alpha = np.where(valid, (s0 * sxy - sx * sy) / det, 0.0)
+    a = np.where(valid, np.exp(np.clip((sxx * sy - sx * sxy) / det, -700, 700)), 0.0)
+    # Fall back to the largest count and one e-fold over the window.
+    inWindow = weights > 0
+    span = np.max(np.where(inWindow, x, -np.inf), axis=-1) - np.min(np.where(inWindow, x, np.inf), axis=-1)
+    span = np.where(np.isfinite(span) & (span > 0), span, 1.0)
+    a = np.where(valid, a, np.max(np.where(inWindow, y, 0.0), axis=-1))
+    alpha = np.where(valid, alpha, -1 / span)
+    return np.maximum(a, 0.0), np.minimum(alpha, 0.0)
+
+
+
+def normalEquations(x: np.ndarray, y: np.ndarray, weights: np.ndarray, a: np.ndarray, alpha: np.ndarray):
+
+    '''Computes the weighted cost, gradient, and Gauss-Newton matrix of
+    every fit with the closed-form Jacobian of A*exp(alpha*x) (see
+    fitting.exp_decay_2_param_jacobian): exp(alpha*x) and A*x*exp(alpha*x).
+
+    Inputs:
+    - x: the bin centers.
+    - y: the counts above the offset, one fit per row.
+    - weights: the weight of each point, zero outside the fit window.
+    - a, alpha: the parameters of each fit.
+
+    Outputs:
+    - cost: the weighted sum of squared residuals of each fit.
+    - the elements (aa, ab, bb) of the symmetric 2x2 matrix J^T W J.
+    - the elements (a, b) of the gradient J^T W r.'''
+
+
+    dA = np.exp(alpha[:, np.newaxis] * x)
+    model = a[:, np.newaxis] * dA
+    dAlpha = x * model
+    weighted = weights * (y - model)
+    cost = np.einsum('ij,ij->i', weighted, y - model)
+    weightedA = weights * dA
+    matrix = (np.einsum('ij,ij->i', weightedA, dA),
+              np.einsum('ij,ij->i', weightedA, dAlpha),
+              np.einsum('ij,ij->i', weights * dAlpha, dAlpha))
+    gradient = (np.einsum('ij,ij->i', weighted, dA),
+                np.einsum('ij,ij->i', weighted, dAlpha))
+    return cost, matrix, gradient
+
+
+
+def levenbergMarquardt(x: np.ndarray, y: np.ndarray, weights: np.ndarray, a: np.ndarray, alpha: np.ndarray):
+
+    '''Fits A*exp(alpha*x) to every row of y at once with the Levenberg-Marquardt
+    method, keeping A >= 0 and alpha <= 0. Every fit has its own damping and
+    stops on its own once its parameters or cost stop changing; only the fits
+    that are still running are computed at each iteration.
+
+    Inputs:
+    - x: the bin centers.
+    - y: the counts above the offset, one fit per row.
+    - weights: the weight of each point (1/sigma^2), zero outside the fit window.
+    - a, alpha: the starting parameters of each fit.
+
+    Outputs:
+    - the fitted A and alpha, the cost, and the elements of J^T W J of each fit.'''
+
+
+    a, alpha = a.copy(), alpha.copy()
+    damping = np.full(a.shape, 1e-3)
+    cost, matrix, gradient = normalEquations(x, y, weights, a, alpha)
+    matrix, gradient = np.array(matrix), np.array(gradient)
+    active = np.arange(len(a))
+    for _ in range(MAX_ITERATIONS):
+        if not len(active):
+            break
+        # Solve the damped 2x2 system of every running fit in closed form.
+        aa = matrix[0, active] * (1 + damping[active])
+        ab = matrix[1, active]
+        bb = matrix[2, active] * (1 + damping[active])
+        gA, gAlpha = gradient[0, active], gradient[1, active]
+        det = aa * bb - ab * ab
+        solvable = (det > 0) & np.isfinite(det)
+        det = np.where(solvable, det, 1.0)
+        trialA = np.maximum(a[active] + np.where(solvable, (gA * bb - ab * gAlpha) / det, 0.0), 0.0)
+        trialAlpha = np.minimum(alpha[active] + np.where(solvable, (aa * gAlpha - ab * gA) / det, 0.0), 0.0)
+        trialCost, trialMatrix, trialGradient = normalEquations(x, y[active], weights[active], trialA, trialAlpha)
+        better = solvable & (trialCost <= cost[active])
+        # Converged once the accepted step or cost change is negligible.
+        small = ((np.abs(trialA - a[active]) <= TOLERANCE * (np.abs(a[active]) + TOLERANCE)) &
+                 (np.abs(trialAlpha - alpha[active]) <= TOLERANCE * (np.abs(alpha[active]) + TOLERANCE)))
+        flat = cost[active] - trialCost <= TOLERANCE * cost[active]
+        accepted = active[better]
+        a[accepted] = trialA[better]
+        alpha[accepted] = trialAlpha[better]
+        cost[accepted] = trialCost[better]
+        matrix[:, accepted] = np.array(trialMatrix)[:, better]
+        gradient[:, accepted] = np.array(trialGradient)[:, better]
+        damping[active] = np.where(better, damping[active] / 10, damping[active] * 10)
+        active = active[solvable & ~(better & (small | flat)) & (damping[active] < 1e16)]
+    return a, alpha, cost, matrix
+
+
+
+def fitHistograms(counts: np.ndarray,
+                  bin_centers: np.ndarray,
+                  fit_min = None,
+                  fit_max = None,
+                  uncertainties: np.ndarray = None,
+                  guess: tuple = None):
+
+    '''Fits many Rossi Alpha histograms that share the same bins at once.
+
+    Inputs:
+    - counts: the histogram counts, with the bins along the last axis. Any
+    leading axes (ex: subfolders, methods) are kept in the outputs.
+    - bin_centers: the bin centers shared by every histogram.
+    - fit_min, fit_max: the fit window (bins whose centers lie within it are
+    fitted), as numbers or arrays that broadcast against the leading axes of
+    counts (ex: one window per entry of a trailing axis of length 1 in counts).
+    Default to the first and last bin centers.
+    - uncertainties: the uncertainty of each count, for a weighted fit like
+    Fit_With_Weighting. If not given, every count has the same weight.
+    - guess: the starting (A, alpha) of each fit (ex: the fits of neighbouring
+    fit windows), broadcast against the leading axes. Fits whose guess is not
+    finite, or whose A is not positive (a fit stuck at A = 0), start from the
+    log-linear guess, as do all fits if not given.
+
+    Outputs:
+    - a dictionary holding arrays of 'A', 'alpha', 'B', 'A uncertainty', and
+    'alpha uncertainty', with the shape of the broadcast leading axes.'''
+
+
+    x = np.asarray(bin_centers, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    fit_min = np.min(x) if fit_min is None else np.asarray(fit_min, dtype=np.float64)
+    fit_max = np.max(x) if fit_max is None else np.asarray(fit_max, dtype=np.float64)
+    shape = np.broadcast_shapes(counts.shape[:-1], np.shape(fit_min), np.shape(fit_max),
+                                () if uncertainties is None else np.shape(uncertainties)[:-1])
+    counts = np.broadcast_to(counts, shape + (len(x),))
+    inWindow = ((x >= np.asarray(fit_min)[..., np.newaxis]) &
+                (x <= np.asarray(fit_max)[..., np.newaxis]))
+    inWindow = np.broadcast_to(inWindow, shape + (len(x),))
+    if uncertainties is None:
+        weights = inWindow.astype(np.float64)
+    else:
+        uncertainties = np.broadcast_to(np.asarray(uncertainties, dtype=np.float64), shape + (len(x),))
+        weights = np.where(inWindow, 1 / np.where(inWindow, uncertainties, 1.0) ** 2, 0.0)
+    b = offsets(counts)
+    # Fit every histogram and window as one row.
+    y = (counts - b[..., np.newaxis]).reshape(-1, len(x))
+    weights = weights.reshape(-1, len(x))
+    a, alpha = initialGuess(x, y, weights)
+    if guess is not None:
+        guessA = np.broadcast_to(np.asarray(guess[0], dtype=np.float64), shape).reshape(-1)
+        guessAlpha = np.broadcast_to(np.asarray(guess[1], dtype=np.float64), shape).reshape(-1)
+        usable = np.isfinite(guessA) & np.isfinite(guessAlpha) & (guessA > 0)
+        a = np.where(usable, guessA, a)
+        alpha = np.where(usable, np.minimum(guessAlpha, 0.0), alpha)
+    a, alpha, cost, matrix = levenbergMarquardt(x, y, weights, a, alpha)
+    a, alpha, cost = a.reshape(shape), alpha.reshape(shape), cost.reshape(shape)
+    matrix = matrix.reshape((3,) + shape)
+    # The covariance is the inverse of J^T W J, scaled by the reduced chi squared without weights.
+    det = matrix[0] * matrix[2] - matrix[1] * matrix[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varA = matrix[2] / det
+        varAlpha = matrix[0] / det
+        if uncertainties is None:
+            scale = cost / (np.sum(inWindow, axis=-1) - 2)
+            varA, varAlpha = varA * scale, varAlpha * scale
+    return {'A': a,
+            'alpha': alpha,
+            'B': b,
+            'A uncertainty': np.sqrt(varA),
+            'alpha uncertainty': np.sqrt(varAlpha)}
+
+
+
+def scanRows(counts: np.ndarray,
+             bin_centers: np.ndarray,
+             fit_mins: np.ndarray,
+             fit_maxs: np.ndarray,
+             uncertainties: np.ndarray = None,
+             fitter = None,
+             guess: tuple = None):
+
+    '''Fits one histogram over a grid of fit windows, one fit minimum (row)
+    at a time. The fits of every fit maximum in a row are done in one batch,
+    and every row starts from the same guess, so a row's fits do not depend
+    on which rows are scanned with it.
+
+    Inputs:
+    - counts: the histogram counts.
+    - bin_centers: the bin centers of the histogram.
+    - fit_mins: the fit minimums (rows) to scan.
+    - fit_maxs: the fit maximums (columns) to scan.
+    - uncertainties: the uncertainty of each count for a weighted fit, if any.
+    - fitter: the batch fit function, fitHistograms (least squares) if not
+    given or poissonFit.fitHistograms (Poisson likelihood).
+    - guess: the (A, alpha) starting values of each fit maximum, if any.
+
+    Outputs:
+    - a dictionary holding the fitHistograms outputs as (fit minimum, fit maximum)
+    arrays. Windows with fewer than 3 bins are NaN.'''
+
+
+    fitter = fitHistograms if fitter is None else fitter
+    x = np.asarray(bin_centers, dtype=np.float64)
+    fit_maxs = np.asarray(fit_maxs, dtype=np.float64)
+    scan = {}
+    for row, fit_min in enumerate(fit_mins):
+        fitted = fitter(counts, x, fit_min, fit_maxs, uncertainties, guess)
+        # A window needs more bins than parameters to have uncertainties.
+        bins = np.sum((x >= fit_min) & (x <= fit_maxs[:, np.newaxis]), axis=-1)
+        for key, value in fitted.items():
+            scan.setdefault(key, np.full((len(fit_mins), len(fit_maxs)), np.nan))[row] = np.where(bins >= 3, value, np.nan)
+    return scan
+
+
+
+def scanWindows(counts: np.ndarray,
+                bin_centers: np.ndarray,
+                fit_mins: np.ndarray,
+                fit_maxs: np.ndarray,
+                uncertainties: np.ndarray = None,
+                workers: int = 1,
+                fitter = None):
+
+    '''Fits one histogram over every pair of fit minimum and fit maximum.
+    The fit minimums are split into blocks of neighbouring rows, one block
+    per worker process. Every row starts from the fits of the first fit
+    minimum, so the results do not depend on the number of workers.
+
+    Inputs:
+    - counts: the histogram counts.
+    - bin_centers: the bin centers of the histogram.
+    - fit_mins: the fit minimums to scan.
+    - fit_maxs: the fit maximums to scan.
+    - uncertainties: the uncertainty of each count for a weighted fit, if any.
+    - workers: the number of worker processes.
+    - fitter: the batch fit function, fitHistograms (least squares) if not given.
+
+    Outputs:
+    - a dictionary holding the arrays of the fitter outputs (ex: 'A', 'alpha',
+    'B', 'A uncertainty', and 'alpha uncertainty') with one row per fit minimum
+    and one column per fit maximum. Windows with fewer than 3 bins are NaN.'''
+
+
+    fit_mins = np.asarray(fit_mins, dtype=np.float64)
+    if len(fit_mins) == 0:
+        return scanRows(counts, bin_centers, fit_mins, fit_maxs, uncertainties, fitter)
+    # the fits of the first row seed every row, whichever block it is in
+    fitter = fitHistograms if fitter is None else fitter
+    seed = fitter(counts, np.asarray(bin_centers, dtype=np.float64), fit_mins[0],
+                  np.asarray(fit_maxs, dtype=np.float64), uncertainties)
+    guess = (seed['A'], seed['alpha'])
+    blocks = [block for block in np.array_split(fit_mins, max(min(workers, len(fit_mins)), 1)) if len(block)]
+    if len(blocks) <= 1:
+        return scanRows(counts, bin_centers, fit_mins, fit_maxs, uncertainties, fitter, guess)
+    # the blocks come back in order, whichever worker finishes first
+    with ProcessPoolExecutor(max_workers=len(blocks)) as pool:
+        results = list(pool.map(scanRows,
+                                [counts] * len(blocks),
+                                [bin_centers] * len(blocks),
+                                blocks,
+                                [fit_maxs] * len(blocks),
+                                [uncertainties] * len(blocks),
+                                [fitter] * len(blocks),
+                                [guess] * len(blocks)))
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
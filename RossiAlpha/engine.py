@@ -0,0 +1,610 @@
+'''The engine that calculates Rossi Alpha time differences
+from sorted event arrays. The window of partners for every
+data point is found with searchsorted, and the pairs are
+produced as chunks of index arrays built from each window's
+offsets rather than one at a time. Supports the aa, cc, and channel-bank methods
+directly; the dd method moves its starting data point while
+scanning, so it uses the sequential kernel. The sequential kernel
+is compiled with numba when it is installed (see lmx/kernels.py).
+
+Time differences can also be binned as they are calculated,
+so that only the histogram counts and one chunk of time
+differences are ever held in memory.
+
+Imported as "eng" (engine)
+'''
+
+
+
+# Necessary imports.
+import itertools
+import numpy as np
+import Event as evt
+from lmx import kernels
+
+
+
+# The maximum number of pairs produced per chunk.
+CHUNK_PAIRS = 1 << 22
+# The number of events per block when streaming data that is already in memory.
+BLOCK_EVENTS = 1 << 20
+
+
+
+def windowEnds(times: np.ndarray, reset_time: float, stop: int = None):
+
+    '''Finds, for each data point, the first later data point that is
+    more than the reset time away. Matches the comparison
+    times[j] - times[i] > reset_time exactly, including rounding.
+
+    Inputs:
+    - times: the sorted array of measurement times.
+    - reset_time: the maximum time difference allowed.
+    - stop: only find the window ends for the first stop data points.
+    If not given, finds them for every data point.
+
+    Outputs:
+    - ends: the index ending each data point's window (the number
+    of events if the window runs to the end of the data).'''
+
+
+    n = len(times)
+    stop = n if stop is None else stop
+    anchors = np.arange(stop)
+    ends = np.searchsorted(times, times[:stop] + reset_time, side='right')
+    # The bound is based on times[i] + reset_time, which can round differently
+    # than the subtraction. Since the subtraction is monotonic, step each
+    # end back or forward until it matches the subtraction exactly.
+    while True:
+        back = (ends > anchors + 1) & (times[np.maximum(ends - 1, 0)] - times[:stop] > reset_time)
+        if not np.any(back):
+            break
+        ends[back] -= 1
+    while True:
+        ahead = ends < n
+        ahead[ahead] = ~(times[ends[ahead]] - times[:stop][ahead] > reset_time)
+        if not np.any(ahead):
+            break
+        ends[ahead] += 1
+    return np.maximum(ends, anchors + 1)
+
+
+
+def previousSameChannel(channels: np.ndarray):
+
+    '''Finds, for each data point, the closest earlier data point on the same channel.
+
+    Inputs:
+    - channels: the array of channels for each measurement.
+
+    Outputs:
+    - the index of the previous data point on the same channel, or -1 if there is none.'''
+
+
+    order = np.argsort(channels, kind='stable')
+    previous = np.full(len(channels), -1, dtype=np.int64)
+    same = channels[order[1:]] == channels[order[:-1]]
+    previous[order[1:][same]] = order[:-1][same]
+    return previous
+
+
+
+def methodPairChunks(times: np.ndarray,
+                     channels: np.ndarray,
+                     reset_time: float,
+                     methods: list,
+                     stop: int = None,
+                     ends: np.ndarray = None,
+                     chunkPairs: int = CHUNK_PAIRS):
+
+    '''Produces the (earlier, later) index pairs for several of the aa,
+    cc, and channel-bank methods at once, in the same order as the
+    sequential loop, a bounded number of pairs at a time. The window
+    search and the pairs within each window are shared by every method.
+
+    Inputs:
+    - times: the sorted array of measurement times.
+    - channels: the array of channels for each measurement.
+    - reset_time: the maximum time difference allowed.
+    - methods: the list of methods of calculating time differences. Any
+    method other than aa, cc, and dd is the channel-bank method.
+    - stop: only produce pairs starting from the first stop data points.
+    If not given, produces pairs for every data point.
+    - ends: the window ends of the first stop data points, if already
+    found with windowEnds.
+    - chunkPairs: the approximate number of pairs per chunk (before filtering).
+
+    Outputs:
+    - a generator of dictionaries holding the (earlier, later) index
+    array pairs of each method for one chunk.'''
+
+
+    stop = len(times) if stop is None else stop
+    if ends is None:
+        ends = windowEnds(times, reset_time, stop)
+    counts = ends - np.arange(stop) - 1
+    total = np.cumsum(counts)
+    bank = any(method not in ('aa', 'cc') for method in methods)
+    if bank:
+        previous = previousSameChannel(channels)
+    # Split the data points into groups with about chunkPairs pairs each.
+    splits = np.searchsorted(total, np.arange(chunkPairs, total[-1] if stop else 0, chunkPairs), side='right')
+    bounds = np.unique(np.concatenate(([0], splits, [stop])))
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        chunkCounts = counts[first:last]
+        size = int(chunkCounts.sum())
+        if size == 0:
+            continue
+        # Expand each data point into its run of partners.
+        earlier = np.repeat(np.arange(first, last), chunkCounts)
+        later = earlier + 1 + np.arange(size) - np.repeat(np.cumsum(chunkCounts) - chunkCounts, chunkCounts)
+        # Keep only pairs on different channels, and for the channel-bank
+        # method only the first partner on each channel.
+        if len(methods) > 1 or methods[0] != 'aa':
+            different = channels[later] != channels[earlier]
+        if bank:
+            firstOnChannel = different & (previous[later] < earlier)
+        pairs = {}
+        for method in methods:
+            if method == 'aa':
+                pairs[method] = (earlier, later)
+            else:
+                keep = different if method == 'cc' else firstOnChannel
+                pairs[method] = (earlier[keep], later[keep])
+        yield pairs
+
+
+
+def pairChunks(times: np.ndarray,
+               channels: np.ndarray,
+               reset_time: float,
+               method: str = 'aa',
+               stop: int = None,
+               ends: np.ndarray = None,
+               chunkPairs: int = CHUNK_PAIRS):
+
+    '''Produces the (earlier, later) index pairs for the aa, cc,
+    or channel-bank methods, in the same order as the sequential
+    loop, a bounded number of pairs at a time.
+
+    Inputs:
+    - times: the sorted array of measurement times.
+    - channels: the array of channels for each measurement.
+    - reset_time: the maximum time difference allowed.
+    - method: the method of calculating time differences (assumes aa). Any
+    method other than aa, cc, and dd is the channel-bank method.
+    - stop: only produce pairs starting from the first stop data points.
+    If not given, produces pairs for every data point.
+    - ends: the window ends of the first stop data points, if already
+    found with windowEnds.
+    - chunkPairs: the approximate number of pairs per chunk.
+
+    Outputs:
+    - a generator of (earlier, later) index array pairs.'''
+
+
+    for pairs in methodPairChunks(times, channels, reset_time, [method], stop, ends, chunkPairs):
+        yield pairs[method]
+
+
+
+def sequentialTimeDifs(times: np.ndarray,
+                       channels: np.ndarray,
+                       reset_time: float,
+                       method: str = 'aa',
+                       digital_delay: int = None,
+                       final: bool = True):
+
+    '''Calculates time differences one pair at a time. Used for the dd
+    method and for unsorted data, where the window of each data point
+    cannot be found ahead of time.
+
+    Inputs:
+    - times: the array of measurement times.
+    - channels: the array of channels for each measurement.
+    - reset_time: the maximum time difference allowed.
+    - method: the method of calculating time differences (assumes aa).
+    - digital_delay: the amount of digital delay. Only required when using the dd method.
+    - final: whether or not these are the last events of the measurement. If
+    False, a data point whose reset time window runs past the last event is
+    not calculated, since later events could still belong to its window.
+
+    Outputs:
+    - the calculated time differences.
+    - the index of the first data point that was not calculated
+    (the number of events if all of them were).'''
+
+
+    # Use the compiled kernel if it is selected.
+    if kernels.compiled():
+        return kernels.timeDifs(times, channels, reset_time, method, digital_delay, final)
+    # Otherwise walk plain lists of the event columns.
+    times = times.tolist()
+    channels = channels.tolist()
+    time_diffs = []
+    n = len(times)
+    i = 0
+    prevent = False
+    # Iterate through the whole time vector.
+    while i < n:
+        # Remember where this data point started in case it must be redone.
+        anchor = i
+        start = len(time_diffs)
+        closed = False
+        # Create an empty channel bank.
+        ch_bank = set()
+        # Iterate through the rest of the vector
+        # starting 1 after the current data point.
+        for j in range(i + 1, n):
+            # If the current time difference exceeds the
+            # reset time range, break to the next data point.
+            if times[j] - times[i] > reset_time:
+                closed = True
+                break
+            # If the method is any and all, continue. Otherwise, assure
+            # that the channels are different between the two data points.
+            if((method == 'aa') or channels[j] != channels[i]):
+                # If the method is any and all or cross_correlation, continue. Otherwise,
+                # check that the current data point's channel is not in the bank.
+                if(method == 'aa' or
+                   method == 'cc' or
+                   channels[j] not in ch_bank):
+                    # Add the current time difference to the list.
+                    time_diffs.append(times[j] - times[i])
+                # If digital delay is on:
+                elif(method == 'dd'):
+                    # Skip to the nearest data point after the
+                    # current one with the digital delay added.
+                    stamped_time = times[i]
+                    while i < n and times[i] < stamped_time + digital_delay:
+                       i += 1
+                    prevent = True
+                    # Stop if the skip ran past the last event.
+                    if i == n:
+                        break
+                # Add the current channel to the channel bank if considering channels.
+                if(method != "aa"):
+                    ch_bank.add(channels[j])
+        # If more events are coming, leave data points whose
+        # window is not yet complete for the next call.
+        if not final and (not closed or i == n):
+            del time_diffs[start:]
+            return np.array(time_diffs), anchor
+        # Iterate to the next data point without double counting for digital delay.
+        if not prevent:
+            i += 1
+        else:
+            prevent = False
+    # Return the time differences array.
+    return np.array(time_diffs), n
+
+
+
+def methodTimeDifs(times: np.ndarray,
+                   channels: np.ndarray,
+                   reset_time: float,
+                   methods: list,
+                   digital_delay: int = None,
+                   final: bool = True):
+
+    '''Calculates the time differences of event arrays for several methods
+    in one pass. The aa, cc, and channel-bank methods share the window search
+    and pair generation. The output of each method is identical to the
+    sequential loop, value for value.
+
+    Inputs:
+    - times: the array of measurement times.
+    - channels: the array of channels for each measurement.
+    - reset_time: the maximum time difference allowed.
+    - methods: the list of methods of calculating time differences.
+    - digital_delay: the amount of digital delay. Only required when using the dd method.
+    - final: whether or not these are the last events of the measurement. If
+    False, a data point whose reset time window runs past the last event is
+    not calculated, since later events could still belong to its window.
+
+    Outputs:
+    - a dictionary of the calculated time differences for each method.
+    - a dictionary of the index of the first data point that was not
+    calculated for each method (the number of events if all of them were).'''
+
+
+    times = np.asarray(times, dtype=np.float64)
+    channels = np.asarray(channels)
+    time_diffs = {}
+    resume = {}
+    # The dd method and unsorted data need the sequential kernel.
+    unsorted = bool(np.any(times[1:] < times[:-1]))
+    vectorized = [method for method in dict.fromkeys(methods) if method != 'dd' and not unsorted]
+    for method in dict.fromkeys(methods):
+        if method not in vectorized:
+            time_diffs[method], resume[method] = sequentialTimeDifs(times, channels, reset_time, method, digital_delay, final)
+    if len(vectorized):
+        n = len(times)
+        ends = windowEnds(times, reset_time)
+        stop = n
+        # Hold back the data points whose window is still open.
+        if not final:
+            unfinished = np.flatnonzero(ends >= n)
+            stop = int(unfinished[0]) if len(unfinished) else n
+        chunks = {method: [] for method in vectorized}
+        for pairs in methodPairChunks(times, channels, reset_time, vectorized, stop, ends[:stop]):
+            for method, (earlier, later) in pairs.items():
+                chunks[method].append(times[later] - times[earlier])
+        for method in vectorized:
+            time_diffs[method] = np.concatenate(chunks[method]) if len(chunks[method]) else np.array([])
+            resume[method] = stop
+    return time_diffs, resume
+
+
+
+def timeDifsFromArrays(times: np.ndarray,
+                       channels: np.ndarray,
+                       reset_time: float,
+                       method: str = 'aa',
+                       digital_delay: int = None,
+                       final: bool = True):
+
+    '''Calculates the time differences of event arrays with the given method.
+    The output is identical to the sequential loop, value for value.
+
+    Inputs:
+    - times: the array of measurement times.
+    - channels: the array of channels for each measurement.
+    - reset_time: the maximum time difference allowed.
+    - method: the method of calculating time differences (assumes aa).
+    - digital_delay: the amount of digital delay. Only required when using the dd method.
+    - final: whether or not these are the last events of the measurement. If
+    False, a data point whose reset time window runs past the last event is
+    not calculated, since later events could still belong to its window.
+
+    Outputs:
+    - the calculated time differences.
+    - the index of the first data point that was not calculated
+    (the number of events if all of them were).'''
+
+
+    time_diffs, resume = methodTimeDifs(times, channels, reset_time, [method], digital_delay, final)
+    return time_diffs[method], resume[method]
+
+
+
+def streamMethodTimeDifs(blocks,
+                         reset_time: float,
+                         methods: list,
+                         digital_delay: int = None):
+
+    '''Calculates time differences for several methods over one pass of a
+    stream of time-ordered event blocks. Data points near the end of a block
+    are carried over to the next block, so the results are the same as for
+    the whole measurement at once while only a block (plus one reset time of
+    events) is held in memory. Methods that stopped at the same data point
+    share their calculations on the next block.
+
+    Inputs:
+    - blocks: an iterable of time-ordered EventArrays.
+    - reset_time: the maximum time difference allowed.
+    - methods: the list of methods of calculating time differences.
+    - digital_delay: the amount of digital delay. Only required when using the dd method.
+
+    Outputs:
+    - a generator of dictionaries holding the time differences of each method for one block.'''
+
+
+    methods = list(dict.fromkeys(methods))
+    buffer = evt.EventArray()
+    # Where each method resumes in the buffer.
+    start = {method: 0 for method in methods}
+    for block in itertools.chain(blocks, [None]):
+        final = block is None
+        if not final:
+            # Keep only the events still needed and add the new block.
+            first = min(start.values())
+            buffer = evt.EventArray.concatenate([buffer[first:], block])
+            start = {method: start[method] - first for method in methods}
+        time_diffs = {}
+        for offset in sorted(set(start.values())):
+            group = [method for method in methods if start[method] == offset]
+            tail = buffer[offset:]
+            groupDifs, resume = methodTimeDifs(tail.times, tail.channels, reset_time, group, digital_delay, final)
+            for method in group:
+                time_diffs[method] = groupDifs[method]
+                start[method] = offset + resume[method]
+        yield time_diffs
+
+
+
+def streamTimeDifs(blocks,
+                   reset_time: float,
+                   method: str = 'aa',
+                   digital_delay: int = None):
+
+    '''Calculates time differences over a stream of time-ordered event blocks.
+    Data points near the end of a block are carried over to the next block,
+    so the results are the same as for the whole measurement at once while
+    only a block (plus one reset time of events) is held in memory.
+
+    Inputs:
+    - blocks: an iterable of time-ordered EventArrays.
+    - reset_time: the maximum time difference allowed.
+    - method: the method of calculating time differences (assumes aa).
+    - digital_delay: the amount of digital delay. Only required when using the dd method.
+
+    Outputs:
+    - a generator of the time differences for each block.'''
+
+
+    for time_diffs in streamMethodTimeDifs(blocks, reset_time, [method], digital_delay):
+        yield time_diffs[method]
+
+
+
+def methodTimeDifChunks(times: np.ndarray,
+                        channels: np.ndarray,
+                        reset_time: float,
+                        methods: list,
+                        digital_delay: int = None,
+                        blockEvents: int = BLOCK_EVENTS):
+
+    '''Calculates the time differences of event arrays for several methods
+    a bounded chunk at a time. Joining the chunks of a method gives the
+    same array, in the same order, as methodTimeDifs.
+
+    Inputs:
+    - times: the array of measurement times.
+    - channels: the array of channels for each measurement.
+    - reset_time: the maximum time difference allowed.
+    - methods: the list of methods of calculating time differences.
+    - digital_delay: the amount of digital delay. Only required when using the dd method.
+    - blockEvents: the number of events per block for the dd method and unsorted data.
+
+    Outputs:
+    - a generator of dictionaries holding time difference arrays for some
+    or all of the methods.'''
+
+
+    times = np.asarray(times, dtype=np.float64)
+    channels = np.asarray(channels)
+    methods = list(dict.fromkeys(methods))
+    sequential = methods if np.any(times[1:] < times[:-1]) else [method for method in methods if method == 'dd']
+    vectorized = [method for method in methods if method not in sequential]
+    if len(vectorized):
+        for pairs in methodPairChunks(times, channels, reset_time, vectorized):
+            yield {method: times[later] - times[earlier] for method, (earlier, later) in pairs.items()}
+    if len(sequential):
+        # Stream the sequential kernel over blocks of the events.
+        blocks = (evt.EventArray(times[start:start + blockEvents], channels[start:start + blockEvents])
+                  for start in range(0, len(times), blockEvents))
+        yield from streamMethodTimeDifs(blocks, reset_time, sequential, digital_delay)
+
+
+
+def timeDifChunks(times: np.ndarray,
+                  channels: np.ndarray,
+                  reset_time: float,
+                  method: str = 'aa',
+                  digital_delay: int = None,
+                  blockEvents: int = BLOCK_EVENTS):
+
+    '''Calculates the time differences of event arrays a bounded chunk
+    at a time. Joining the chunks gives the same array, in the same
+    order, as timeDifsFromArrays.
+
+    Inputs:
+    - times: the array of measurement times.
+    - channels: the array of channels for each measurement.
+    - reset_time: the maximum time difference allowed.
+    - method: the method of calculating time differences (assumes aa).
+    - digital_delay: the amount of digital delay. Only required when using the dd method.
+    - blockEvents: the number of events per block for the dd method and unsorted data.
+
+    Outputs:
+    - a generator of time difference arrays.'''
+
+
+    for time_diffs in methodTimeDifChunks(times, channels, reset_time, [method], digital_delay, blockEvents):
+        yield time_diffs[method]
+
+
+
+def binEdges(reset_time: float, bin_width: float):
+
+    '''Finds the histogram bin edges used for Rossi Alpha histograms.
+
+    Inputs:
+    - reset_time: the maximum time difference allowed.
+    - bin_width: the width of each histogram bin.
+
+    Outputs:
+    - the bin edges, identical to those given by np.histogram.'''
+
+
+    return np.histogram_bin_edges(np.empty(0), bins=int(reset_time / bin_width), range=(0, reset_time))
+
+
+
+def histogramTimeDifs(chunks, reset_time: float, bin_width: float):
+
+    '''Bins chunks of time differences into one histogram as they
+    arrive, without keeping the time differences. Each chunk is binned
+    exactly like RossiHistogram bins a whole time difference array.
+
+    Inputs:
+    - chunks: an iterable of time difference arrays.
+    - reset_time: the maximum time difference allowed.
+    - bin_width: the width of each histogram bin.
+
+    Outputs:
+    - the integer count in each bin.'''
+
+
+    num_bins = int(reset_time / bin_width)
+    counts = np.zeros(num_bins, dtype=np.int64)
+    for time_diffs in chunks:
+        counts += np.histogram(time_diffs, bins=num_bins, range=[0, reset_time])[0]
+    return counts
+
+
+
+def histogramMethodTimeDifs(chunks, reset_time: float, bin_width: float, methods: list):
+
+    '''Bins chunks of time differences for several methods into one
+    histogram per method as they arrive, without keeping the time differences.
+
+    Inputs:
+    - chunks: an iterable of dictionaries holding time difference
+    arrays for some or all of the methods.
+    - reset_time: the maximum time difference allowed.
+    - bin_width: the width of each histogram bin.
+    - methods: the list of methods of calculating time differences.
+
+    Outputs:
+    - a dictionary of the integer count in each bin for each method.'''
+
+
+    counts = {method: histogramTimeDifs([], reset_time, bin_width) for method in methods}
+    for time_diffs in chunks:
+        for method, values in time_diffs.items():
+            counts[method] += histogramTimeDifs([values], reset_time, bin_width)
+    return counts
+
+
+
+def baseHistogram(time_diffs, reset_time: float, base_width: float = 1):
+
+    '''Bins time differences into a fine base histogram, from which the
+    histogram of any integer multiple of the base width can be summed
+    (see rebinCounts). The bins are exactly base_width wide, so the
+    time differences past the last whole bin of the reset time are left out.
+
+    Inputs:
+    - time_diffs: an array of time differences.
+    - reset_time: the maximum time difference allowed.
+    - base_width: the width of each base bin (1 by default).
+
+    Outputs:
+    - the integer count in each base bin.'''
+
+
+    num_bins = int(reset_time / base_width)
+    return np.histogram(time_diffs, bins=num_bins, range=[0, num_bins * base_width])[0].astype(np.int64)
+
+
+
+def rebinCounts(counts: np.ndarray, factor: int):
+
+    '''Sums adjacent bins of base histograms into histograms with bins
+    factor times as wide. The base bins left over after the last whole
+    wide bin are dropped. When factor divides the number of base bins,
+    the result is the histogram np.histogram gives for that bin width.
+
+    Inputs:
+    - counts: the base histogram counts, or a 2D array with one base histogram per row.
+    - factor: the number of base bins in each new bin.
+
+    Outputs:
+    - the integer count in each new bin (one row per base histogram).'''
+
+
+    counts = np.asarray(counts)
+    num_bins = counts.shape[-1] // factor
+    return counts[..., :num_bins * factor].reshape(counts.shape[:-1] + (num_bins, factor)).sum(axis=-1)
@@ -4,6 +4,9 @@ from scipy.optimize import curve_fit
 import os
 
 from . import rossiAlpha as ra
+from . import batchFit as bf
+from . import resample as rs
+from . import poissonFit as pf
 import hdf5
 plt.ioff()
 
@@ -31,7 +34,8 @@ def createBestFit(fit:dict, hist:dict, settings: dict, settingsPath: str):
                                                 hist['Histogram'][i].bin_centers,
                                                 method,
                                                 fit['Fit minimum'][j],
-                                                fit['Fit maximum'][j]))
+                                                fit['Fit maximum'][j],
+                                                fitMethod(settings)))
             # craft the output name
             output = settings['Input/Output Settings']['Input file/folder']
             output = output[output.rfind('/')+1:]
@@ -100,7 +104,8 @@ def folderFit(fit: dict, hist: dict, settings: dict, settingsPath: str, numFolde
                                                     fit['Fit maximum'][j],
                                                     settings['Input/Output Settings']['Save directory'],
                                                     settings['Line Fitting Settings'], 
-                                                    settings['Scatter Plot Settings']))
+                                                    settings['Scatter Plot Settings'],
+                                                    fitMethod(settings)))
             # Fit the total histogram with weighting.
             fit['Best fit'][-1].fit_RA_hist_weighting()
             # Plot the total histogram fit.
@@ -130,12 +135,193 @@ def folderFit(fit: dict, hist: dict, settings: dict, settingsPath: str, numFolde
                                    settingsPath)
 
 
+def scanFitWindows(fit: dict, hist: dict, settings: dict, settingsPath: str, weighted: bool = False, workers: int = 1):
+    '''Fit the current Rossi Alpha histogram(s) over a grid of fit minimums and maximums
+    to map how alpha depends on the fit window, without recalculating the histograms.
+
+    Inputs:
+    - fit: dictionary from the calling class to add the scan to
+    - hist: dictionary from the calling class containing histogram data
+    - settings: dictionary holding the runtime settings
+    - settingsPath: string path to the settings file
+    - weighted: whether to weight the fits by the histogram uncertainties (folder analysis)
+    - workers: the number of worker processes to split the scan across'''
+
+    fit['Window scan'].clear()
+    fitMins = scanRange(settings['RossiAlpha Settings']['Scan fit minimum'])
+    fitMaxs = scanRange(settings['RossiAlpha Settings']['Scan fit maximum'])
+    name = settings['Input/Output Settings']['Input file/folder']
+    name = name[name.rfind('/')+1:]
+
+    # for each histogram data set to be scanned
+    for i in range(0, len(hist['Histogram'])):
+        # figure out the time difference method used
+        if isinstance(settings['RossiAlpha Settings']['Time difference method'], list):
+            method = settings['RossiAlpha Settings']['Time difference method'][i]
+        else:
+            method = settings['RossiAlpha Settings']['Time difference method']
+        scan = bf.scanWindows(hist['Histogram'][i].counts,
+                              hist['Histogram'][i].bin_centers,
+                              fitMins,
+                              fitMaxs,
+                              hist['Uncertainty'][i] if weighted else None,
+                              workers,
+                              batchFitter(settings))
+        scan['Fit minimum'] = fitMins
+        scan['Fit maximum'] = fitMaxs
+        fit['Window scan'].append(scan)
+        suffix = name + '_' + method + '_' + str(settings['RossiAlpha Settings']['Bin width']) + '_' + str(settings['RossiAlpha Settings']['Reset time'])
+        plotWindowScan(scan,
+                       settings['Input/Output Settings']['Save figures'],
+                       settings['Input/Output Settings']['Save directory'],
+                       settings['General Settings']['Show plots'],
+                       suffix,
+                       method)
+        # save the maps to hdf5 if desired
+        if settings['Input/Output Settings']['Save outputs']:
+            hdf5.writeHDF5Data([fitMins, fitMaxs, scan['alpha'], scan['alpha uncertainty'], scan['A'], scan['A uncertainty']],
+                               ['fit minimum', 'fit maximum', 'alpha', 'alpha uncertainty', 'A', 'A uncertainty'],
+                               ['RossiAlpha', 'fit', 'window scan', method],
+                               settings,
+                               'pynoise',
+                               settingsPath)
+
+
+def resampleFit(fit: dict, hist: dict, settings: dict, settingsPath: str, workers: int = 1):
+    '''Estimate the uncertainty of the folder analysis alpha by bootstrap and delete-one jackknife
+    resampling of the subfolder histograms, without recalculating the time differences.
+
+    Inputs:
+    - fit: dictionary from the calling class to add the resampling results to
+    - hist: dictionary from the calling class containing histogram data, including the subfolder counts
+    - settings: dictionary holding the runtime settings
+    - settingsPath: string path to the settings file
+    - workers: the number of worker processes to split the replicates across'''
+
+    setupFit(fit, settings)
+    fit['Resampling'].clear()
+    name = settings['Input/Output Settings']['Input file/folder']
+    name = name[name.rfind('/')+1:]
+
+    # for each histogram data set to be resampled
+    for i in range(0, len(hist['Histogram'])):
+        # figure out the time difference method used
+        if isinstance(settings['RossiAlpha Settings']['Time difference method'], list):
+            method = settings['RossiAlpha Settings']['Time difference method'][i]
+        else:
+            method = settings['RossiAlpha Settings']['Time difference method']
+        resampled = rs.resampleAlpha(hist['Folder counts'][i],
+                                     hist['Histogram'][i].bin_centers,
+                                     fit['Fit minimum'],
+                                     fit['Fit maximum'],
+                                     settings['RossiAlpha Settings']['Bootstrap replicates'],
+                                     settings['RossiAlpha Settings']['Bootstrap seed'],
+                                     workers,
+                                     batchFitter(settings))
+        fit['Resampling'].append(resampled)
+        suffix = name + '_' + method + '_' + str(settings['RossiAlpha Settings']['Bin width']) + '_' + str(settings['RossiAlpha Settings']['Reset time'])
+        for j in range(len(fit['Fit minimum'])):
+            window = f"{fit['Fit minimum'][j]}-{fit['Fit maximum'][j]}"
+            print(f"{method} {window}: alpha = {resampled['alpha'][j]:.4g}"
+                  f" +/- {resampled['bootstrap uncertainty'][j]:.2g} (bootstrap)"
+                  f" +/- {resampled['jackknife uncertainty'][j]:.2g} (jackknife)")
+            plotResampling(resampled,
+                           j,
+                           settings['Input/Output Settings']['Save figures'],
+                           settings['Input/Output Settings']['Save directory'],
+                           settings['General Settings']['Show plots'],
+                           suffix + '_' + window,
+                           method)
+            # save the distributions to hdf5 if desired
+            if settings['Input/Output Settings']['Save outputs']:
+                hdf5.writeHDF5Data([resampled['alpha'][j],
+                                    resampled['bootstrap alpha'][:, j],
+                                    resampled['jackknife alpha'][:, j],
+                                    resampled['bootstrap uncertainty'][j],
+                                    resampled['bootstrap interval'][:, j],
+                                    resampled['jackknife uncertainty'][j],
+                                    resampled['jackknife bias'][j]],
+                                   ['alpha', 'bootstrap alpha', 'jackknife alpha', 'bootstrap uncertainty',
+                                    'bootstrap interval', 'jackknife uncertainty', 'jackknife bias'],
+                                   ['RossiAlpha', 'fit', 'resampling', method, window],
+                                   settings,
+                                   'pynoise',
+                                   settingsPath)
+
+
+def plotResampling(resampled: dict, window: int, save_fig: bool, save_dir: str, show_plot: bool, pngSuffix: str, method: str = 'aa'):
+    '''Plot the bootstrap distribution of alpha for one fit window, with the jackknife replicates.
+
+    Inputs:
+    - resampled: the resampling dictionary from resampleFit
+    - window: the index of the fit window
+    - save_fig: whether to save the figure
+    - save_dir: the directory to save the figure in
+    - show_plot: whether to show the figure
+    - pngSuffix: the suffix of the figure file name
+    - method: the time difference method of the histogram'''
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    bootstrap = resampled['bootstrap alpha'][:, window]
+    ax.hist(bootstrap[np.isfinite(bootstrap)], bins='auto', color='#162F65', alpha=0.6, label='Bootstrap')
+    for k, value in enumerate(resampled['jackknife alpha'][:, window]):
+        ax.axvline(value, color='#B2CBDE', linewidth=1, label='Jackknife' if k == 0 else None)
+    ax.axvline(resampled['alpha'][window], color='red', linestyle='--', label='All subfolders')
+    ax.set_xlabel('alpha (1/ns)')
+    ax.set_ylabel('Replicates')
+    ax.set_title('Resampled Alpha Using ' + method)
+    ax.legend()
+
+    if save_fig:
+        fig.tight_layout()
+        save_filename = os.path.join(save_dir, 'alpha_resampling_' + pngSuffix + '.png')
+        fig.savefig(save_filename, dpi=300, bbox_inches='tight')
+    if show_plot:
+        plt.show()
+    plt.close()
+
+
+def plotWindowScan(scan: dict, save_fig: bool, save_dir: str, show_plot: bool, pngSuffix: str, method: str = 'aa'):
+    '''Plot the alpha and relative alpha uncertainty maps of a fit window scan.
+
+    Inputs:
+    - scan: the window scan dictionary from scanFitWindows
+    - save_fig: whether to save the figure
+    - save_dir: the directory to save the figure in
+    - show_plot: whether to show the figure
+    - pngSuffix: the suffix of the figure file name
+    - method: the time difference method of the histogram'''
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+    # the maps are indexed by (fit minimum, fit maximum), so plot the maximum along the x axis
+    image = ax1.pcolormesh(scan['Fit maximum'], scan['Fit minimum'], np.ma.masked_invalid(scan['alpha']), shading='nearest')
+    fig.colorbar(image, ax=ax1, label='alpha (1/ns)')
+    ax1.set_title('Alpha Using ' + method)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.abs(scan['alpha uncertainty'] / scan['alpha']) * 100
+    image = ax2.pcolormesh(scan['Fit maximum'], scan['Fit minimum'], np.ma.masked_invalid(relative), shading='nearest')
+    fig.colorbar(image, ax=ax2, label='Relative uncertainty (%)')
+    ax2.set_title('Alpha Uncertainty Using ' + method)
+    for ax in (ax1, ax2):
+        ax.set_xlabel('Fit maximum (ns)')
+        ax.set_ylabel('Fit minimum (ns)')
+
+    if save_fig:
+        fig.tight_layout()
+        save_filename = os.path.join(save_dir, 'fit_window_scan_' + pngSuffix + '.png')
+        fig.savefig(save_filename, dpi=300, bbox_inches='tight')
+    if show_plot:
+        plt.show()
+    plt.close()
+
+
 # ---------- helper functions for the main fit functions -------------------
 
 
 def subfolderFit(fit:dict, hist: dict, settings: dict, settingsPath: str, numFolders: int):
     '''
-    Create fit plots for subfolders in a folder analysis
+    Create fit plots for subfolders in a folder analysis. The histograms of every
+    subfolder, time difference method, and fit window are fitted in one batch.
 
     Inputs:
     - fit: dictionary from the calling class to add fit data to
@@ -144,50 +330,61 @@ def subfolderFit(fit:dict, hist: dict, settings: dict, settingsPath: str, numFol
     - settingsPath: string path to the settings file
     - numFolder: number of subfolders    
     '''
-    if isinstance(settings['RossiAlpha Settings']['Time difference method'], list):
-        method = settings['RossiAlpha Settings']['Time difference method'][0]
-    else:
-        method = settings['RossiAlpha Settings']['Time difference method']
+    numSets = ra.getNumSets(settings)
+    # the subplots hold each method's histogram for the first subfolder, then the second, etc.
+    counts = np.array([subplot.counts for subplot in hist['Subplots']]).reshape(numFolders, numSets, 1, -1)
+    fitted = batchFitter(settings)(counts,
+                              hist['Subplots'][0].bin_centers,
+                              np.array(fit['Fit minimum'], dtype=float),
+                              np.array(fit['Fit maximum'], dtype=float))
     for folder in range(numFolders):
-        for i in range(len(fit['Fit minimum'])):
-            subfolder = RossiHistogramFit(hist['Subplots'][folder].counts,
-                                          hist['Subplots'][folder].bin_centers,
-                                          method,
-                                          fit['Fit minimum'][i],
-                                          fit['Fit maximum'][i])
-            # craft the output name
-            output =  settings['Input/Output Settings']['Input file/folder']
-            output = output + f'/{folder + 1}'
-            output = output[output[:output.rfind('/')].rfind('/')+1:].replace('/','-')
-            output = output + '_' + method + '_' + str(settings['RossiAlpha Settings']['Bin width']) + '_' + str(settings['RossiAlpha Settings']['Reset time'])
-            subfolder.fit_and_residual(settings['Input/Output Settings']['Save figures'],
-                                                settings['Input/Output Settings']['Save directory'],
-                                                settings['General Settings']['Show plots'],
-                                                settings['Line Fitting Settings'],
-                                                settings['Scatter Plot Settings'],
-                                                settings['Histogram Visual Settings'],
-                                                output,
-                                                method,
-                                                True,
-                                                settings['General Settings']['Verbose iterations'])
-            if settings['Input/Output Settings']['Save outputs']:
-                array = np.array([hist['Subplots'][folder].bin_centers, hist['Subplots'][folder].counts]).T
-                array = [array, subfolder.pred, subfolder.residuals]
-                hdf5.writeHDF5Data(array,
-                                   ['plot values', 'fit count', 'perr'],
-                                   ['RossiAlpha', 'fit', str(folder + 1), f"{fit['Fit minimum'][i]}-{fit['Fit maximum'][i]}", 'plot'],
-                                   settings,
-                                   'pynoise',
-                                   settingsPath)
-
-                array2 = [subfolder.a, subfolder.perr[0], subfolder.alpha, subfolder.perr[1], subfolder.b]
-                hdf5.writeHDF5Data(array2,
-                                   ['A', 'A uncertainty', 'alpha', 'alpha uncertainty', 'B'],
-                                   ['RossiAlpha', 'fit', str(folder + 1), f"{fit['Fit minimum'][i]}-{fit['Fit maximum'][i]}", 'function'],
-                                   settings,
-                                   'pynoise',
-                                   settingsPath)
-            plt.close()
+        for j in range(numSets):
+            if isinstance(settings['RossiAlpha Settings']['Time difference method'], list):
+                method = settings['RossiAlpha Settings']['Time difference method'][j]
+            else:
+                method = settings['RossiAlpha Settings']['Time difference method']
+            subplot = hist['Subplots'][folder * numSets + j]
+            for i in range(len(fit['Fit minimum'])):
+                subfolder = RossiHistogramFit(subplot.counts,
+                                              subplot.bin_centers,
+                                              method,
+                                              fit['Fit minimum'][i],
+                                              fit['Fit maximum'][i],
+                                              fitMethod(settings))
+                # craft the output name
+                output =  settings['Input/Output Settings']['Input file/folder']
+                output = output + f'/{folder + 1}'
+                output = output[output[:output.rfind('/')].rfind('/')+1:].replace('/','-')
+                output = output + '_' + method + '_' + str(settings['RossiAlpha Settings']['Bin width']) + '_' + str(settings['RossiAlpha Settings']['Reset time'])
+                subfolder.fit_and_residual(settings['Input/Output Settings']['Save figures'],
+                                                    settings['Input/Output Settings']['Save directory'],
+                                                    settings['General Settings']['Show plots'],
+                                                    settings['Line Fitting Settings'],
+                                                    settings['Scatter Plot Settings'],
+                                                    settings['Histogram Visual Settings'],
+                                                    output,
+                                                    method,
+                                                    True,
+                                                    settings['General Settings']['Verbose iterations'],
+                                                    {key: value[folder, j, i] for key, value in fitted.items()})
+                if settings['Input/Output Settings']['Save outputs']:
+                    array = np.array([subplot.bin_centers, subplot.counts]).T
+                    array = [array, subfolder.pred, subfolder.residuals]
+                    hdf5.writeHDF5Data(array,
+                                       ['plot values', 'fit count', 'perr'],
+                                       ['RossiAlpha', 'fit', str(folder + 1), f"{fit['Fit minimum'][i]}-{fit['Fit maximum'][i]}", 'plot'],
+                                       settings,
+                                       'pynoise',
+                                       settingsPath)
+
+                    array2 = [subfolder.a, subfolder.perr[0], subfolder.alpha, subfolder.perr[1], subfolder.b]
+                    hdf5.writeHDF5Data(array2,
+                                       ['A', 'A uncertainty', 'alpha', 'alpha uncertainty', 'B'],
+                                       ['RossiAlpha', 'fit', str(folder + 1), f"{fit['Fit minimum'][i]}-{fit['Fit maximum'][i]}", 'function'],
+                                       settings,
+                                       'pynoise',
+                                       settingsPath)
+                plt.close()
 
 
 def setupFit(fit: dict, settings: dict):
@@ -221,6 +418,46 @@ def setupFit(fit: dict, settings: dict):
         fit['Fit minimum'].append(settings['RossiAlpha Settings']['Fit minimum'])
 
 
+def scanRange(bounds: list):
+    '''
+    Returns the fit window edges to scan from a [first, last, step] setting
+
+    Inputs:
+    - bounds: list of the first edge, the last edge, and the step between edges
+
+    Outputs:
+    - array of the edges, including the last one when the step lands on it
+    '''
+    first, last, step = bounds
+    return np.arange(first, last + step / 2, step, dtype=float)
+
+
+def fitMethod(settings: dict):
+    '''
+    Returns the fit method of the runtime settings
+
+    Inputs:
+    - settings: dictionary holding the runtime settings
+
+    Outputs:
+    - 'least squares' or 'poisson' (least squares if the setting is missing)
+    '''
+    return settings['RossiAlpha Settings'].get('Fit method', 'least squares')
+
+
+def batchFitter(settings: dict):
+    '''
+    Returns the batch fit function of the fit method in the runtime settings
+
+    Inputs:
+    - settings: dictionary holding the runtime settings
+
+    Outputs:
+    - poissonFit.fitHistograms for the poisson fit method, batchFit.fitHistograms otherwise
+    '''
+    return pf.fitHistograms if fitMethod(settings) == 'poisson' else bf.fitHistograms
+
+
 # --------- helper functions for the rossi alpha fit class -----------
 
 
@@ -263,11 +500,50 @@ def exp_decay_2_param(x, a, b):
     return a * np.exp(b * x)
 
 
+def exp_decay_3_param_jacobian(x, a, b, c):
+
+    '''
+    Description:
+        - Closed-form Jacobian of exp_decay_3_param, in the form curve_fit takes as jac
+
+    Inputs:
+        - x (time differences: x-axis)
+        - a (coefficient constant)
+        - b (alpha value)
+        - c (offset constant)
+
+    Outputs:
+        - the derivatives with respect to a, b, and c (last axis) at each x
+    '''
+
+    decay = np.exp(b * x)
+    return np.stack((decay, a * x * decay, np.ones_like(decay)), axis=-1)
+
+
+def exp_decay_2_param_jacobian(x, a, b):
+
+    '''
+    Description:
+        - Closed-form Jacobian of exp_decay_2_param, in the form curve_fit takes as jac
+
+    Inputs:
+        - x (time differences: x-axis)
+        - a (coefficient constant)
+        - b (alpha value)
+
+    Outputs:
+        - the derivatives with respect to a and b (last axis) at each x
+    '''
+
+    decay = np.exp(b * x)
+    return np.stack((decay, a * x * decay), axis=-1)
+
+
 #---------------------- class for rossi alpha fit -------------------------------    
 
 
 class RossiHistogramFit:
-    def __init__(self, counts, bin_centers,timeDifMethod = 'aa', begin = None, end = None):
+    def __init__(self, counts, bin_centers,timeDifMethod = 'aa', begin = None, end = None, fit_method = 'least squares'):
         
         '''
         Description:
@@ -278,6 +554,8 @@ class RossiHistogramFit:
             - bin_centers (adjusted bin centers for visual plotting)
             - timeDifMethod: method used to calculate time differences
             - fit_range: range of values to fit the curve to
+            - fit_method: 'least squares' (curve_fit on the counts above the offset) or
+            'poisson' (Poisson maximum likelihood of the counts, see poissonFit)
             
 
         Outputs: 
@@ -292,6 +570,7 @@ class RossiHistogramFit:
             end = max(bin_centers)
         self.fit_range = [begin, end]
         self.timeDifMethod = timeDifMethod
+        self.fit_method = fit_method
         self.save_fig = False
         self.save_dir = "./data"
         self.show_plot = True
@@ -367,7 +646,7 @@ class RossiHistogramFit:
         exp_decay_p0 = [a0, b0]
 
         # Fitting line function to truncated data
-        popt, pcov = curve_fit(exp_decay_2_param, xfit, yfit, bounds=exp_decay_fit_bounds, p0=exp_decay_p0, maxfev=1e6)
+        popt, pcov = curve_fit(exp_decay_2_param, xfit, yfit, bounds=exp_decay_fit_bounds, p0=exp_decay_p0, maxfev=1e6, jac=exp_decay_2_param_jacobian)
 
         # Deriving line x and line y
         line_x = xfit
@@ -424,7 +703,8 @@ class RossiHistogramFit:
                          outputName: str, 
                          method: str = 'aa', 
                          folder: bool = False, 
-                         verbose: bool = False):
+                         verbose: bool = False,
+                         fitted: dict = None):
 
         '''
         Description:
@@ -440,6 +720,9 @@ class RossiHistogramFit:
             - residual_opts (setting for residuals)
             - hist_visual_opts (setting for styling histogram plot)
             - folder_index: 
+            - fitted: the parameters of this histogram from a batch fit (see batchFit.fitHistograms),
+            given as the scalar 'A', 'alpha', 'B', 'A uncertainty', and 'alpha uncertainty'.
+            If given, the histogram is not fitted again.
 
         Outputs: 
             - popt (Optimal values for the parameters)
@@ -460,24 +743,33 @@ class RossiHistogramFit:
 
         xfit = self.bin_centers[self.fit_index]
 
-        # Fitting distribution
-        # Fitting the data using curve_fit
-        exp_decay_fit_bounds = ([0,-np.inf],[np.inf,0])
-        a0 = np.max(self.counts)
-        c0 = np.mean(self.counts[-int(num_bins*0.05):])
-        b0 = ((np.log(c0)-np.log(self.counts[0]))/
-            (self.bin_centers[-1]-self.bin_centers[0]))
-
-        # temp solution so it doesnt crash in cases of a c0 of 0 (leading to b0 of -inf, which breaks curve_fit)
-        if b0 == np.inf or b0== -np.inf:
-            b0 = -1
-
-        yfit = self.counts[self.fit_index] - c0
-        exp_decay_p0 = [a0, b0]
-
-        # Fitting line function to truncated data
-        popt, pcov = curve_fit(exp_decay_2_param, xfit, yfit, bounds=exp_decay_fit_bounds, p0=exp_decay_p0, maxfev=1e6)
-        self.perr = np.sqrt(np.diag(pcov))
+        # Maximize the Poisson likelihood of the counts, fitting the offset as well
+        if fitted is None and self.fit_method == 'poisson':
+            fitted = pf.fitHistograms(self.counts, self.bin_centers, self.fit_range[0], self.fit_range[1])
+        # Use the batch fit parameters if given
+        if fitted is not None:
+            popt = np.array([fitted['A'], fitted['alpha']])
+            c0 = fitted['B']
+            self.perr = np.array([fitted['A uncertainty'], fitted['alpha uncertainty']])
+        else:
+            # Fitting distribution
+            # Fitting the data using curve_fit
+            exp_decay_fit_bounds = ([0,-np.inf],[np.inf,0])
+            a0 = np.max(self.counts)
+            c0 = np.mean(self.counts[-int(num_bins*0.05):])
+            b0 = ((np.log(c0)-np.log(self.counts[0]))/
+                (self.bin_centers[-1]-self.bin_centers[0]))
+
+            # temp solution so it doesnt crash in cases of a c0 of 0 (leading to b0 of -inf, which breaks curve_fit)
+            if b0 == np.inf or b0== -np.inf:
+                b0 = -1
+
+            yfit = self.counts[self.fit_index] - c0
+            exp_decay_p0 = [a0, b0]
+
+            # Fitting line function to truncated data
+            popt, pcov = curve_fit(exp_decay_2_param, xfit, yfit, bounds=exp_decay_fit_bounds, p0=exp_decay_p0, maxfev=1e6, jac=exp_decay_2_param_jacobian)
+            self.perr = np.sqrt(np.diag(pcov))
         # Deriving line x and line y
         line_x = xfit
         self.pred = exp_decay_3_param(xfit, *popt, c0)
@@ -553,7 +845,7 @@ class RossiHistogramFit:
 #--------------------------------------------------------------------------------
 
 class Fit_With_Weighting:
-    def __init__(self,RA_hist_totals, begin, end, saveDir: str, fitting_opts: dict, residual_opts: dict):
+    def __init__(self,RA_hist_totals, begin, end, saveDir: str, fitting_opts: dict, residual_opts: dict, fit_method: str = 'least squares'):
 
         '''
         Description:
@@ -565,6 +857,8 @@ class Fit_With_Weighting:
             - general_settings (general setting)
             - fitting_opts (setting for fitting)
             - residual_opts (setting for residuals)
+            - fit_method: 'least squares' (curve_fit weighted by the uncertainties) or
+            'poisson' (Poisson maximum likelihood of the counts, see poissonFit)
 
         Outputs: 
             - Fit_with_Weighting() object
@@ -581,6 +875,7 @@ class Fit_With_Weighting:
         self.uncertainties = RA_hist_totals[2]
         self.fit_range = [begin, end]
         self.save_dir = saveDir
+        self.fit_method = fit_method
         self.a = None
         self.b = None
         self.alpha = None
@@ -608,6 +903,17 @@ class Fit_With_Weighting:
                                   (self.bin_centers <= self.fit_range[1]))
     
         xfit = self.bin_centers[self.fit_index]
+
+        # Maximize the Poisson likelihood of the counts, fitting the offset as well
+        if self.fit_method == 'poisson':
+            fitted = pf.fitHistograms(self.hist, self.bin_centers, self.fit_range[0], self.fit_range[1])
+            self.a = float(fitted['A'])
+            self.alpha = float(fitted['alpha'])
+            self.b = float(fitted['B'])
+            self.pred = exp_decay_3_param(xfit, self.a, self.alpha, self.b)
+            self.perr = np.array([fitted['A uncertainty'], fitted['alpha uncertainty']])
+            self.xfit = xfit
+            return
         
         # Fitting distribution
         # Fitting the data using curve_fit
@@ -624,7 +930,7 @@ class Fit_With_Weighting:
 
         popt, pcov = curve_fit(exp_decay_2_param, xfit, yfit, bounds=exp_decay_fit_bounds, 
                                p0=exp_decay_p0,maxfev=1e6,sigma=self.uncertainties[self.fit_index], 
-                               absolute_sigma=True)
+                               absolute_sigma=True, jac=exp_decay_2_param_jacobian)
         
         print("Optimal parameters:", popt)
         print("Covariance matrix:", pcov)
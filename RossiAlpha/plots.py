@@ -4,6 +4,7 @@ import os
 
 import tkinter as Tk
 from . import rossiAlpha as ra
+from . import engine as eng
 from tqdm import tqdm
 
 # to allow for importing global files
@@ -36,10 +37,8 @@ def createPlot(timeDifs: dict,
     # Clear out the current histogram data.
     hist['Histogram'].clear()
     # Create a RossiHistogram object for each time difference.
-    for time_dif in timeDifs['Time differences']:
-        hist['Histogram'].append(RossiHistogram(time_dif, 
-                                                settings['RossiAlpha Settings']['Bin width'], 
-                                                settings['RossiAlpha Settings']['Reset time']))
+    for i in range(len(timeDifs['Time difference method'])):
+        hist['Histogram'].append(newHistogram(timeDifs, settings, i))
     name = settings['Input/Output Settings']['Input file/folder']
     name = name[name.rfind('/')+1:]
 
@@ -69,7 +68,7 @@ def createPlot(timeDifs: dict,
     hist['Bin width'] = settings['RossiAlpha Settings']['Bin width']
 
 
-def folderHistogram(timeDifs: dict, hist: dict, numFolders: int, settings: dict, settingsPath:str, window: Tk = None):
+def folderHistogram(timeDifs: dict, hist: dict, numFolders: int, settings: dict, settingsPath:str, window: Tk = None, resample: bool = False):
     '''Create a histogram for a folder input.
 
     Inputs: 
@@ -77,6 +76,7 @@ def folderHistogram(timeDifs: dict, hist: dict, numFolders: int, settings: dict,
     - settings: the dictionary containing all the runtime settings
     - settingsPath: string path to the settings file
     - window: the gui window, if in gui mode
+    - resample: whether to keep the subfolder counts for resampling (in hist['Folder counts'])
 
     Outputs:
     - bool: true if successful, false otherwise
@@ -88,7 +88,7 @@ def folderHistogram(timeDifs: dict, hist: dict, numFolders: int, settings: dict,
     hist['Histogram'].clear()
     hist['Bin width'] = settings['RossiAlpha Settings']['Bin width']
     # compile subfolder data together, including exporting if in verbose mode
-    combined = subfolderPlots(timeDifs, hist, settings, settingsPath, numFolders)
+    combined = subfolderPlots(timeDifs, hist, settings, settingsPath, numFolders, resample)
     
     # create histogram(s) of entire folder
     print('Creating histograms of the entire folder...')
@@ -141,36 +141,62 @@ def folderHistogram(timeDifs: dict, hist: dict, numFolders: int, settings: dict,
 # --------------------------------- helper functions for creating histograms -----------------------------------------
 
 
+def newHistogram(timeDifs: dict, settings: dict, index: int, folder: int = None):
+    '''
+    Creates the RossiHistogram for one time difference method. If the time differences
+    were binned as they were calculated, the histogram is created from the counts instead.
+
+    Inputs:
+    - timeDifs: dictionary holding the time difference data or histogram counts
+    - settings: dictionary holding runtime settings
+    - index: the index of the time difference method
+    - folder: the index of the subfolder, if this is a folder analysis
+
+    Outputs:
+    - the RossiHistogram object, ready to be plotted
+    '''
+    bin_width = settings['RossiAlpha Settings']['Bin width']
+    reset_time = settings['RossiAlpha Settings']['Reset time']
+    if len(timeDifs['Histogram counts']) == 0:
+        data = timeDifs['Time differences'][index]
+        return RossiHistogram(data if folder is None else data[folder], bin_width, reset_time)
+    counts = timeDifs['Histogram counts'][index]
+    bin_edges = eng.binEdges(reset_time, bin_width)
+    histogram = RossiHistogram(bin_width=bin_width, reset_time=reset_time)
+    histogram.initFromHist(counts if folder is None else counts[folder],
+                           0.5 * (bin_edges[1:] + bin_edges[:-1]),
+                           bin_edges)
+    return histogram
+
+
 def calcUncertainty(hist: dict, total: list, numFolders: int):
     '''
-    Helper for a folder, calculates the uncertainty given the separate folder histogram data.
+    Helper for a folder, calculates the uncertainty given the accumulated subfolder histogram data.
     Also combines the data
 
     Inputs:
     - hist: dictionary holding histogram data from the class object. Will have uncertainty added to the object
-    - total: list containing the histogram data to be used for uncertainty calculations
+    - total: list containing a RossiHistogramAccumulator of the subfolder histograms for each time difference method
     - numFolders: int indicating the number of folders
 
     Outputs:
     - combinedData, the list holding the histogram data of all the subfolders combined 
     '''
-    stdDev = []
     combinedData = []
 
     hist['Uncertainty'].clear()
 
     for i in range(0, len(total)):
         # Compute the histogram standard deviation and total.
-        stdDev.append(np.std(total[i], axis=0, ddof=1))
-        combinedData.append(np.sum(total[i], axis=0))
+        combinedData.append(total[i].total())
 
         # Calculate the uncertainties and replace zeroes.
-        hist['Uncertainty'].append(stdDev[i] * numFolders)
+        hist['Uncertainty'].append(total[i].standardDeviation() * numFolders)
         hist['Uncertainty'][i] = globalAnalyze.replace_zeroes(hist['Uncertainty'][i])
     return combinedData
 
 
-def subfolderPlots(timeDifs: dict, hist: dict, settings: dict, settingsPath:str, numFolders: int):
+def subfolderPlots(timeDifs: dict, hist: dict, settings: dict, settingsPath:str, numFolders: int, resample: bool = False):
     '''
     For a folder, computes the data for a subfolder and uncertainty data.
 
@@ -180,22 +206,34 @@ def subfolderPlots(timeDifs: dict, hist: dict, settings: dict, settingsPath:str,
     - settings: dictionary holding runtime settings
     - settingsPath: string path to the settings file
     - numFolders: int indicating the number of folders
+    - resample: whether to keep the subfolder counts for resampling (in hist['Folder counts'])
     '''
     numHistograms = ra.getNumSets(settings)
-
-    totalHist = []
+    # only keep the subplots of this pass
+    hist['Subplots'].clear()
+
+    # subfolders binned while calculating were already accumulated as they were analyzed
+    binned = len(timeDifs['Histogram totals']) > 0
+    if binned:
+        totalHist = timeDifs['Histogram totals']
+    # otherwise, accumulate the subfolder histograms of each method
+    else:
+        totalHist = [RossiHistogramAccumulator() for _ in range(numHistograms)]
+    folderCounts = [[] for _ in range(numHistograms)]
 
     name = settings['Input/Output Settings']['Input file/folder']
     name = name[name[:name.rfind('/')].rfind('/')+1:].replace('/','-')
 
-    print('Compiling subfolder data...')
-    for folder in tqdm(range(numFolders)):
+    # accumulated subfolder histograms are only made again to be plotted or resampled
+    remake = not binned or settings['General Settings']['Verbose iterations'] or resample
+    subfolders = range(numFolders if remake else 0)
+    if len(subfolders) > 0:
+        print('Compiling subfolder data...')
+    for folder in tqdm(subfolders, disable=len(subfolders) == 0):
         hist['Histogram'].clear()
         for i in range(numHistograms):
             method = timeDifs['Time difference method'][i]
-            hist['Histogram'].append(RossiHistogram(timeDifs['Time differences'][i][folder],
-                                                    settings['RossiAlpha Settings']['Bin width'],
-                                                    settings['RossiAlpha Settings']['Reset time']))
+            hist['Histogram'].append(newHistogram(timeDifs, settings, i, folder))
             
             # plot with the actual settings, which can show/save the subplot
             if settings['General Settings']['Verbose iterations']:
@@ -233,12 +271,13 @@ def subfolderPlots(timeDifs: dict, hist: dict, settings: dict, settingsPath:str,
                                             False)
             plt.close()
         
-        if folder == 0:
-            for histogram in hist['Histogram']:
-                totalHist.append(histogram.counts)
-        else:
-            for j in range(len(hist['Histogram'])):
-                totalHist[j] = np.vstack((totalHist[j], hist['Histogram'][j].counts))
+        for j in range(len(hist['Histogram'])):
+            if not binned:
+                totalHist[j].add(hist['Histogram'][j].counts)
+            # only resampling needs the counts of every subfolder
+            if resample:
+                folderCounts[j].append(hist['Histogram'][j].counts)
+    hist['Folder counts'] = [np.array(counts) for counts in folderCounts] if resample else []
 
     # save subplots
     if settings['Input/Output Settings']['Save outputs'] and settings['General Settings']['Verbose iterations']:
@@ -282,6 +321,99 @@ def marbePlot(timeDifs: list,
         hist['Bin width'] = width
 
 
+# ------------------------------------ class for combining rossi alpha histograms ------------------------------------
+
+
+class RossiHistogramAccumulator:
+    def __init__(self):
+
+        '''
+        Description:
+            - Creating an empty accumulator of histograms that share the same bins (ex: one per subfolder).
+            - Only the number of histograms and the running sum and sum of squares of each bin are kept, so 
+            the memory used does not depend on the number of histograms added. 
+            - Histogram counts are integers, so the sums are kept as exact integers (the sum of squares as 
+            Python integers, which cannot overflow). Adding and merging are therefore exact, and the result 
+            does not depend on the order histograms were added in or how they were split between accumulators.
+
+        Outputs: 
+            - RossiHistogramAccumulator() object
+        '''
+        self.numHistograms = 0
+        self.sum = None
+        self.sumSquares = None
+
+    def add(self, counts):
+
+        '''
+        Description:
+            - Adding one histogram to the accumulator.
+
+        Inputs:
+            - counts: the integer counts of each bin of the histogram
+
+        Outputs:
+            - the accumulator itself
+        '''
+        counts = np.asarray(counts, dtype=np.int64)
+        if self.sum is None:
+            self.sum = np.zeros(len(counts), dtype=np.int64)
+            self.sumSquares = np.zeros(len(counts), dtype=object)
+        self.numHistograms += 1
+        self.sum += counts
+        self.sumSquares += counts.astype(object) ** 2
+        return self
+
+    def merge(self, other):
+
+        '''
+        Description:
+            - Adding all the histograms of another accumulator (ex: from another worker or run) to this one.
+
+        Inputs:
+            - other: the RossiHistogramAccumulator to merge in
+
+        Outputs:
+            - the accumulator itself
+        '''
+        if other.sum is not None:
+            if self.sum is None:
+                self.sum = other.sum.copy()
+                self.sumSquares = other.sumSquares.copy()
+            else:
+                self.sum += other.sum
+                self.sumSquares += other.sumSquares
+        self.numHistograms += other.numHistograms
+        return self
+
+    def total(self):
+
+        '''
+        Description:
+            - Combining the histograms added so far.
+
+        Outputs:
+            - the summed counts of each bin
+        '''
+        return self.sum.copy()
+
+    def standardDeviation(self):
+
+        '''
+        Description:
+            - Calculating the sample standard deviation (ddof = 1) of each bin across the histograms added so far.
+
+        Outputs:
+            - the standard deviation of each bin (nan if fewer than 2 histograms were added)
+        '''
+        n = self.numHistograms
+        if n < 2:
+            return np.full(len(self.sum), np.nan)
+        # n * sum(x^2) - sum(x)^2 is calculated exactly before the single division
+        spread = n * self.sumSquares - self.sum.astype(object) ** 2
+        return np.sqrt(spread.astype(np.float64) / (n * (n - 1)))
+
+
 # ------------------------------------------ class for rossi alpha histograms ----------------------------------------
 
 
@@ -350,11 +482,16 @@ class RossiHistogram:
         if (self.reset_time == None) :
             self.reset_time = np.max(self.time_diffs)
 
-        # Calculating the number of bins
-        num_bins = int(self.reset_time / self.bin_width)
+        # Use the counts directly if the time differences were binned as they were calculated
+        if self.time_diffs is None and self.counts is not None:
+            counts, bin_edges = self.counts, self.bin_edges
+
+        else:
+            # Calculating the number of bins
+            num_bins = int(self.reset_time / self.bin_width)
 
-        # Generating histogram
-        counts, bin_edges = np.histogram(self.time_diffs, bins=num_bins, range=[0, self.reset_time])
+            # Generating histogram
+            counts, bin_edges = np.histogram(self.time_diffs, bins=num_bins, range=[0, self.reset_time])
 
         # Adjusting the bin centers
         bin_centers = 0.5 * (bin_edges[1:] + bin_edges[:-1])
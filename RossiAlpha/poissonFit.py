@@ -0,0 +1,191 @@
+'''Poisson maximum likelihood fitting of Rossi Alpha histograms. When
+the bins hold few counts (ex: small bin widths from MARBE), least squares
+on the counts minus an offset is biased, since it gives every bin a
+Gaussian uncertainty and lets the fit go below zero counts. This fitter
+instead maximizes the Poisson likelihood of the counts for the full model
+A*exp(alpha*x) + B, fitting the offset B along with A and alpha.
+
+The fits are batched like batchFit.fitHistograms, which this mirrors, and
+use a damped Fisher scoring (Levenberg-Marquardt) iteration with the
+analytic gradient and Fisher information of the model:
+- negative log likelihood: sum(mu - y*log(mu)) over the fit window,
+- gradient: sum((1 - y/mu) * dmu), with dmu = (exp(alpha*x), A*x*exp(alpha*x), 1),
+- Fisher information: sum(dmu * dmu^T / mu), whose inverse is the covariance.
+The counts are their own variance, so the uncertainties of weighted fits
+are not used.
+
+Imported as "pf" (poisson fit)
+'''
+
+
+
+# Necessary imports.
+import numpy as np
+from . import batchFit as bf
+
+
+
+# The maximum number of Levenberg-Marquardt iterations.
+MAX_ITERATIONS = 200
+# The relative change of the parameters and of the likelihood at which a fit has converged.
+TOLERANCE = 1e-10
+
+
+def startingPoint(x: np.ndarray, y: np.ndarray, weights: np.ndarray):
+
+    '''Finds the starting A, alpha, and B of each fit: the offset of the
+    fit classes and the log-linear guess of batchFit above it. B starts
+    just above zero if the histogram tail is empty, so that every bin can
+    hold counts.
+
+    Inputs:
+    - x: the bin centers.
+    - y: the counts, one fit per row.
+    - weights: one inside the fit window, zero outside of it.
+
+    Outputs:
+    - the starting parameters of each fit, one row of (A, alpha, B) per fit.'''
+
+
+    b = np.maximum(bf.offsets(y), 1e-6 * np.maximum(np.max(y, axis=-1), 1.0))
+    a, alpha = bf.initialGuess(x, y - b[:, np.newaxis], weights)
+    return np.stack((a, alpha, b), axis=-1)
+
+
+
+def likelihoodEquations(x: np.ndarray, y: np.ndarray, weights: np.ndarray, params: np.ndarray):
+
+    '''Computes the negative log likelihood, its gradient, and the Fisher
+    information of every fit.
+
+    Inputs:
+    - x: the bin centers.
+    - y: the counts, one fit per row.
+    - weights: one inside the fit window, zero outside of it.
+    - params: one row of (A, alpha, B) per fit.
+
+    Outputs:
+    - the negative log likelihood of each fit (infinite if a bin with counts is expected to have none).
+    - the gradient of each fit, one row per fit.
+    - the Fisher information matrix of each fit.'''
+
+
+    exponential = np.exp(params[:, 1, np.newaxis] * x)
+    mu = params[:, 0, np.newaxis] * exponential + params[:, 2, np.newaxis]
+    impossible = np.any((weights > 0) & (y > 0) & (mu <= 0), axis=-1)
+    safe = np.where(mu > 0, mu, 1.0)
+    nll = np.sum(weights * (mu - np.where(y > 0, y * np.log(safe), 0.0)), axis=-1)
+    nll = np.where(impossible, np.inf, nll)
+    # the derivatives of mu with respect to A, alpha, and B
+    derivatives = np.stack((exponential, params[:, 0, np.newaxis] * x * exponential, np.ones_like(mu)), axis=1)
+    gradient = np.einsum('ij,ikj->ik', weights * (1 - y / safe), derivatives)
+    fisher = np.einsum('ij,ikj,ilj->ikl', weights / safe, derivatives, derivatives)
+    return nll, gradient, fisher
+
+
+
+def levenbergMarquardt(x: np.ndarray, y: np.ndarray, weights: np.ndarray, params: np.ndarray):
+
+    '''Maximizes the Poisson likelihood of every row of y at once with
+    damped Fisher scoring, keeping A >= 0, alpha <= 0, and B >= 0. Every
+    fit has its own damping and stops on its own once its parameters or
+    likelihood stop changing; only the fits that are still running are
+    computed at each iteration.
+
+    Inputs:
+    - x: the bin centers.
+    - y: the counts, one fit per row.
+    - weights: one inside the fit window, zero outside of it.
+    - params: the starting (A, alpha, B) of each fit.
+
+    Outputs:
+    - the fitted parameters and the Fisher information of each fit.'''
+
+
+    params = params.copy()
+    damping = np.full(len(params), 1e-3)
+    nll, gradient, fisher = likelihoodEquations(x, y, weights, params)
+    active = np.arange(len(params))
+    lower = np.array([0.0, -np.inf, 0.0])
+    upper = np.array([np.inf, 0.0, np.inf])
+    for _ in range(MAX_ITERATIONS):
+        if not len(active):
+            break
+        # Damp each diagonal element in proportion to itself, with a floor so fits with A = 0 stay solvable.
+        diagonal = np.diagonal(fisher[active], axis1=-2, axis2=-1)
+        diagonal = np.maximum(diagonal, 1e-12 * np.max(diagonal, axis=-1, keepdims=True) + 1e-300)
+        matrix = fisher[active] + (damping[active, np.newaxis] * diagonal)[..., np.newaxis] * np.eye(3)
+        step = np.linalg.solve(matrix, -gradient[active][..., np.newaxis])[..., 0]
+        trial = np.clip(params[active] + step, lower, upper)
+        trialNll, trialGradient, trialFisher = likelihoodEquations(x, y[active], weights[active], trial)
+        better = np.isfinite(trialNll) & (trialNll <= nll[active])
+        # Converged once the accepted step or likelihood change is negligible.
+        small = np.all(np.abs(trial - params[active]) <= TOLERANCE * (np.abs(params[active]) + TOLERANCE), axis=-1)
+        flat = nll[active] - trialNll <= TOLERANCE * np.abs(nll[active])
+        accepted = active[better]
+        params[accepted] = trial[better]
+        nll[accepted] = trialNll[better]
+        gradient[accepted] = trialGradient[better]
+        fisher[accepted] = trialFisher[better]
+        damping[active] = np.where(better, damping[active] / 10, damping[active] * 10)
+        active = active[~(better & (small | flat)) & (damping[active] < 1e16)]
+    return params, fisher
+
+
+
+def fitHistograms(counts: np.ndarray,
+                  bin_centers: np.ndarray,
+                  fit_min = None,
+                  fit_max = None,
+                  uncertainties: np.ndarray = None,
+                  guess: tuple = None):
+
+    '''Fits many Rossi Alpha histograms that share the same bins at once by
+    Poisson maximum likelihood. Takes the same inputs as batchFit.fitHistograms.
+
+    Inputs:
+    - counts: the histogram counts, with the bins along the last axis. Any
+    leading axes (ex: subfolders, methods) are kept in the outputs.
+    - bin_centers: the bin centers shared by every histogram.
+    - fit_min, fit_max: the fit window, as numbers or arrays that broadcast
+    against the leading axes of counts. Default to the first and last bin centers.
+    - uncertainties: only broadcast against, the Poisson fit does not weight the counts.
+    - guess: the starting (A, alpha) of each fit, as in batchFit.fitHistograms.
+
+    Outputs:
+    - a dictionary holding arrays of 'A', 'alpha', 'B', 'A uncertainty',
+    'alpha uncertainty', and 'B uncertainty', with the shape of the broadcast
+    leading axes.'''
+
+
+    x = np.asarray(bin_centers, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    fit_min = np.min(x) if fit_min is None else np.asarray(fit_min, dtype=np.float64)
+    fit_max = np.max(x) if fit_max is None else np.asarray(fit_max, dtype=np.float64)
+    shape = np.broadcast_shapes(counts.shape[:-1], np.shape(fit_min), np.shape(fit_max),
+                                () if uncertainties is None else np.shape(uncertainties)[:-1])
+    counts = np.broadcast_to(counts, shape + (len(x),))
+    inWindow = ((x >= np.asarray(fit_min)[..., np.newaxis]) &
+                (x <= np.asarray(fit_max)[..., np.newaxis]))
+    weights = np.broadcast_to(inWindow, shape + (len(x),)).astype(np.float64).reshape(-1, len(x))
+    # Fit every histogram and window as one row.
+    y = counts.reshape(-1, len(x))
+    params = startingPoint(x, y, weights)
+    if guess is not None:
+        guessA = np.broadcast_to(np.asarray(guess[0], dtype=np.float64), shape).reshape(-1)
+        guessAlpha = np.broadcast_to(np.asarray(guess[1], dtype=np.float64), shape).reshape(-1)
+        usable = np.isfinite(guessA) & np.isfinite(guessAlpha) & (guessA > 0)
+        params[usable, 0] = guessA[usable]
+        params[usable, 1] = np.minimum(guessAlpha[usable], 0.0)
+    params, fisher = levenbergMarquardt(x, y, weights, params)
+    # The covariance is the inverse of the Fisher information.
+    invertible = np.linalg.det(fisher) > 0
+    covariance = np.full(fisher.shape, np.nan)
+    covariance[invertible] = np.linalg.inv(fisher[invertible])
+    errors = np.sqrt(np.diagonal(covariance, axis1=-2, axis2=-1))
+    return {'A': params[:, 0].reshape(shape),
+            'alpha': params[:, 1].reshape(shape),
+            'B': params[:, 2].reshape(shape),
+            'A uncertainty': errors[:, 0].reshape(shape),
+            'alpha uncertainty': errors[:, 1].reshape(shape),
+            'B uncertainty': errors[:, 2].reshape(shape)}
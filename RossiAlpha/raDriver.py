@@ -39,6 +39,8 @@ def main(editor: edit.Editor, queue: list[str] = []):
         editor.print('t - calculate time differences')
         editor.print('p - create plots of the time difference data')
         editor.print('f - fit the data to an exponential curve')
+        editor.print('w - scan the fit window to map alpha over fit minimums and maximums')
+        editor.print('u - estimate the alpha uncertainty by resampling the subfolders')
         editor.print('s - view or edit the program settings')
         editor.print('Leave the command blank or enter x to return to the main menu.')
         # If there's currently something in the command queue, 
@@ -54,7 +56,7 @@ def main(editor: edit.Editor, queue: list[str] = []):
         # Otherwise, prompt the user.
         else:
             selection = input('Enter a command: ')
-        if selection == 'm' or selection == 't' or selection == 'p' or selection == 'f':
+        if selection == 'm' or selection == 't' or selection == 'p' or selection == 'f' or selection == 'w' or selection == 'u':
             # Get the file name for later use.
             name = editor.parameters.settings['Input/Output Settings']['Input file/folder']
             name = name[name.rfind('/')+1:]
@@ -119,6 +121,20 @@ def main(editor: edit.Editor, queue: list[str] = []):
                 if successful: 
                     editor.log('New histogram created.\n')
 
+            # Fit the histogram over a grid of fit windows:
+            elif selection == 'w':
+                editor.print('Scanning the fit window...')
+                successful = ra.driveFitScan(editor.parameters.settings, editor.parameters.origin, (name.count('.') == 0))
+                if successful:
+                    editor.log('New fit window scan created.\n')
+
+            # Resample the subfolders for the alpha uncertainty:
+            elif selection == 'u':
+                editor.print('Resampling the subfolders...')
+                successful = ra.driveResampling(editor.parameters.settings, editor.parameters.origin)
+                if successful:
+                    editor.log('New alpha resampling created.\n')
+
             # Create a line of best fit for the histogram:
             else:
                 # Error check: if input is a file and the bin width is not specified
@@ -178,11 +194,19 @@ def errorCheck(settings: dict, name: str, selection: str):
         return False
     # If input is a file and the bin width is not specified for anything other than computing time differences
     if (name.count('.') > 0 and settings['RossiAlpha Settings']['Bin width'] == None
-        and (selection == 'm' or selection == 'f' or selection == 'p')):
+        and (selection == 'm' or selection == 'f' or selection == 'p' or selection == 'w' or selection == 'u')):
         print('ERROR: Using RossiAlpha on a file to generate plots of the time difference data and/or'
             + ' fit the data to an exponetial curve requires the bin width to be specified.\n')
         return False
-    if selection == 'f' or selection == 'm':
+    if selection == 'u':
+        if name.count('.') > 0:
+            print('ERROR: Resampling the alpha uncertainty requires a folder of subfolders.\n')
+            return False
+        replicates = settings['RossiAlpha Settings'].get('Bootstrap replicates')
+        if not isinstance(replicates, int) or replicates < 2:
+            print('ERROR: Bootstrap replicates must be a whole number of at least 2.\n')
+            return False
+    if selection == 'f' or selection == 'm' or selection == 'u':
         if isinstance(settings['RossiAlpha Settings']['Fit minimum'], list):
             if isinstance(settings['RossiAlpha Settings']['Fit maximum'], list):
                 if (len(settings['RossiAlpha Settings']['Fit minimum']) != len(settings['RossiAlpha Settings']['Fit maximum'])):
@@ -191,4 +215,14 @@ def errorCheck(settings: dict, name: str, selection: str):
             else:
                 print('ERROR: the length of fit minimum and fit maximum must match\n')
                 return False
+    if ((selection == 'f' or selection == 'm' or selection == 'w' or selection == 'u')
+        and settings['RossiAlpha Settings'].get('Fit method', 'least squares') not in ['least squares', 'poisson']):
+        print('ERROR: the fit method must be "least squares" or "poisson".\n')
+        return False
+    if selection == 'w':
+        for key in ['Scan fit minimum', 'Scan fit maximum']:
+            bounds = settings['RossiAlpha Settings'].get(key)
+            if not isinstance(bounds, list) or len(bounds) != 3 or None in bounds or bounds[2] <= 0:
+                print('ERROR: ' + key + ' must be a list of the first value, the last value, and a positive step\n')
+                return False
     return True
\ No newline at end of file
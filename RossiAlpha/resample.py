@@ -0,0 +1,188 @@
+'''Resampling uncertainties of the fitted Rossi Alpha over subfolders.
+Estimates the spread of alpha with the bootstrap (drawing the subfolders
+with replacement) and the delete-one jackknife (leaving out one subfolder
+at a time), using only the histogram counts of each subfolder.
+
+Every replicate is a weighted sum of the subfolder histograms: a row of a
+weight matrix holding how many times each subfolder is drawn. The
+histograms and uncertainties of all replicates are computed with one
+matrix product each, and all replicates are fitted in one batch (see
+batchFit) with the weighting of Fit_With_Weighting.
+
+Imported as "rs" (resample)
+'''
+
+
+
+# Necessary imports.
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from . import batchFit as bf
+
+
+
+def bootstrapWeights(numFolders: int, replicates: int, seed: int = None):
+
+    '''Draws the bootstrap replicates: each one picks numFolders subfolders
+    with replacement.
+
+    Inputs:
+    - numFolders: the number of subfolders.
+    - replicates: the number of bootstrap replicates.
+    - seed: the seed of the random number generator. If not given, every
+    call draws different replicates.
+
+    Outputs:
+    - the number of times each subfolder (column) is drawn in each replicate (row).'''
+
+
+    rng = np.random.default_rng(seed)
+    return rng.multinomial(numFolders, np.full(numFolders, 1 / numFolders), size=replicates)
+
+
+
+def jackknifeWeights(numFolders: int):
+
+    '''Builds the delete-one jackknife replicates: replicate i holds every
+    subfolder except subfolder i.
+
+    Inputs:
+    - numFolders: the number of subfolders.
+
+    Outputs:
+    - the number of times each subfolder (column) is used in each replicate (row).'''
+
+
+    return np.ones((numFolders, numFolders), dtype=np.int64) - np.eye(numFolders, dtype=np.int64)
+
+
+
+def replicateHistograms(weights: np.ndarray, counts: np.ndarray):
+
+    '''Combines the subfolder histograms of every replicate, with the
+    uncertainty of plots.calcUncertainty: the standard deviation of the
+    drawn subfolder histograms times the number drawn, with zeros replaced
+    by the average of the nonzero uncertainties.
+
+    Inputs:
+    - weights: the number of times each subfolder (column) is drawn in each replicate (row).
+    - counts: the histogram counts of each subfolder (row).
+
+    Outputs:
+    - the combined counts and their uncertainties, one replicate per row.'''
+
+
+    weights = np.asarray(weights, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    drawn = np.sum(weights, axis=-1, keepdims=True)
+    totals = weights @ counts
+    squares = weights @ (counts * counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (squares - totals * totals / drawn) / (drawn - 1)
+    uncertainties = np.sqrt(np.maximum(variance, 0.0)) * drawn
+    # replace zero uncertainties with the average of the nonzero ones (see analyze.replace_zeroes)
+    nonzero = uncertainties != 0
+    numNonzero = np.sum(nonzero, axis=-1, keepdims=True)
+    average = np.sum(uncertainties, axis=-1, keepdims=True) / np.maximum(numNonzero, 1)
+    uncertainties = np.where(nonzero | (numNonzero == 0), uncertainties, average)
+    return totals, uncertainties
+
+
+
+def fitReplicates(weights: np.ndarray, counts: np.ndarray, bin_centers: np.ndarray, fit_min, fit_max, fitter = None):
+
+    '''Fits the combined histogram of every replicate over every fit window.
+
+    Inputs:
+    - weights: the number of times each subfolder (column) is drawn in each replicate (row).
+    - counts: the histogram counts of each subfolder (row).
+    - bin_centers: the bin centers shared by the histograms.
+    - fit_min, fit_max: arrays of the fit windows.
+    - fitter: the batch fit function, batchFit.fitHistograms (least squares) if
+    not given or poissonFit.fitHistograms (Poisson likelihood).
+
+    Outputs:
+    - the fitted alpha of each replicate (row) and fit window (column). With least
+    squares, replicates whose histogram has no usable uncertainties (ex: one
+    subfolder drawn every time) are NaN.'''
+
+
+    fitter = bf.fitHistograms if fitter is None else fitter
+    totals, uncertainties = replicateHistograms(weights, counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fitted = fitter(totals[:, np.newaxis, :],
+                        bin_centers,
+                        fit_min,
+                        fit_max,
+                        uncertainties[:, np.newaxis, :])
+    if fitter is not bf.fitHistograms:
+        return fitted['alpha']
+    usable = np.all(uncertainties > 0, axis=-1)
+    return np.where(usable[:, np.newaxis], fitted['alpha'], np.nan)
+
+
+
+def resampleAlpha(counts: np.ndarray,
+                  bin_centers: np.ndarray,
+                  fit_min,
+                  fit_max,
+                  replicates: int = 1000,
+                  seed: int = None,
+                  workers: int = 1,
+                  fitter = None):
+
+    '''Computes the bootstrap and delete-one jackknife distributions of the
+    fitted alpha from the subfolder histograms. The replicates are split into
+    blocks, one block per worker process, and each block is fitted in one batch.
+
+    Inputs:
+    - counts: the histogram counts of each subfolder (row).
+    - bin_centers: the bin centers shared by the histograms.
+    - fit_min, fit_max: the fit window(s), as numbers or lists of the same length.
+    - replicates: the number of bootstrap replicates.
+    - seed: the seed of the bootstrap draws, if any.
+    - workers: the number of worker processes.
+    - fitter: the batch fit function, batchFit.fitHistograms (least squares) if not given.
+
+    Outputs:
+    - a dictionary holding, with one column per fit window:
+        - 'alpha': the fit of all the subfolders.
+        - 'bootstrap alpha', 'jackknife alpha': the fit of each replicate (row).
+        - 'bootstrap uncertainty': the standard deviation of the bootstrap fits.
+        - 'bootstrap interval': the 16th and 84th percentiles of the bootstrap fits (rows).
+        - 'jackknife uncertainty', 'jackknife bias': the jackknife estimates.'''
+
+
+    counts = np.asarray(counts, dtype=np.float64)
+    numFolders = counts.shape[0]
+    fit_min = np.atleast_1d(np.asarray(fit_min, dtype=np.float64))
+    fit_max = np.atleast_1d(np.asarray(fit_max, dtype=np.float64))
+    # the full sample and jackknife replicates come first, then the bootstrap draws
+    weights = np.concatenate((np.ones((1, numFolders), dtype=np.int64),
+                              jackknifeWeights(numFolders),
+                              bootstrapWeights(numFolders, replicates, seed)))
+    blocks = np.array_split(weights, max(min(workers, len(weights)), 1))
+    if len(blocks) <= 1:
+        alpha = fitReplicates(weights, counts, bin_centers, fit_min, fit_max, fitter)
+    else:
+        # the blocks come back in order, whichever worker finishes first
+        with ProcessPoolExecutor(max_workers=len(blocks)) as pool:
+            alpha = np.concatenate(list(pool.map(fitReplicates,
+                                                 blocks,
+                                                 [counts] * len(blocks),
+                                                 [bin_centers] * len(blocks),
+                                                 [fit_min] * len(blocks),
+                                                 [fit_max] * len(blocks),
+                                                 [fitter] * len(blocks))))
+    full = alpha[0]
+    jackknife = alpha[1:numFolders + 1]
+    bootstrap = alpha[numFolders + 1:]
+    jackknifeMean = np.nanmean(jackknife, axis=0)
+    with np.errstate(invalid='ignore'):
+        return {'alpha': full,
+                'bootstrap alpha': bootstrap,
+                'jackknife alpha': jackknife,
+                'bootstrap uncertainty': np.nanstd(bootstrap, axis=0, ddof=1),
+                'bootstrap interval': np.nanpercentile(bootstrap, [16, 84], axis=0),
+                'jackknife uncertainty': np.sqrt((numFolders - 1) / numFolders * np.nansum((jackknife - jackknifeMean) ** 2, axis=0)),
+                'jackknife bias': (numFolders - 1) * (jackknifeMean - full)}
@@ -35,14 +35,19 @@ class RossiAlpha:
         The class holds the dictionaries of computed rossi-alpha data
         '''
         self.timeDifs = {'Time differences': [],
-                        'Time difference method': []}
+                        'Time difference method': [],
+                        'Histogram counts': [], # only filled when binning while calculating
+                        'Histogram totals': []} # the combined subfolder histograms of each method when binning folders
         self.hist = {'Histogram': [],
                      'Uncertainty': [],
                      'Bin width': None,
-                     'Subplots': []} # holds subfolder histograms, only saved if verbose iterations is on
+                     'Subplots': [], # holds subfolder histograms, only saved if verbose iterations is on
+                     'Folder counts': []} # holds the subfolder histogram counts of each method, one row per subfolder, only filled for resampling
         self.fit = {'Best fit': [],
                     'Fit minimum': [],
-                    'Fit maximum': []}
+                    'Fit maximum': [],
+                    'Window scan': [], # one alpha map over the fit windows per histogram
+                    'Resampling': []} # bootstrap and jackknife alpha distributions per histogram
 
     def driveTimeDifs(self, settings: dict, settingsPath: str, isFolder: bool = False):
         
@@ -72,31 +77,19 @@ class RossiAlpha:
         return success
 
 
-    def drivePlots(self, settings: dict, settingsPath: str, isFolder: bool = False):
+    def drivePlots(self, settings: dict, settingsPath: str, isFolder: bool = False, resample: bool = False):
 
         '''Determine the function combinations needed to compute Rossi Alpha histograms
         for the specific current settings and situation
         
         Inputs:
         - settings: dictionary containing the current runtime settings.
-        - isFolder: bool indicating whether this is a folder or a file'''
+        - isFolder: bool indicating whether this is a folder or a file
+        - resample: whether the subfolder histograms will be resampled, so they must be kept'''
         
-        # execute for "Combine Calc and Binning". NOTE that these functions are not currently maintained
-        if (settings['RossiAlpha Settings']['Combine Calc and Binning']):
-            if numFolders == 0:
-                self.calculateTimeDifsAndPlot(settings['Input/Output Settings'],
-                                                settings['General Settings'],
-                                                settings['RossiAlpha Settings'],
-                                                settings['Histogram Visual Settings'],
-                                                0)
-            else:
-                for folder in range(1, numFolders + 1):
-                    self.calculateTimeDifsAndPlot(settings['Input/Output Settings'],
-                                                    settings['General Settings'],
-                                                    settings['RossiAlpha Settings'],
-                                                    settings['Histogram Visual Settings'],
-                                                    folder)
-                
+        # bin the time differences as they are calculated if requested and a bin width is given
+        binned = settings['RossiAlpha Settings']['Combine Calc and Binning'] and settings['RossiAlpha Settings']['Bin width'] is not None
+
         if isFolder:
             numFolders = settings['General Settings']['Number of folders']
             # calculate number of folders if was not specified
@@ -107,12 +100,13 @@ class RossiAlpha:
                 successful = td.prepMARBE(self.timeDifs, self.hist, settings, settingsPath, numFolders)
                 if not successful: return False
             else:
-                successful = td.folderAnalyzer(self.timeDifs, settings, settingsPath, numFolders)
+                # parallel folder analysis returns histograms, so it always bins while calculating
+                successful = td.folderAnalyzer(self.timeDifs, settings, settingsPath, numFolders, binned or td.folderWorkers(settings) > 1, resample)
                 if not successful: return False
-            plt.folderHistogram(self.timeDifs, self.hist, numFolders, settings, settingsPath)
+            plt.folderHistogram(self.timeDifs, self.hist, numFolders, settings, settingsPath, resample=resample)
         
         else:
-            td.createTimeDifs(self.timeDifs, settings, settingsPath)
+            td.createTimeDifs(self.timeDifs, settings, settingsPath, binned=binned)
             plt.createPlot(self.timeDifs, self.hist, settings, settingsPath)
         
         
@@ -126,6 +120,9 @@ class RossiAlpha:
         - isFolder: bool indicating whether this is a folder or a file
         '''
 
+        # bin the time differences as they are calculated if requested and a bin width is given
+        binned = settings['RossiAlpha Settings']['Combine Calc and Binning'] and settings['RossiAlpha Settings']['Bin width'] is not None
+
         if isFolder:
             numFolders = settings['General Settings']['Number of folders']
             # calculate number of folders if was not specified
@@ -136,16 +133,58 @@ class RossiAlpha:
                 successful = td.prepMARBE(self.timeDifs, self.hist, settings, settingsPath, numFolders)
                 if not successful: return False
             else:
-                successful = td.folderAnalyzer(self.timeDifs, settings, settingsPath, numFolders)
+                # parallel folder analysis returns histograms, so it always bins while calculating
+                successful = td.folderAnalyzer(self.timeDifs, settings, settingsPath, numFolders, binned or td.folderWorkers(settings) > 1)
                 if not successful: return False
             plt.folderHistogram(self.timeDifs, self.hist, numFolders, settings, settingsPath)
             fit.folderFit(self.fit, self.hist, settings, settingsPath, numFolders)
         else:
-            td.createTimeDifs(self.timeDifs, settings, settingsPath)
+            td.createTimeDifs(self.timeDifs, settings, settingsPath, binned=binned)
             plt.createPlot(self.timeDifs, self.hist, settings, settingsPath)
             fit.createBestFit(self.fit, self.hist, settings, settingsPath)
         pass
 
+
+    def driveFitScan(self, settings: dict, settingsPath: str, isFolder: bool = False):
+        '''
+        Determine the function combinations needed to map the Rossi Alpha fit
+        over a grid of fit windows for the specific current settings and situation
+
+        Inputs:
+        - settings: dictionary containing the current runtime settings.
+        - settingsPath: path to the settings file
+        - isFolder: bool indicating whether this is a folder or a file
+
+        Outputs:
+        - a bool indicating whether the computation was successful
+        '''
+
+        # the histograms are only made once, every fit window is fitted to them
+        if self.drivePlots(settings, settingsPath, isFolder) is False:
+            return False
+        fit.scanFitWindows(self.fit, self.hist, settings, settingsPath, isFolder, td.folderWorkers(settings))
+        return True
+
+
+    def driveResampling(self, settings: dict, settingsPath: str):
+        '''
+        Determine the function combinations needed to estimate the folder analysis
+        alpha uncertainty by bootstrap and jackknife resampling of the subfolders
+
+        Inputs:
+        - settings: dictionary containing the current runtime settings.
+        - settingsPath: path to the settings file
+
+        Outputs:
+        - a bool indicating whether the computation was successful
+        '''
+
+        # the subfolder histograms are only made once, every replicate is combined from them
+        if self.drivePlots(settings, settingsPath, True, True) is False:
+            return False
+        fit.resampleFit(self.fit, self.hist, settings, settingsPath, td.folderWorkers(settings))
+        return True
+
 # --------------------------- helper functions for the class -------------------------------
 
     # TODO: make work
@@ -189,75 +228,6 @@ class RossiAlpha:
 
 
     
-    # NOTE: this function is not currently maintained
-    def calculateTimeDifsAndPlot(self,
-                                 io:dict,
-                                 gen:dict,
-                                 ra:dict,
-                                 hist:dict,
-                                 folder:int = 0):
-
-        '''Simultaneously calculate the time 
-        differences and construct a Rossi Histogram.
-
-        
-        Inputs:
-        - io: the Input/Output Settings dictionary.
-        - gen: the General Settings dictionary.
-        - ra: the RossiAlpha Settings dictionary.
-        - hist: the Histogram Visual Settings dictionary.
-        - folder: whether or not this is for folder analysis (0 means no folder).'''
-
-
-        # Clear out all of the current data.
-        self.timeDifs['Time differences'].clear()
-        self.timeDifs['Time difference method'].clear()
-        self.hist['Histogram'].clear()
-        timeDifCalcs = []
-        # If methods is a list, create a time difference for each instance.
-        if isinstance(ra['Time difference method'], list):
-            for type in ra['Time difference method']:
-                self.timeDifs['Time differences'].append(td.timeDifCalcs(
-                    io=io,
-                    reset_time=ra['Reset time'], 
-                    method=type, 
-                    digital_delay=ra['Digital delay'],
-                    folderNum=folder,
-                    sort_data=gen['Sort data']))
-                self.timeDifs['Time difference method'].append(type)
-        # Otherwise, just create one with the given method.
-        else:
-            self.timeDifs['Time differences'].append(td.timeDifCalcs(
-                io=io,
-                reset_time=ra['Reset time'], 
-                method=type, 
-                digital_delay=ra['Digital delay'],
-                folderNum=folder,
-                sort_data=gen['Sort data']))
-            self.timeDifs['Time difference method'].append(ra['Time difference method'])
-        # Simulatenously calculate the time differences and bin them.
-        for i in range (0, len(timeDifCalcs)):
-            input = io['Input file/folder']
-            if folder != 0:
-                input = input[input[:input.rfind('/')].rfind('/')+1:].replace('/','-')
-            else:
-                input = input[input.rfind('/')+1:]
-            currentHist, counts, bin_centers, bin_edges = timeDifCalcs[i].calculateTimeDifsAndBin(input,
-                                                                                                  ra['Bin width'],
-                                                                                                  io['Save figures'],
-                                                                                                  gen['Show plots'],
-                                                                                                  io['Save directory'],
-                                                                                                  hist,
-                                                                                                  folder!=0,
-                                                                                                  gen['Verbose iterations'])
-            self.hist['Histogram'].append(currentHist)
-        # Save the current settings.
-        self.timeDifs['Input file/folder'] = io['Input file/folder']
-        self.timeDifs['Sort data'] = gen['Sort data']
-        self.timeDifs['Number of folders'] = folder
-        self.timeDifs['Digital delay'] = ra['Digital delay']
-        self.timeDifs['Reset time'] = ra['Reset time']
-        self.hist['Bin width'] = ra['Bin width']
 
 
 # ------------- helper functions used across analyze, plots, and fitting
@@ -4,10 +4,15 @@
 
 # Necessary imports.
 import os
+import numpy as np
 import Event as evt
+import loader as ld
+import lmxReader as lmx
 from FeynmanY import feynman as fey
+from lmx import kernels
 from tkinter import *
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
 
 
 def export(data: dict[str:tuple], 
@@ -151,7 +156,9 @@ class Analyzer:
                     hvs: dict = {}, 
                     lfs: dict = {},
                     sps: dict = {}, 
-                    window: Tk = None):
+                    window: Tk = None,
+                    backend: str = 'auto',
+                    workers: int = 1):
         
         '''Run FeynmanY analysis for varying tau values.
         Plots each tau value and estimates alpha.
@@ -167,43 +174,75 @@ class Analyzer:
         - hvs: the Histogram Visual Settings.
         - lfs: the Line Fitting Settings.
         - sps: the Scatter Plot Settings.
-        - window: the window object, if being run in GUI mode.'''
+        - window: the window object, if being run in GUI mode.
+        - backend: the kernel backend ('auto', 'numba', or 'numpy').
+        - workers: the number of threads that count the gates of 
+        the tau values. If null, uses the number of CPUs.'''
         
 
+        # Select the compiled or numpy kernels.
+        kernels.setBackend(backend)
         # Initialize variables.
-        yValues = []
-        y2Values = []
         tValues = []
         # Fill the tau list with the desired tau values.
         tValues.extend(range(fy['Tau range'][0], fy['Tau range'][1]+1, fy['Increment amount']))
         # Create a FeynmanY object.
         FeynmanYObject = fey.FeynmanY(fy['Tau range'], fy['Increment amount'], fy['Plot scale'])
-        # Load in the data and sort it.
-        data = evt.createEventsListFromTxtFile(io['Input file/folder'],
-                                               io['Time column'],
-                                               io['Channels column'],
-                                               True,
-                                               quiet,
-                                               False)
-        data.sort(key=lambda Event: Event.time)
-        # Initialize variables for counting
-        # the total real measurement time.
-        meas_time = 0
-        begin = data[0].time
-        end = data[0].time
-        # Iterate through the data.
-        for entry in data:
-            # If we have reached a jump:
-            if entry.time - end > 1e13:
-                # Add the previous measurement 
-                # time range to the total.
-                meas_time += end - begin
-                # Reset the beginning time
-                begin = entry.time
-            # Move the ending time up.
-            end = entry.time
-        # Add the remaining time range.
-        meas_time += end - begin
+        # Whether to count overlapping moving gates instead of back to back gates.
+        moving = fy.get('Gate mode', 'sequential') == 'moving'
+        if workers is None or workers < 1:
+            workers = os.cpu_count() or 1
+        path = io['Input file/folder']
+        # Jumps between measurements longer than this are dead time.
+        threshold = fy.get('Gap threshold', fey.GAP_THRESHOLD)
+        # Time ordered data is streamed in blocks instead of loaded: LMX files always, and
+        # text files if asked. Moving gates overlap the blocks, so they need all the times.
+        if (path.endswith('.lmx') or fy.get('Stream data', False)) and not moving:
+            if path.endswith('.lmx'):
+                blocks = (block.times for block in lmx.iterLMXArrays(path))
+            else:
+                blocks = (times for times, _ in ld.iterChunks(path, io['Time column'], workers=workers))
+            if not quiet:
+                print('Streaming the data through every tau value...')
+            # Count the gates of every tau value in one pass, along with the live
+            # intervals of the measurement, leaving out any gaps between them.
+            counter = fey.GateCounter(tValues, threshold)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for times in tqdm(blocks, disable=quiet, unit=' blocks'):
+                    if len(times) == 0:
+                        continue
+                    if np.any(np.diff(times, prepend=counter.last if counter.ends else times[0]) < 0):
+                        raise ValueError('The data in ' + path + ' is not sorted by time, so it cannot be streamed.')
+                    counter.update(times, pool)
+            if not counter.ends:
+                raise ValueError('The data in ' + path + ' has no events.')
+            allCounts = counter.probabilities(live=True)
+        else:
+            if path.endswith('.lmx'):
+                blocks = [block for block in lmx.iterLMXArrays(path) if len(block.times) > 0]
+                if len(blocks) == 0:
+                    raise ValueError('The data in ' + path + ' has no events.')
+                data = evt.EventArray(np.concatenate([block.times for block in blocks]),
+                                      np.concatenate([block.channels for block in blocks]))
+            else:
+                # Load in the data and sort it.
+                data = evt.createEventArrayFromTxtFile(path,
+                                                       io['Time column'],
+                                                       io['Channels column'],
+                                                       True,
+                                                       quiet,
+                                                       False,
+                                                       *ld.cacheSettings(io)).sort()
+                if len(data.times) == 0:
+                    raise ValueError('The data in ' + path + ' has no events.')
+            # Find the live intervals of the measurement, leaving out any gaps 
+            # between measurement ranges. Without gaps, every gate of the
+            # measured time (from the first to the last event) is counted.
+            intervals = fey.liveIntervals(data.times, threshold)
+            if not quiet:
+                print('Running each tau value...')
+            # Count the gates of every tau value from the loaded data at once.
+            allCounts = FeynmanYObject.randomCountsAll(data, tValues, -1, workers, quiet, moving, intervals)
         # For GUI mode.
         if window is not None:
             # Increment the progress bar.
@@ -213,19 +252,12 @@ class Analyzer:
             window.after(1, wait.set, True)
             # Wait for the dummy variable to be set, then continue.
             window.wait_variable(wait)
-        # If not in quiet mode, display progress.
-        if not quiet:
-            print('Running each tau value...')
+        # Compute the variance to mean and Y2 of every tau value at once.
+        yValues, y2Values = FeynmanYObject.computeAllMoments(allCounts, tValues)
         # For each tau value:
-        for tau in tqdm(tValues):
-            # Convert the data into bin frequency counts.
-            counts = FeynmanYObject.randomCounts(data, tau, meas_time)
-            # Compute the variance to mean for this 
-            # tau value and add it to the list.
-            FeynmanYObject.computeMoments(counts, tau)
-            y, y2 = FeynmanYObject.computeYY2(tau)
-            yValues.append(y)
-            y2Values.append(y2)
+        for i, tau in enumerate(tValues):
+            # The bin frequency counts of this tau value.
+            counts = allCounts[i]
             # If in verbose mode:
             if verbose:
                 # Save the raw data if desired..
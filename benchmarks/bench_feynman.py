@@ -0,0 +1,66 @@
+'''Benchmarks the Feynman Y gate counting engine (FeynmanY.randomCountsAll,
+which counts every tau value from one shared array of times on a pool of
+threads) against the original loop over tau values with randomCounts, on
+the default sweep of 100 tau values (30 to 3000 by 30) over a synthetic
+Poisson measurement. The original loop is only run on a few tau values
+and its time for the whole sweep is extrapolated; those tau values are
+checked to give identical probabilities. The overlapping moving gates
+(FeynmanY.movingCounts) are then timed on the same sweep, and the scatter
+of Y around its Poisson value of zero is printed for both kinds of gates.
+Last, the sweep is streamed in blocks of a million events
+(FeynmanY.randomCountsFromBlocksAll) and checked to be identical.
+
+Usage: python benchmarks/bench_feynman.py [number of events] [number of threads] [tau values to run the original loop on]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import numpy as np
+
+# to allow for importing global files from the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, root)
+import Event as evt
+from lmx import kernels
+from FeynmanY import feynman as fey
+
+
+
+if __name__ == '__main__':
+    numEvents = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    numOriginal = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.exponential(100.0, numEvents))
+    triggers = evt.EventArray(times, np.zeros(numEvents, dtype=np.int16))
+    taus = list(range(30, 3001, 30))
+    feynman = fey.FeynmanY()
+    # time the original pure python loop
+    kernels.setBackend('numpy')
+    print(f'--- {numEvents} events, {len(taus)} tau values ---')
+    start = time.perf_counter()
+    original = [feynman.randomCounts(triggers, tau) for tau in taus[:numOriginal]]
+    elapsed = time.perf_counter() - start
+    print(f'{"randomCounts per tau (extrapolated)":<40}{elapsed / numOriginal * len(taus):10.3f} s')
+    for threads in sorted({1, workers}):
+        start = time.perf_counter()
+        counts = feynman.randomCountsAll(triggers, taus, -1, threads)
+        print(f'{"randomCountsAll, " + str(threads) + " thread(s)":<40}{time.perf_counter() - start:10.3f} s')
+    print('identical to randomCounts:', all(a == b for a, b in zip(original, counts)))
+    # the overlapping moving gates, whose Y should scatter less around the Poisson value of 0
+    start = time.perf_counter()
+    moving = feynman.randomCountsAll(triggers, taus, -1, workers, moving=True)
+    print(f'{"moving gates, " + str(workers) + " thread(s)":<40}{time.perf_counter() - start:10.3f} s')
+    for name, probabilities in [('sequential', counts), ('moving', moving)]:
+        ys = feynman.computeAllMoments(probabilities, taus)[0]
+        print(f'{name + " gates, RMS of Y":<40}{np.sqrt(np.mean(np.square(ys))):10.5f}')
+    # the same sweep streamed in blocks of a million events, as .lmx files and streamed text are
+    start = time.perf_counter()
+    blocks = (evt.EventArray(times[i:i + 1000000], None) for i in range(0, numEvents, 1000000))
+    streamed = feynman.randomCountsFromBlocksAll(blocks, taus, -1, workers)
+    print(f'{"streamed blocks, " + str(workers) + " thread(s)":<40}{time.perf_counter() - start:10.3f} s')
+    print('identical to randomCountsAll:', streamed == counts)
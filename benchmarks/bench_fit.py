@@ -0,0 +1,65 @@
+'''Benchmarks the batched Rossi Alpha fitter (RossiAlpha/batchFit.py)
+against one curve_fit call per histogram with numerical derivatives,
+as RossiHistogramFit did, on synthetic subfolder histograms fitted for
+several time difference methods and fit windows.
+
+Usage: python benchmarks/bench_fit.py [number of subfolders] [number of fit windows]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import numpy as np
+from scipy.optimize import curve_fit
+
+# to allow for importing global files from the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, root)
+from RossiAlpha import batchFit as bf
+from RossiAlpha import fitting as fit
+
+
+
+RESET_TIME = 1000
+BIN_WIDTH = 2
+METHODS = 3
+
+
+
+def curveFit(counts: np.ndarray, centers: np.ndarray, begin: float, end: float):
+
+    '''Fits one histogram the way RossiHistogramFit did.'''
+
+
+    c0 = np.mean(counts[-int(len(counts) * 0.05):])
+    index = np.where((centers >= begin) & (centers <= end))
+    b0 = (np.log(c0) - np.log(counts[0])) / (centers[-1] - centers[0])
+    popt, pcov = curve_fit(fit.exp_decay_2_param, centers[index], counts[index] - c0,
+                           bounds=([0, -np.inf], [np.inf, 0]), p0=[np.max(counts), b0], maxfev=int(1e6))
+    return popt[1], np.sqrt(pcov[1, 1])
+
+
+
+if __name__ == '__main__':
+    numFolders = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    numWindows = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = np.random.default_rng(0)
+    centers = np.arange(BIN_WIDTH / 2, RESET_TIME, BIN_WIDTH)
+    # Subfolder histograms of a decay with alpha = -0.01 /ns on a flat background.
+    counts = rng.poisson(2000 * np.exp(-0.01 * centers) + 50, (numFolders, METHODS, len(centers))).astype(float)
+    begins = np.linspace(10, 100, numWindows)
+    ends = np.full(numWindows, float(RESET_TIME))
+    print(f'--- {numFolders} subfolders x {METHODS} methods x {numWindows} fit windows ---')
+    start = time.perf_counter()
+    fitted = bf.fitHistograms(counts[:, :, np.newaxis, :], centers, begins, ends)
+    print(f'{"batch fit":<36}{time.perf_counter() - start:10.3f} s')
+    start = time.perf_counter()
+    alphas = np.empty((numFolders, METHODS, numWindows))
+    for index in np.ndindex(alphas.shape):
+        alphas[index] = curveFit(counts[index[:2]], centers, begins[index[2]], ends[index[2]])[0]
+    print(f'{"curve_fit per histogram":<36}{time.perf_counter() - start:10.3f} s')
+    difference = np.max(np.abs(fitted['alpha'] - alphas) / np.abs(alphas))
+    print(f'largest relative difference in alpha: {difference:.2e}')
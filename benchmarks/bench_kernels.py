@@ -0,0 +1,65 @@
+'''Benchmarks the sequential kernels (lmx/kernels.py) with the numpy
+backend against the numba backend: the dd Rossi Alpha time differences,
+Feynman Y random trigger gate counting, and lmx's SequentialBinning.
+The numba backend is skipped if numba is not installed. Its first call
+includes compilation, so every kernel is run once before timing.
+
+Usage: python benchmarks/bench_kernels.py [number of events]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import numpy as np
+
+# to allow for importing global files from the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, root)
+import Event as evt
+from lmx import kernels
+from lmx.Event import Event
+from lmx.feynman.SequentialBinning import SequentialBinning
+from RossiAlpha import engine as eng
+from FeynmanY import feynman as fey
+
+
+
+def timed(name: str, function):
+
+    '''Runs a kernel once and prints how long it took.'''
+
+
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:<36}{time.perf_counter() - start:10.3f} s')
+    return result
+
+
+
+if __name__ == '__main__':
+    numEvents = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.exponential(100.0, numEvents))
+    channels = rng.integers(1, 9, numEvents).astype(np.int16)
+    triggers = evt.EventArray(times, channels)
+    events = [Event(1, time) for time in times.tolist()]
+    feynman = fey.FeynmanY()
+    results = {}
+    for backend in (['numpy', 'numba'] if kernels.NUMBA else ['numpy']):
+        kernels.setBackend(backend)
+        print(f'--- {backend} backend, {numEvents} events ---')
+        # Compile (numba) before timing.
+        eng.sequentialTimeDifs(times[:100], channels[:100], 500, 'dd', 750)
+        feynman.randomCounts(evt.EventArray(times[:100], channels[:100]), 1000)
+        SequentialBinning()(events[:100], 1000)
+        results[backend] = (timed('dd time differences', lambda: eng.sequentialTimeDifs(times, channels, 500, 'dd', 750)[0]),
+                            timed('Feynman Y random counts', lambda: feynman.randomCounts(triggers, 1000)),
+                            timed('SequentialBinning', lambda: SequentialBinning()(events, 1000)))
+    # Both backends must give identical results.
+    if len(results) == 2:
+        assert np.array_equal(results['numpy'][0], results['numba'][0])
+        assert results['numpy'][1:] == results['numba'][1:]
+        print('backends agree.')
@@ -0,0 +1,90 @@
+'''Benchmarks the vectorized LMX decoder against the original
+sequential reader. Runs on the stripped test measurement and
+on a synthetic measurement built from its header.
+
+Usage: python benchmarks/bench_lmx.py [number of synthetic events]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+# to allow for importing global files from the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, root)
+from lmx.factory import readLMXFile, readLMXColumns, readLMXFile_old
+
+
+
+SAMPLE = os.path.join(root, 'lmx', 'test', 'resources', '2017_01_26_184649_stripped.lmx')
+
+
+
+def writeSyntheticFile(path: str, numEvents: int):
+
+    '''Writes an LMX file with the sample header and random events,
+    including clock rollovers and multi-detector channel words.
+
+    Inputs:
+    - path: where to write the file.
+    - numEvents: the number of channel words to write.'''
+
+
+    with open(SAMPLE, 'rb') as sample:
+        header = b''
+        line = b''
+        while not line.startswith(b'BinaryDataFollows'):
+            line = sample.readline()
+            header += line
+    rng = np.random.default_rng(0)
+    # Mostly single detector words with a few coincidences.
+    numbers = (1 << rng.integers(0, 32, numEvents)).astype(np.uint32)
+    several = rng.random(numEvents) < 0.01
+    numbers[several] |= (1 << rng.integers(0, 32, several.sum())).astype(np.uint32)
+    # Rising ticks that roll over the 32 bit clock.
+    clock = np.cumsum(rng.integers(1, 2000, numEvents, dtype=np.int64))
+    ticks = (clock % 2**32).astype(np.uint32)
+    pairs = []
+    last = 0
+    for rollover in np.flatnonzero(np.diff(clock // 2**32)) + 1:
+        pairs.append(np.column_stack((numbers[last:rollover], ticks[last:rollover])))
+        pairs.append(np.array([[0, 2**32 - 1], [1, 0]], dtype=np.uint32))
+        last = rollover
+    pairs.append(np.column_stack((numbers[last:], ticks[last:])))
+    pairs.append(np.array([[0, ticks[-1]], [4294967295, ticks[-1]]], dtype=np.uint32))
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.write(np.concatenate(pairs).astype('<u4').tobytes())
+
+
+
+def timed(name: str, function):
+
+    '''Runs a reader once and prints how long it took.'''
+
+
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:<36}{time.perf_counter() - start:10.3f} s')
+    return result
+
+
+
+if __name__ == '__main__':
+    numEvents = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    with tempfile.TemporaryDirectory() as folder:
+        synthetic = os.path.join(folder, 'synthetic.lmx')
+        writeSyntheticFile(synthetic, numEvents)
+        for name, path in (('sample', SAMPLE), ('synthetic', synthetic)):
+            print(f'--- {name} file ---')
+            old = timed('sequential reader (readLMXFile_old)', lambda: readLMXFile_old(path))
+            new = timed('vectorized reader (readLMXFile)', lambda: readLMXFile(path))
+            timed('vectorized columns (readLMXColumns)', lambda: readLMXColumns(path))
+            # Both readers must produce identical events.
+            assert new.events == old.events
+            print(f'{len(new.events)} events; readers agree.')
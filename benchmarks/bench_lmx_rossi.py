@@ -0,0 +1,63 @@
+'''Benchmarks the array implementations of the lmx Rossi-alpha binning
+(RossiBinningTypeIArray, TypeIIArray, TypeIIIArray) against the original
+Event list classes on a synthetic Poisson measurement. The original
+classes are only run up to a cap on the number of events, and the
+original Type II is never run: it does not terminate once the list is
+longer than its search limit.
+
+Usage: python benchmarks/bench_lmx_rossi.py [event counts] [largest count for the original classes]
+e.g. python benchmarks/bench_lmx_rossi.py 1000000,10000000,100000000 1000000
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import numpy as np
+
+# to allow for importing global files from the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, root)
+from lmx.Event import Event
+from lmx.rossi.RossiBinning import (RossiBinningTypeI, RossiBinningTypeIII, RossiBinningTypeIArray,
+                                    RossiBinningTypeIIArray, RossiBinningTypeIIIArray)
+
+
+
+RESET_TIME = 1000.0
+BINS = 100
+
+
+
+def timed(name: str, function):
+
+    '''Runs a binning once and prints how long it took.'''
+
+
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:<36}{time.perf_counter() - start:10.3f} s')
+    return result
+
+
+
+if __name__ == '__main__':
+    counts = [int(count) for count in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1000000, 10000000]
+    legacyCap = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    rng = np.random.default_rng(0)
+    for numEvents in counts:
+        # About one event per 100 ns, so roughly ten events per reset time.
+        times = np.cumsum(rng.exponential(100.0, numEvents))
+        print(f'--- {numEvents} events, reset time {RESET_TIME}, {BINS} bins ---')
+        newI = timed('Type I array', lambda: RossiBinningTypeIArray()(times, RESET_TIME, BINS))
+        timed('Type II array', lambda: RossiBinningTypeIIArray()(times, RESET_TIME, BINS))
+        newIII = timed('Type III array', lambda: RossiBinningTypeIIIArray()(times, RESET_TIME, BINS))
+        if numEvents <= legacyCap:
+            events = [Event(1, time) for time in times.tolist()]
+            oldI = timed('Type I original', lambda: RossiBinningTypeI()(events, RESET_TIME, BINS))
+            oldIII = timed('Type III original', lambda: RossiBinningTypeIII()(events, RESET_TIME, BINS))
+            # Both implementations must produce identical histograms.
+            assert newI == oldI and newIII == oldIII
+            print('histograms agree.')
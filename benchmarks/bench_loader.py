@@ -0,0 +1,87 @@
+'''Benchmarks the shared text loader against the older loaders
+on a synthetic list-mode file (1 GB by default).
+
+Usage: python benchmarks/bench_loader.py [size in MB] [workers]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+# to allow for importing global files from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)))
+import loader as ld
+import Event as evt
+
+
+
+def writeSyntheticFile(path: str, sizeMB: int):
+
+    '''Writes a sorted two column (time, channel) list-mode file.
+
+    Inputs:
+    - path: where to write the file.
+    - sizeMB: the approximate size of the file in megabytes.'''
+
+
+    rng = np.random.default_rng(0)
+    rows = 1000000
+    last = 0.0
+    with open(path, 'w') as file:
+        while file.tell() < sizeMB * 1024 * 1024:
+            times = last + np.cumsum(rng.exponential(50.0, rows))
+            last = times[-1]
+            channels = rng.integers(0, 16, rows)
+            np.savetxt(file, np.column_stack((times, channels)), fmt=['%.3f', '%d'])
+
+
+
+def legacyLoad(path: str):
+
+    '''The original line by line loader that
+    builds one Event object per row.'''
+
+
+    events = []
+    with open(path, 'r') as file:
+        for line in file:
+            columns = line.strip().split()
+            events.append(evt.Event(float(columns[0]), int(columns[1])))
+    return events
+
+
+
+def timed(name: str, function):
+
+    '''Runs a loader once and prints how long it took.'''
+
+
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:<28}{time.perf_counter() - start:10.2f} s')
+    return result
+
+
+
+if __name__ == '__main__':
+    sizeMB = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'synthetic.txt')
+        print(f'Writing {sizeMB} MB synthetic file...')
+        writeSyntheticFile(path, sizeMB)
+        events = timed('Event list (line by line)', lambda: legacyLoad(path))
+        loadtxt = timed('np.loadtxt', lambda: np.loadtxt(path, usecols=(0, 1)))
+        single = timed('loader (1 thread)', lambda: ld.readColumns(path, 0, 1, workers=1))
+        threaded = timed('loader (threaded)', lambda: ld.readColumns(path, 0, 1, workers=workers))
+        # Every loader must agree on every value.
+        assert np.array_equal(threaded[0], np.array([event.time for event in events]))
+        assert np.array_equal(threaded[1], np.array([event.channel for event in events]))
+        assert np.array_equal(threaded[0], loadtxt[:, 0])
+        assert np.array_equal(threaded[0], single[0])
+        print(f'{len(events)} rows; all loaders agree.')
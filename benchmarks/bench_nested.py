@@ -0,0 +1,51 @@
+'''Benchmarks building lmx Feynman histograms for many gate widths from
+one set of base gate counts (NestedBinning, lmx/feynman/NestedBinning.py)
+against binning the events again for every gate width with
+SequentialBinning, as FeynmanYAnalysis.makeHistograms does without a base
+gate width. The gate widths are log spaced multiples of the base width and
+the histograms are checked to be identical.
+
+Usage: python benchmarks/bench_nested.py [number of events] [number of gate widths]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import numpy as np
+
+# to allow for importing global files from the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, root)
+from lmx import kernels
+from lmx.Event import Event
+from lmx.feynman.FeynmanHistogramCalculator import FeynmanHistogramCalculator
+
+
+
+BASE_WIDTH = 10.0
+MAXIMUM_WIDTH = 2e6
+
+
+
+if __name__ == '__main__':
+    numEvents = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    numWidths = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = np.random.default_rng(0)
+    # About one event per microsecond, on a 1 ns clock.
+    times = np.round(np.cumsum(rng.exponential(1000.0, numEvents)))
+    calculator = FeynmanHistogramCalculator([Event(1, time) for time in times.tolist()])
+    multiples = np.unique(np.rint(np.logspace(0, np.log10(MAXIMUM_WIDTH / BASE_WIDTH), numWidths)))
+    widths = (multiples * BASE_WIDTH).tolist()
+    print(f'--- {numEvents} events, {len(widths)} gate widths from {widths[0]} to {widths[-1]} ns ---')
+    for backend in ['numpy', 'numba'] if kernels.NUMBA else ['numpy']:
+        kernels.setBackend(backend)
+        start = time.perf_counter()
+        sequential = [calculator.calculate(width).frequency for width in widths]
+        print(f'{"SequentialBinning (" + backend + ")":<36}{time.perf_counter() - start:10.3f} s')
+    start = time.perf_counter()
+    nested = [histogram.frequency for histogram in calculator.calculateNested(widths, BASE_WIDTH)]
+    print(f'{"NestedBinning":<36}{time.perf_counter() - start:10.3f} s')
+    print('identical:', nested == sequential)
@@ -0,0 +1,92 @@
+'''Benchmarks the Poisson maximum likelihood Rossi Alpha fitter
+(RossiAlpha/poissonFit.py) against the least squares fits, one curve_fit
+call per histogram as RossiHistogramFit does and the batched least
+squares of batchFit, on synthetic histograms with few counts per bin.
+Prints the run time of each fitter and the bias, spread, and pull
+(error / reported uncertainty) of the fitted alpha.
+
+Usage: python benchmarks/bench_poisson.py [number of histograms] [decay amplitude in counts per bin]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import numpy as np
+from scipy.optimize import curve_fit
+
+# to allow for importing global files from the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, root)
+from RossiAlpha import batchFit as bf
+from RossiAlpha import poissonFit as pf
+from RossiAlpha import fitting as fit
+
+
+
+RESET_TIME = 500
+BIN_WIDTH = 1
+ALPHA = -0.02
+OFFSET = 0.5
+FIT_MIN = 10
+
+
+
+def curveFit(counts: np.ndarray, centers: np.ndarray):
+
+    '''Fits one histogram the way RossiHistogramFit does.'''
+
+
+    c0 = np.mean(counts[-int(len(counts) * 0.05):])
+    index = np.where(centers >= FIT_MIN)
+    b0 = (np.log(c0 if c0 != 0 else 1e-10) - np.log(max(counts[0], 1))) / (centers[-1] - centers[0])
+    popt, pcov = curve_fit(fit.exp_decay_2_param, centers[index], counts[index] - c0,
+                           bounds=([0, -np.inf], [np.inf, 0]), p0=[np.max(counts), b0],
+                           maxfev=int(1e6), jac=fit.exp_decay_2_param_jacobian)
+    return popt[1], np.sqrt(pcov[1, 1])
+
+
+
+def summary(name: str, seconds: float, alpha: np.ndarray, uncertainty: np.ndarray):
+
+    '''Prints the run time and the accuracy of one fitter.'''
+
+
+    good = np.isfinite(alpha) & np.isfinite(uncertainty) & (uncertainty > 0)
+    pull = (alpha[good] - ALPHA) / uncertainty[good]
+    print(f'{name:<28}{seconds:9.3f} s   bias {np.mean(alpha[good]) / ALPHA - 1:+8.2%}'
+          f'   spread {np.std(alpha[good]) / -ALPHA:7.2%}   pull std {np.std(pull):6.2f}'
+          f'   failed {np.sum(~good)}')
+
+
+
+if __name__ == '__main__':
+    numHistograms = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    amplitude = float(sys.argv[2]) if len(sys.argv) > 2 else 4.0
+    rng = np.random.default_rng(0)
+    centers = np.arange(BIN_WIDTH / 2, RESET_TIME, BIN_WIDTH)
+    counts = rng.poisson(amplitude * np.exp(ALPHA * centers) + OFFSET, (numHistograms, len(centers))).astype(float)
+    print(f'--- {numHistograms} histograms, {len(centers)} bins, A = {amplitude}, alpha = {ALPHA}, B = {OFFSET} ---')
+    start = time.perf_counter()
+    alphas = np.full(numHistograms, np.nan)
+    errors = np.full(numHistograms, np.nan)
+    for i in range(numHistograms):
+        try:
+            alphas[i], errors[i] = curveFit(counts[i], centers)
+        except (RuntimeError, ValueError):
+            pass
+    summary('curve_fit least squares', time.perf_counter() - start, alphas, errors)
+    start = time.perf_counter()
+    fitted = bf.fitHistograms(counts, centers, FIT_MIN, RESET_TIME)
+    summary('batch least squares', time.perf_counter() - start, fitted['alpha'], fitted['alpha uncertainty'])
+    start = time.perf_counter()
+    fitted = pf.fitHistograms(counts, centers, FIT_MIN, RESET_TIME)
+    summary('batch poisson likelihood', time.perf_counter() - start, fitted['alpha'], fitted['alpha uncertainty'])
+    # one call per histogram, as RossiHistogramFit and Fit_With_Weighting make
+    start = time.perf_counter()
+    for i in range(numHistograms):
+        single = pf.fitHistograms(counts[i], centers, FIT_MIN, RESET_TIME)
+        alphas[i], errors[i] = single['alpha'], single['alpha uncertainty']
+    summary('poisson, one per histogram', time.perf_counter() - start, alphas, errors)
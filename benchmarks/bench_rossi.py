@@ -0,0 +1,114 @@
+'''Benchmarks the Rossi Alpha time difference engine against the
+original double loop (which grows its output with np.append) for
+each time difference method, and checks that the outputs are
+bit-identical. Then compares binning stored time differences with
+binning them as they are calculated, in run time and peak memory,
+and calculating several methods one at a time with one shared pass.
+
+Usage: python benchmarks/bench_rossi.py [number of events] [reset time] [number of binned events]
+'''
+
+
+
+# Necessary imports.
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# to allow for importing global files from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)))
+from RossiAlpha import engine as eng
+
+
+
+def legacyTimeDifs(times: list, channels: list, reset_time: float, method: str, digital_delay: float = None):
+
+    '''The original time difference loop from timeDifCalcs, with the
+    bounds check on the digital delay skip that the engine also uses.'''
+
+
+    time_diffs = np.array([])
+    n = len(times)
+    i = 0
+    prevent = False
+    while i < n:
+        ch_bank = set()
+        for j in range(i + 1, n):
+            if times[j] - times[i] > reset_time:
+                break
+            if((method == 'aa') or channels[j] != channels[i]):
+                if(method == 'aa' or method == 'cc' or channels[j] not in ch_bank):
+                    time_diffs = np.append(time_diffs,(times[j] - times[i]))
+                elif(method == 'dd'):
+                    stamped_time = times[i]
+                    while i < n and times[i] < stamped_time + digital_delay:
+                       i += 1
+                    prevent = True
+                    if i == n:
+                        break
+                if(method != "aa"):
+                    ch_bank.add(channels[j])
+        if not prevent:
+            i += 1
+        else:
+            prevent = False
+    return time_diffs
+
+
+
+def timed(function):
+
+    '''Runs a function once and returns its result, run time, and peak memory in MB.'''
+
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+
+if __name__ == '__main__':
+    numEvents = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    reset_time = float(sys.argv[2]) if len(sys.argv) > 2 else 500.0
+    numBinned = int(sys.argv[3]) if len(sys.argv) > 3 else 1000000
+    bin_width = reset_time / 100
+    rng = np.random.default_rng(0)
+    # A sorted measurement on 8 channels at about one event every 50 ns.
+    times = np.round(np.cumsum(rng.exponential(50.0, numBinned)), 2)
+    channels = rng.integers(0, 8, numBinned).astype(np.int16)
+    print(f'{numEvents} events, reset time {reset_time}')
+    print(f'{"method":<8}{"pairs":>10}{"legacy (s)":>14}{"engine (s)":>14}{"speedup":>10}')
+    for method in ('aa', 'cc', 'dd', 'ch'):
+        legacy, legacyTime, _ = timed(lambda: legacyTimeDifs(times[:numEvents].tolist(), channels[:numEvents].tolist(),
+                                                             reset_time, method, 100.0))
+        (new, _), newTime, _ = timed(lambda: eng.timeDifsFromArrays(times[:numEvents], channels[:numEvents],
+                                                                    reset_time, method, 100.0))
+        # The engine must match the original loop bit for bit.
+        assert np.array_equal(legacy, new), method
+        print(f'{method:<8}{len(new):>10}{legacyTime:>14.3f}{newTime:>14.3f}{legacyTime / newTime:>9.1f}x')
+    print(f'\n{numBinned} events, bin width {bin_width}')
+    print(f'{"method":<8}{"stored (s)":>14}{"stored (MB)":>14}{"binned (s)":>14}{"binned (MB)":>14}')
+    num_bins = int(reset_time / bin_width)
+    for method in ('aa', 'cc', 'dd', 'ch'):
+        stored, storedTime, storedPeak = timed(lambda: np.histogram(eng.timeDifsFromArrays(times, channels, reset_time, method, 100.0)[0],
+                                                                    bins=num_bins,
+                                                                    range=[0, reset_time])[0])
+        binned, binnedTime, binnedPeak = timed(lambda: eng.histogramTimeDifs(eng.timeDifChunks(times, channels, reset_time, method, 100.0),
+                                                                             reset_time,
+                                                                             bin_width))
+        # Binning while calculating must give the same histogram.
+        assert np.array_equal(stored, binned), method
+        print(f'{method:<8}{storedTime:>14.3f}{storedPeak:>14.1f}{binnedTime:>14.3f}{binnedPeak:>14.1f}')
+
+    methods = ['aa', 'cc', 'ch']
+    separate, separateTime, _ = timed(lambda: [eng.timeDifsFromArrays(times, channels, reset_time, method)[0] for method in methods])
+    shared, sharedTime, _ = timed(lambda: eng.methodTimeDifs(times, channels, reset_time, methods)[0])
+    # One pass over the events must give the same time differences for every method.
+    assert all(np.array_equal(separate[i], shared[method]) for i, method in enumerate(methods))
+    print(f'\n{", ".join(methods)}: one at a time {separateTime:.3f} s, one pass {sharedTime:.3f} s')
@@ -82,6 +82,78 @@ def readHDF5Data(path: list, settings: dict, fileName:str = 'pynoise', settingsN
     except FileNotFoundError:
         return None
 
+def writeSortedArray(filePath: str, data, attributes: dict = None, key: str = 'data', chunkSize: int = 65536):
+    '''
+    Saves a 1D array to its own hdf5 file, sorted in ascending order, chunked, and compressed,
+    so that all values up to a limit can later be read without reading the rest of the array.
+
+    Inputs:
+    - filePath: string path of the hdf5 file to write (replaced if it exists)
+    - data: the array to be saved
+    - attributes: dictionary of values stored alongside the array (ex: the reset time)
+    - key: string name of the dataset
+    - chunkSize: the number of values per compressed chunk
+    '''
+    data = np.sort(np.asarray(data), kind='stable')
+    # write to a temporary file first so that an interrupted run never leaves a partial file
+    with h5py.File(filePath + '.tmp', 'w') as file:
+        dataset = file.create_dataset(key,
+                                      data=data,
+                                      chunks=(chunkSize,),
+                                      maxshape=(None,),
+                                      compression='lzf',
+                                      shuffle=True)
+        for name, value in (attributes or {}).items():
+            dataset.attrs[name] = value
+    os.replace(filePath + '.tmp', filePath)
+
+
+def readSortedArray(filePath: str, limit: float = None, key: str = 'data'):
+    '''
+    Reads the values of an array saved with writeSortedArray that are no greater than a limit.
+    The cut is found with a binary search on the file, so only the chunks up to the cut are read.
+
+    Inputs:
+    - filePath: string path of the hdf5 file to read
+    - limit: the largest value to read. If None, reads the whole array
+    - key: string name of the dataset
+
+    Outputs:
+    - data: the sorted values no greater than the limit
+    - attributes: dictionary of the values stored alongside the array
+    '''
+    with h5py.File(filePath, 'r') as file:
+        dataset = file[key]
+        end = len(dataset)
+        if limit is not None:
+            # find the first value greater than the limit (same as searchsorted with side='right')
+            start = 0
+            while start < end:
+                middle = (start + end) // 2
+                if dataset[middle] <= limit:
+                    start = middle + 1
+                else:
+                    end = middle
+        return dataset[:end], dict(dataset.attrs)
+
+
+def readArrayAttributes(filePath: str, key: str = 'data'):
+    '''
+    Reads only the values stored alongside an array saved with writeSortedArray.
+
+    Inputs:
+    - filePath: string path of the hdf5 file to read
+    - key: string name of the dataset
+
+    Outputs:
+    - attributes: dictionary of the values stored alongside the array, or None if the file cannot be read
+    '''
+    try:
+        with h5py.File(filePath, 'r') as file:
+            return dict(file[key].attrs)
+    except (OSError, KeyError):
+        return None
+
 # -----------------------------helper functions for hdf5---------------------------------------------
 
 def travelDownHDF5Write(group, layers):
@@ -0,0 +1,78 @@
+# standard imports
+
+# third party imports
+import numpy
+
+# local imports
+from lmx.decoder import decodeBlock
+from lmx.factory import readHeader
+
+# number of (channel word, tick) pairs decoded at a time
+BLOCK_PAIRS = 4194304
+
+class LMXStream :
+    """Streaming reader for large LMX files
+
+       The binary data is memory-mapped and decoded in fixed-size blocks of
+       pairs, so only one block of events is in memory at a time. Events are
+       yielded in file (time) order and the rollover state is carried from
+       one block to the next.
+
+       Usage:
+
+           stream = LMXStream( '/some/path/to/MyLMXFile.lmx' )
+           for times, detectors in stream :
+
+               # do stuff with the block
+
+           print( stream.finaltime )
+    """
+
+    def __init__( self, name : str, blockSize : int = BLOCK_PAIRS ) :
+        """Open the LMX file and read its header
+
+           Arguments:
+               name : the name of the file to be opened
+               blockSize : the number of pairs decoded per block
+
+           Exceptions:
+               RuntimeError : the tick length is missing from the header
+        """
+
+        self.name = name
+        self.blockSize = blockSize
+        self.finaltime = None
+
+        with open( name, 'rb' ) as lmxfile :
+
+            self.header = readHeader( lmxfile )
+            self.dataOffset = lmxfile.tell()
+
+        if not self.header.ticklength :
+
+            raise RuntimeError( 'Tick length not found in header, '
+                                + 'cannot convert to absolute time' )
+
+    def __iter__( self ) :
+        """Yield the (times, detectors) arrays of each block of events"""
+
+        data = numpy.memmap( self.name, dtype = '<u4', mode = 'r', offset = self.dataOffset )
+        pairs = data[ : len( data ) - len( data ) % 2 ].reshape( -1, 2 )
+        state = ( 0, None )
+        self.finaltime = None
+
+        for start in range( 0, len( pairs ), self.blockSize ) :
+
+            block = pairs[ start : start + self.blockSize ]
+            times, detectors, finaltime, state = decodeBlock( block[ :, 0 ], block[ :, 1 ],
+                                                             self.header.ticklength.value,
+                                                             state, quiet = True )
+            if len( times ) :
+
+                yield times, detectors
+
+            # nothing after the end of measurement flag is an event
+            if finaltime is not None :
+
+                self.finaltime = finaltime
+                break
@@ -0,0 +1,206 @@
+# standard imports
+
+# third party imports
+import numpy
+
+# local imports
+
+# flag values that follow a zero channel word
+ROLLOVER_FLAG = 1
+STOP_FLAG = 2
+START_FLAG = 3
+END_FLAG = 4294967295
+
+def readBody( file ) :
+    """Read the binary body of an LMX file as (channel word, tick) pairs
+
+       Arguments:
+           file : the open LMX file, positioned just after the header
+
+       Returns:
+           the channel words and ticks as two uint32 arrays
+    """
+
+    try:
+
+        data = numpy.fromfile( file, dtype = numpy.uint32 )
+
+    except ( OSError, ValueError ) :
+
+        raise RuntimeError( 'Binary data was unable to be read' )
+
+    # drop a trailing half pair from a truncated file
+    data = data[ : len( data ) - len( data ) % 2 ]
+    return data[ 0::2 ], data[ 1::2 ]
+
+def classifyWords( numbers : numpy.ndarray ) :
+    """Find which words are flag markers and which are flags
+
+       A zero channel word marks the next pair as a flag, unless the zero
+       is itself the flag of the previous marker. Within a run of zeros the
+       markers are therefore the words at an even offset from the start of
+       the run.
+
+       Arguments:
+           numbers : the channel words
+
+       Returns:
+           two boolean arrays flagging the marker and flag words
+    """
+
+    zero = numbers == 0
+    index = numpy.arange( len( numbers ) )
+    # index of the first zero of the run each word belongs to
+    runStart = numpy.maximum.accumulate( numpy.where( zero & ~numpy.roll( zero, 1 ) |
+                                                      ( index == 0 ), index, 0 ) )
+    marker = zero & ( ( index - runStart ) % 2 == 0 )
+    flag = numpy.zeros_like( marker )
+    flag[ 1 : ] = marker[ : -1 ]
+
+    return marker, flag
+
+def expandDetectors( numbers : numpy.ndarray ) :
+    """Expand channel words into one detector index per set bit
+
+       Words with a single bit (by far the most common) are converted
+       directly, the others are unpacked bit by bit. Detector indices
+       start at 1 for the least significant bit and the detectors of a
+       word are given in increasing order.
+
+       Arguments:
+           numbers : the (non zero) channel words
+
+       Returns:
+           detectors : the detector index of every event
+           counts : the number of events in each word
+    """
+
+    single = ( numbers & ( numbers - 1 ) ) == 0
+    multi = numpy.flatnonzero( ~single )
+    counts = numpy.ones( len( numbers ), dtype = numpy.int64 )
+    if len( multi ) :
+
+        bits = numpy.unpackbits( numbers[ multi ].astype( '<u4' ).view( numpy.uint8 ).reshape( -1, 4 ),
+                                 axis = 1, bitorder = 'little' )
+        counts[ multi ] = bits.sum( axis = 1 )
+
+    starts = numpy.cumsum( counts ) - counts
+    detectors = numpy.empty( int( counts.sum() ), dtype = numpy.int16 )
+
+    # for a power of two, frexp gives the bit position plus one
+    detectors[ starts[ single ] ] = numpy.frexp( numbers[ single ].astype( numpy.float64 ) )[ 1 ]
+    if len( multi ) :
+
+        rows, columns = numpy.nonzero( bits )
+        rank = numpy.arange( len( rows ) ) - numpy.repeat( numpy.cumsum( counts[ multi ] ) - counts[ multi ],
+                                                           counts[ multi ] )
+        detectors[ starts[ multi ][ rows ] + rank ] = columns + 1
+
+    return detectors, counts
+
+def decodeBody( numbers : numpy.ndarray, ticks : numpy.ndarray, ticklength : float,
+                quiet : bool = False ) :
+    """Decode LMX (channel word, tick) pairs into columnar event data
+
+       Every step is an array operation: rollover offsets are accumulated
+       with a cumulative sum, stop/start and end of measurement flags are
+       located with masks, and multi-detector words are bit unpacked.
+
+       Arguments:
+           numbers : the channel words
+           ticks : the clock ticks
+           ticklength : the length of a clock tick
+           quiet : whether or not to silence the flag messages
+
+       Returns:
+           times : the event times (ticklength units)
+           detectors : the detector index of each event (starting at 1)
+           finaltime : the end of measurement time, or None if no end flag was found
+    """
+
+    times, detectors, finaltime, state = decodeBlock( numbers, ticks, ticklength, quiet = quiet )
+
+    if not quiet and finaltime is None :
+
+        print( ' End of file flag not found. Events will continue to be generated.' )
+
+    return times, detectors, finaltime
+
+def decodeBlock( numbers : numpy.ndarray, ticks : numpy.ndarray, ticklength : float,
+                 state : tuple = ( 0, None ), quiet : bool = False ) :
+    """Decode one block of LMX (channel word, tick) pairs, carrying the
+       decoder state over from the previous block
+
+       Arguments:
+           numbers : the channel words of the block
+           ticks : the clock ticks of the block
+           ticklength : the length of a clock tick
+           state : the (rollover offset, pending marker tick) pair returned
+                   for the previous block, where the pending marker tick is
+                   None unless the previous block ended on a flag marker
+           quiet : whether or not to silence the flag messages
+
+       Returns:
+           times : the event times (ticklength units)
+           detectors : the detector index of each event (starting at 1)
+           finaltime : the end of measurement time, or None if no end flag was found
+           state : the decoder state to pass on to the next block
+    """
+
+    addclock, pending = state
+    ticks = ticks.astype( numpy.int64 )
+
+    # a marker left at the end of the previous block flags the first pair
+    if pending is not None :
+
+        numbers = numpy.concatenate( ( numpy.zeros( 1, dtype = numbers.dtype ), numbers ) )
+        ticks = numpy.concatenate( ( [ pending ], ticks ) )
+
+    marker, flag = classifyWords( numbers )
+
+    # stop at the end of measurement flag
+    ends = numpy.flatnonzero( flag & ( numbers == END_FLAG ) )
+    stop = ends[ 0 ] if len( ends ) else len( numbers )
+    marker, flag, numbers, ticks = marker[ : stop ], flag[ : stop ], numbers[ : stop ], ticks[ : stop + 1 ]
+
+    # accumulate the ticks of rollover markers into a running offset
+    rollovers = numpy.flatnonzero( flag & ( numbers == ROLLOVER_FLAG ) )
+    added = numpy.zeros( stop, dtype = numpy.int64 )
+    added[ rollovers ] = ticks[ rollovers - 1 ]
+    offset = numpy.cumsum( added ) + addclock
+
+    if not quiet :
+
+        if len( rollovers ) :
+
+            print( ' Clock rollovers found:', len( rollovers ) )
+
+        for position in numpy.flatnonzero( flag & numpy.isin( numbers, [ STOP_FLAG, START_FLAG ] ) ) :
+
+            if numbers[ position ] == STOP_FLAG :
+
+                print( ' active mode: stop recording data' )
+
+            else :
+
+                print( ' active mode: start recording data' )
+
+        for position in numpy.flatnonzero( flag & ~numpy.isin( numbers, [ ROLLOVER_FLAG, STOP_FLAG, START_FLAG ] ) ) :
+
+            print( ' unknown flag or no event during tick?', numbers[ position ], ticks[ position ] )
+
+    # one event per set bit of every real channel word
+    real = numpy.flatnonzero( ~( marker | flag ) )
+    detectors, counts = expandDetectors( numbers[ real ] )
+    times = numpy.repeat( ( ticks[ real ] + offset[ real ] ) * ticklength, counts )
+
+    lastclock = int( offset[ -1 ] ) if stop > 0 else addclock
+    finaltime = None
+    if len( ends ) :
+
+        finaltime = ( ticks[ stop ] + lastclock ) * ticklength
+
+    # a marker on the last pair flags the first pair of the next block
+    pending = int( ticks[ stop - 1 ] ) if not len( ends ) and stop > 0 and marker[ -1 ] else None
+
+    return times, detectors, finaltime, ( lastclock, pending )
@@ -1,7 +1,4 @@
 # standard imports
-import math
-import numpy
-from tqdm import tqdm
 import sys
 import re
 
@@ -12,216 +9,158 @@ from lmx.Header import Header
 from lmx.Event import Event
 from lmx.LMXFile import LMXFile
 from lmx.ValueUnit import ValueUnit
+from lmx.decoder import readBody, decodeBody
 
-def readLMXFile(name: str):
-    """Read an LMX binary file and return an LMX
-
-       Usage:
-
-           # open file
-           path = '/some/path/to/MyLMXFile.lmx'
-           lmx = readLMXFile( path )
-
-           # do stuff with it
-           print( lmx.header.ticklength )
+def readHeader(lmxfile):
+    """Read the text header of an LMX file
 
        Arguments:
-           name : the name of the file to be opened
+           lmxfile : the open LMX file, positioned at the start
 
-       Exceptions:
-           ValueError : something went wrong
+       Returns:
+           the Header, with the file positioned at the binary data
     """
 
-    def readHeader(lmxfile):
 
-        def readKeyValue(line):
-            pieces = line.decode('ascii').split(sep=':', maxsplit=1)
-            if len(pieces) == 1:
-                return pieces[0].rstrip().strip(), None
-
-            else:
-                return pieces[0].rstrip().strip(), pieces[1].rstrip().strip()
+    def readKeyValue(line):
+        pieces = line.decode('ascii').split(sep=':', maxsplit=1)
+        if len(pieces) == 1:
+            return pieces[0].rstrip().strip(), None
 
-        def parseValueUnit(string: str):
-            if string.lower() != 'unknown':
-                pattern = re.compile('^[+-]?([0-9]+([.][0-9]*)?|[.][0-9]+)' + '([\ ]*[\[](.*)[\]])?$')
-                match = pattern.match(string)
+        else:
+            return pieces[0].rstrip().strip(), pieces[1].rstrip().strip()
 
-                if match:
-                    return ValueUnit(float(match[1]), match[4])
+    def parseValueUnit(string: str):
+        if string.lower() != 'unknown':
+            pattern = re.compile('^[+-]?([0-9]+([.][0-9]*)?|[.][0-9]+)' + '([\ ]*[\[](.*)[\]])?$')
+            match = pattern.match(string)
 
-                else:
-                    raise ValueError('Expected a value with a unit, got \'' + string + '\' instead')
+            if match:
+                return ValueUnit(float(match[1]), match[4])
 
             else:
-                return None
-
-        def extractRowRatio(string: str):
-            try:
-                return float(string)
-
-            except ValueError:
-                raise ValueError('Expected a value without a unit, got \'' + string + '\' instead')
-
-        ticklength = None
-        MsmtDuration = None
-        AvgCountRate = None
-        FaceToSource = None
-        CenterToFloor = None
-        FifoLostCounts = None
-
-        RR12, RR13, RR23 = None, None, None
-
-        header_dict = {'Comment': []}
-        key, value = None, None
-        while key != 'BinaryDataFollows':
-
-            key, value = readKeyValue(lmxfile.readline())
-            if key == 'Comment':
-
-                header_dict['Comment'].append(value)
-
-            elif key == 'AverageCountRate':
-
-                AvgCountRate = parseValueUnit(value)
+                raise ValueError('Expected a value with a unit, got \'' + string + '\' instead')
 
-            elif key == 'DistanceDetFaceToSource':
+        else:
+            return None
 
-                FaceToSource = parseValueUnit(value)
+    def extractRowRatio(string: str):
+        try:
+            return float(string)
 
-            elif key == 'DistanceDetCenterToFloor':
+        except ValueError:
+            raise ValueError('Expected a value without a unit, got \'' + string + '\' instead')
 
-                CenterToFloor = parseValueUnit(value)
+    ticklength = None
+    MsmtDuration = None
+    AvgCountRate = None
+    FaceToSource = None
+    CenterToFloor = None
+    FifoLostCounts = None
 
-            elif key == 'BinaryDataClockTickLength':
+    RR12, RR13, RR23 = None, None, None
 
-                ticklength = parseValueUnit(value)
+    header_dict = {'Comment': []}
+    key, value = None, None
+    while key != 'BinaryDataFollows':
 
-            elif key == 'DurationRealTime':
+        key, value = readKeyValue(lmxfile.readline())
+        if key == 'Comment':
 
-                MsmtDuration = parseValueUnit(value)
+            header_dict['Comment'].append(value)
 
-            elif key == 'DistanceDetCenterToFloor':
+        elif key == 'AverageCountRate':
 
-                CenterToFloor = parseValueUnit(value)
+            AvgCountRate = parseValueUnit(value)
 
-            elif key == 'FifoLostCounts':
+        elif key == 'DistanceDetFaceToSource':
 
-                FifoLostCounts = int(value)
+            FaceToSource = parseValueUnit(value)
 
-            elif key == 'RowRatio(1/2)' or key == 'RowRatio(1 / 2)':
+        elif key == 'DistanceDetCenterToFloor':
 
-                RR12 = extractRowRatio(value)
+            CenterToFloor = parseValueUnit(value)
 
-            elif key == 'RowRatio(1/3)' or key == 'RowRatio(1 / 3)':
+        elif key == 'BinaryDataClockTickLength':
 
-                RR13 = extractRowRatio(value)
+            ticklength = parseValueUnit(value)
 
-            elif key == 'RowRatio(2/3)' or key == 'RowRatio(2 / 3)':
+        elif key == 'DurationRealTime':
 
-                RR23 = extractRowRatio(value)
+            MsmtDuration = parseValueUnit(value)
 
-            elif key not in header_dict:
+        elif key == 'DistanceDetCenterToFloor':
 
-                header_dict[key] = value
+            CenterToFloor = parseValueUnit(value)
 
-            else:
+        elif key == 'FifoLostCounts':
 
-                print('This key is present twice: ' + key)
+            FifoLostCounts = int(value)
 
-        return Header(ticklength=ticklength, MsmtDuration=MsmtDuration,
-                      AvgCountRate=AvgCountRate, FaceToSource=FaceToSource,
-                      CenterToFloor=CenterToFloor,
-                      FifoLostCounts=FifoLostCounts, RR12=RR12,
-                      RR13=RR13, RR23=RR23, other=header_dict)
+        elif key == 'RowRatio(1/2)' or key == 'RowRatio(1 / 2)':
 
-    def readData(file, ticklength):
+            RR12 = extractRowRatio(value)
 
-        def getDetectorIndices(number):
-            indices = []
-
-            logged = math.log2(number)
-            if logged%1 == 0 :
-                indices.append(int(logged)+1)
+        elif key == 'RowRatio(1/3)' or key == 'RowRatio(1 / 3)':
 
-            else:
-                i = 1
-                while number:
-                    if number & 1: indices.append(i)
-                    number >>= 1
-                    i += 1
+            RR13 = extractRowRatio(value)
 
-            return indices
+        elif key == 'RowRatio(2/3)' or key == 'RowRatio(2 / 3)':
 
-        try:
-            data = numpy.fromfile(file,dtype=("uint32"))
-        except RuntimeError:
-            raise RuntimeError(" Binary data was unable to be read")
-            return
+            RR23 = extractRowRatio(value)
 
-        numbers = data[::2]
-        ticks = data[1::2].astype(numpy.int64)
+        elif key not in header_dict:
 
-        # Account for rollovers
-        where_zeros = numpy.where(numbers == 0)[0]
-        where_flags = [flag for flag in where_zeros+1 if flag<len(numbers)]
-        addclock = [ticks[flag + 1] for flag in where_flags if numbers[flag]==1]
+            header_dict[key] = value
 
-        if numbers[-1]!= 4294967295:
-            print(" End of file flag not found. Events will continue to be generated.")
+        else:
 
-        for indexer, value in enumerate([flag for flag in where_flags if numbers[flag]==1]):
-            ticks[value + 1:] += addclock[indexer] + ticks[value] - ticks[value+1]
-            print(' ROOOOOLLLLLLL OOOOOVEEEEER')
+            print('This key is present twice: ' + key)
 
-        finaltime = 0
-        for special_flag in where_flags:
-            # rollover flag
-            if numbers[special_flag] == 0 or numbers[special_flag] == 1:
-                pass
+    return Header(ticklength=ticklength, MsmtDuration=MsmtDuration,
+                  AvgCountRate=AvgCountRate, FaceToSource=FaceToSource,
+                  CenterToFloor=CenterToFloor,
+                  FifoLostCounts=FifoLostCounts, RR12=RR12,
+                  RR13=RR13, RR23=RR23, other=header_dict)
 
-            # stop recording flag
-            elif numbers[special_flag] == 2:
-                print(' active mode: stop recording data')
+def readLMXFile(name: str):
+    """Read an LMX binary file and return an LMX
 
-            # start recording flag
-            elif numbers[special_flag] == 3:
-                print(' active mode: start recording data')
+       Usage:
 
-            # end of measurement flag
-            elif numbers[special_flag] == 4294967295:
-                finaltime = ticks[special_flag]*ticklength
+           # open file
+           path = '/some/path/to/MyLMXFile.lmx'
+           lmx = readLMXFile( path )
 
-            else:
-                print(' unknown flag or no event during tick?', numbers[special_flag], ticks[special_flag])
+           # do stuff with it
+           print( lmx.header.ticklength )
 
+       Arguments:
+           name : the name of the file to be opened
 
-        numbers = numpy.delete(numbers, numpy.concatenate((where_zeros, where_flags)))
-        ticks = numpy.delete(ticks, numpy.concatenate((where_zeros, where_flags)))
-        where_multi_detector = numpy.where( numpy.log2(numbers)%1 != 0 )[0]
-        ticks = ticks * ticklength
+       Exceptions:
+           ValueError : something went wrong
+    """
 
-        events = []
-        start = 0
-        if list(where_multi_detector):
-            for pos in tqdm(where_multi_detector):
-                events.extend([Event(*singlet) for singlet in zip(numbers[start:pos], ticks[start:pos])])
-                start = pos + 1
+    header, times, detectors, endtime = readLMXColumns(name)
+    events = [Event(*singlet) for singlet in zip(detectors.tolist(), times.tolist())]
+    return LMXFile(header, events)
 
-                for index in getDetectorIndices(pos):
-                    events.append(Event(index, ticks[pos]))
+def readLMXColumns(name: str):
+    """Read an LMX binary file into columnar time and detector arrays
 
-                while start in where_multi_detector:
-                    start += 1
+       Arguments:
+           name : the name of the file to be opened
 
-            last = where_multi_detector[-1] + 1
-            if last < len(numbers):
-                events.extend([Event(*singlet) for singlet in zip(numbers[last:], ticks[last:])])
-        else:
-            combo_holder = zip(numbers, ticks)
-            events = [Event(*singlet) for singlet in tqdm(combo_holder, total=len(numbers))]
+       Returns:
+           header : the Header of the file
+           times : the event times (in the units of the tick length)
+           detectors : the detector index of each event (starting at 1)
+           endtime : the end of measurement time, or None if not recorded
 
-        return events, finaltime
+       Exceptions:
+           RuntimeError : the tick length is missing or the data is unreadable
+    """
 
     # open the lmx file
     print(' Opening file \'' + name + '\'')
@@ -235,10 +174,11 @@ def readLMXFile(name: str):
             raise RuntimeError(' Tick length not found in header, '
                                + 'cannot convert to absolute time')
 
-        # read the events
-        events, endtime = readData(lmxfile, header.ticklength.value)
+        # read and decode the events
+        numbers, ticks = readBody(lmxfile)
+        times, detectors, endtime = decodeBody(numbers, ticks, header.ticklength.value)
         print(' End of measurement. Measurement time (ns): ', endtime)
-        return LMXFile(header, events)
+        return header, times, detectors, endtime
 
 def readLMXFile_old(name: str):
     """Read an LMX binary file and return an LMX
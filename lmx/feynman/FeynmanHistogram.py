@@ -4,6 +4,9 @@ import matplotlib.pyplot as plt
 import numpy
 import math
 
+# local imports
+from lmx.feynman import moments
+
 
 class FeynmanHistogram:
 
@@ -30,11 +33,11 @@ class FeynmanHistogram:
         else:
             self.frequency = frequency
         self.number_gates = int(sum(self.frequency))
-        self.normalized_frequency = [frequency / self.number_gates
-                                     for frequency in self.frequency]
+        self.normalized_frequency = (numpy.asarray(self.frequency, dtype=numpy.float64)
+                                     / self.number_gates).tolist()
 
         self._factorial = {}
-        self._reduced_factorial = {}
+        self._moments = None
         self._count_rate = {}
 
     @property
@@ -120,6 +123,19 @@ class FeynmanHistogram:
 
         self._normalized = normalized
 
+    def feynman_moments(self):
+        """Calculate the reduced factorial moments, Y1 and Y2 with their
+           uncertainties (see moments.feynmanMoments)
+
+            Returns: Dictionary of the moments, holding one value each
+        """
+        # histograms pickled before the moments were cached do not have them
+        if getattr(self, '_moments', None) is None:
+            self._moments = {key: float(value[0]) for key, value in
+                             moments.feynmanMoments(self.frequency, [self.gatewidth]).items()}
+
+        return self._moments
+
     def reduced_factorial_moment(self, order: int):
         """Calculate the reduced factorial moments m (equations 2-6)
 
@@ -127,29 +143,12 @@ class FeynmanHistogram:
                 order: the order of the reduced factorial moment (r in
                        equation 2-6)
         """
-        if not order in self._reduced_factorial:
-            def notImplemented(self, order):
-                raise NotImplementedError('Order ' + str(order) + ' not '
-                                          + 'implemented for reduced factorial '
-                                          + 'moment')
-
-            switcher = {
-
-                1: lambda self, order: self.factorial_moment(1),
-                2: lambda self, order: (self.factorial_moment(2) -
-                                        self.factorial_moment(1)) / 2.,
-                3: lambda self, order: (self.factorial_moment(3) -
-                                        3. * self.factorial_moment(2) +
-                                        2. * self.factorial_moment(1)) / 6.,
-                4: lambda self, order: (self.factorial_moment(4) -
-                                        6. * self.factorial_moment(3) +
-                                        11. * self.factorial_moment(2) -
-                                        6. * self.factorial_moment(1)) / 24.
-            }
-
-            self._reduced_factorial[order] = switcher.get(order, notImplemented)(self, order)
-
-        return self._reduced_factorial[order]
+        if order not in (1, 2, 3, 4):
+            raise NotImplementedError('Order ' + str(order) + ' not '
+                                      + 'implemented for reduced factorial '
+                                      + 'moment')
+
+        return self.feynman_moments()['m' + str(order)]
 
     def factorial_moment(self, order: int):
         """Calculate the factorial moments Cbar (equations 7-11)
@@ -160,9 +159,8 @@ class FeynmanHistogram:
         if not order:
             raise ValueError("Real integer must be provided")
         if not order in self._factorial:
-            npower = [pow(n, order)
-                      for n in range(len(self.normalized_frequency))]
-            self._factorial[order] = numpy.inner(npower, self.normalized_frequency)
+            npower = numpy.arange(len(self.normalized_frequency), dtype=numpy.float64) ** order
+            self._factorial[order] = float(numpy.dot(npower, self.normalized_frequency))
 
         return self._factorial[order]
 
@@ -200,14 +198,7 @@ class FeynmanHistogram:
                 y1: Y1 value for the gatewidth
                 dy1: Error on the Y1 value
         """
-        m1 = self.reduced_factorial_moment(1)
-        m2 = self.reduced_factorial_moment(2)
-        tau = self.gatewidth * 1e-9
-        N = self.number_gates
-        
-        y1 = m1 / tau
-        dy1 = math.sqrt((2. * m2 + m1 * (1. - m1)) / (N - 1)) / tau
-        return (y1, dy1)
+        return (self.feynman_moments()['Y1'], self.feynman_moments()['dY1'])
 
     @property
     def Y2(self):
@@ -217,22 +208,7 @@ class FeynmanHistogram:
                 y2: Y2 value for the gatewidth
                 dy2: Error on the Y2 value
         """
-        m1 = self.reduced_factorial_moment(1)
-        m2 = self.reduced_factorial_moment(2)
-        m3 = self.reduced_factorial_moment(3)
-        m4 = self.reduced_factorial_moment(4)
-        tau = self.gatewidth * 1e-9
-        N = self.number_gates
-        
-        y2 = (m2 - m1 * m1 / 2.) / tau
-#        if (6. * m4 + 6. * m3 + m2 * (1. - m2)) > 0:
-#            dy2 = math.sqrt((6. * m4 + 6. * m3 + m2 * (1. - m2)) / (N - 1)) / tau
-        # Equation 29 instead of Equation 25
-        if (6*m4-6*m3*m1+6*m3-m2**2+4*m2*m1**2-4*m2*m1+m2-m1**4+m1**3) > 0:
-            dy2 = math.sqrt((6*m4-6*m3*m1+6*m3-m2**2+4*m2*m1**2-4*m2*m1+m2-m1**4+m1**3) / (N - 1)) / tau
-        else:
-            dy2 = 0
-        return (y2, dy2)
+        return (self.feynman_moments()['Y2'], self.feynman_moments()['dY2'])
 
     # covariance dY1Y2 may need to be included
 
@@ -6,6 +6,7 @@ from typing import List, Callable
 # local imports
 from lmx.Event import Event
 from lmx.feynman.SequentialBinning import SequentialBinning
+from lmx.feynman.NestedBinning import NestedBinning
 from lmx.feynman.FeynmanHistogram import FeynmanHistogram
 
 class FeynmanHistogramCalculator :
@@ -34,3 +35,22 @@ class FeynmanHistogramCalculator :
 
         return FeynmanHistogram( gatewidth,
                                  self._binning( self.events, gatewidth ) )
+
+    def calculateNested( self, gatewidths : List[ float ],
+                         basewidth : float = None ) -> List[ FeynmanHistogram ] :
+        """Calculate the Feynman histograms of several gate widths with a
+           single pass over the events (see NestedBinning)
+
+            Arguments:
+               gatewidths : the gate widths (in nanoseconds), integer
+                            multiples of the base gate width
+               basewidth : the base gate width (in nanoseconds), defaults to
+                           the smallest gate width
+
+            Returns:
+               the Feynman histogram of every gate width
+        """
+
+        binning = NestedBinning( min( gatewidths ) if basewidth is None else basewidth )
+        return [ FeynmanHistogram( gatewidth, binning( self.events, gatewidth ) )
+                 for gatewidth in gatewidths ]
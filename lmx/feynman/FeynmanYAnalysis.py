@@ -15,6 +15,7 @@ from tqdm import tqdm
 
 # local imports
 from lmx.feynman.FeynmanHistogram import FeynmanHistogram
+from lmx.feynman import moments
 
 np.seterr(over="ignore", invalid="ignore")
 
@@ -175,7 +176,7 @@ class FeynmanYAnalysis:
         self._2logfit_covariance = double_covariance
 
     def makeHistograms(self, calculator: callable, gates_list: list = None, minimum=10, maximum=2e6,
-                       spacing=10, disableSubProgBar=True):
+                       spacing=10, disableSubProgBar=True, basewidth=None):
         """Creates several FeynmanHistograms for a range of log spaced gate widths
 
             Arguments:
@@ -185,12 +186,20 @@ class FeynmanYAnalysis:
                 maximum: maximum gatewidth in nanoseconds
                 spacing: The amount of points is log spaced between min_ and max_
                 disableSubProgBar: Defaults to disabling the progress bar of each histogram
+                basewidth: If given, the events are binned once in gates of this width (in
+                           nanoseconds) and every gate width is rounded to an integer multiple
+                           of it, so that all the histograms are built from the same counts
 
             Stored as:
                 self.histograms:list of FeynmanHistograms for the specified range
         """
 
-        if gates_list is None:
+        if basewidth is not None:
+            if gates_list is None:
+                gates_list = np.logspace(np.log10(minimum), np.log10(maximum), spacing)
+            multiples = np.unique(np.maximum(np.rint(np.asarray(gates_list) / basewidth), 1))
+            self.histograms = calculator.calculateNested((multiples * basewidth).tolist(), basewidth)
+        elif gates_list is None:
             self.histograms = [calculator.calculate(tau)
                                for tau in tqdm(np.logspace(np.log10(minimum), np.log10(maximum), spacing))]
         else:
@@ -203,13 +212,21 @@ class FeynmanYAnalysis:
         """
         return self._taus
 
+    def feynmanMoments(self):
+        """Calculates the reduced factorial moments, Y1 and Y2 of all FeynmanHistograms at once
+
+            Returns: Dictionary of arrays with one value per gate width (see moments.feynmanMoments)
+        """
+        return moments.feynmanMoments(moments.frequencyArray([hist.frequency for hist in self.histograms]),
+                                      [hist.gatewidth for hist in self.histograms])
+
     def Y1Distribution(self):
         """Extracts the Y1 and its uncertainty as a function of gate width
 
             Returns: List of Y1's in nanoseconds
         """
-        holdY1 = [hist.Y1 for hist in self.histograms]
-        self.Y1s, self.D1s = zip(*holdY1)
+        result = self.feynmanMoments()
+        self.Y1s, self.D1s = tuple(result['Y1'].tolist()), tuple(result['dY1'].tolist())
         return self.Y1s, self.D1s
 
     def Y2Distribution(self):
@@ -217,8 +234,8 @@ class FeynmanYAnalysis:
 
             Returns: List of Y2's in nanoseconds
         """
-        holdY2 = [hist.Y2 for hist in self.histograms]
-        self.Y2s, self.D2s = zip(*holdY2)
+        result = self.feynmanMoments()
+        self.Y2s, self.D2s = tuple(result['Y2'].tolist()), tuple(result['dY2'].tolist())
         return self.Y2s, self.D2s
 
     def fit1Log(self, guess=None):
@@ -0,0 +1,92 @@
+# standard imports
+from typing import List
+
+# third party imports
+import numpy
+
+# local imports
+from lmx.Event import Event
+
+class NestedBinning :
+    """Feynman binning for gate widths that are integer multiples of a base
+       gate width
+
+       The events are only binned once, into gates of the base width. A gate
+       of k times the base width holds k adjacent base gates, so its number of
+       events is the sum of their counts and no further pass over the events
+       is needed. The frequencies are the same as those of SequentialBinning
+       (every gate from the first one up to the gate of the last event), up to
+       the rounding of event times that fall on a gate edge.
+    """
+
+    def __init__( self, basewidth : float ) :
+        """Initialise the binning
+
+            Arguments:
+               basewidth : the base gate width (in nanoseconds), every gate
+                           width must be an integer multiple of it
+        """
+
+        if basewidth <= 0. :
+
+            raise ValueError( 'The base gate width cannot be zero or negative.' )
+
+        self.basewidth = float( basewidth )
+        self._events = None
+        self._gates = None
+        self._counts = None
+
+    def count( self, events : List[ Event ] ) :
+        """Bin the sorted events into gates of the base width, keeping only
+           the gates that hold events
+
+            Arguments:
+               events : the events sorted by time
+        """
+
+        times = numpy.array( [ event.time for event in events ], dtype = numpy.float64 )
+        gates = numpy.floor( times / self.basewidth ).astype( numpy.int64 )
+
+        # the events are sorted, so the events of a gate are adjacent
+        starts = numpy.flatnonzero( numpy.diff( gates, prepend = -1 ) )
+        self._gates = gates[ starts ]
+        self._counts = numpy.diff( numpy.append( starts, len( gates ) ) )
+        self._events = events
+
+    def multiple( self, gatewidth : float ) :
+        """Retrieve the number of base gates in a gate
+
+            Arguments:
+               gatewidth : the gate width (in nanoseconds)
+
+            Exceptions:
+               ValueError : the gate width is not an integer multiple of the
+                            base gate width
+        """
+
+        multiple = int( round( gatewidth / self.basewidth ) )
+        if multiple < 1 or abs( multiple * self.basewidth - gatewidth ) > 1e-9 * gatewidth :
+
+            raise ValueError( 'The gate width ' + str( gatewidth ) + ' is not an integer '
+                              + 'multiple of the base gate width ' + str( self.basewidth ) )
+
+        return multiple
+
+    def __call__( self, events : List[ Event ], gatewidth : float ) :
+
+        # the base gates are only counted again for other events
+        if events is not self._events :
+
+            self.count( events )
+
+        multiple = self.multiple( gatewidth )
+
+        # sum the counts of the base gates that fall in the same gate
+        gates = self._gates // multiple
+        starts = numpy.flatnonzero( numpy.diff( gates, prepend = -1 ) )
+        counts = numpy.add.reduceat( self._counts, starts )
+
+        # the gates from the first one up to the last event have no hits
+        frequency = numpy.bincount( counts )
+        frequency[ 0 ] += gates[ -1 ] + 1 - len( counts )
+        return frequency.tolist()
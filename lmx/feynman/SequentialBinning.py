@@ -2,9 +2,11 @@
 from typing import List, Callable
 
 # third party imports
+import numpy
 
 # local imports
 from lmx.Event import Event
+from lmx import kernels
 
 class SequentialBinning :
 
@@ -14,6 +16,12 @@ class SequentialBinning :
 
     def __call__( self, events : List[ Event ], gatewidth : float ) :
 
+        # use the compiled kernel if it is selected
+        if kernels.compiled() :
+
+            return kernels.sequentialBinning( numpy.array( [ event.time for event in events ] ),
+                                              gatewidth ).tolist()
+
         frequency = { 0 : 0 }
         count = 0
         current = 0
@@ -0,0 +1,89 @@
+# standard imports
+from typing import List
+
+# third party imports
+import numpy
+
+# local imports
+
+def frequencyArray( frequencies : List[ list ] ) :
+    """Stack Feynman histograms of different lengths into one array
+
+       Arguments:
+           frequencies : the count frequency of every histogram
+
+       Returns:
+           the frequencies, one row per histogram, padded with zeros up to
+           the largest multiplicity
+    """
+
+    array = numpy.zeros( ( len( frequencies ), max( ( len( row ) for row in frequencies ), default = 0 ) ) )
+    for index, row in enumerate( frequencies ) :
+
+        array[ index, : len( row ) ] = row
+
+    return array
+
+def reducedFactorialMoments( frequencies ) :
+    """Calculate the reduced factorial moments m1 to m4 (equations 2-6) of
+       many Feynman histograms at once
+
+       The reduced factorial moment of order r is the mean of the binomial
+       coefficient C(n, r) over all gates.
+
+       Arguments:
+           frequencies : the count frequency (unnormalized) of every
+                         multiplicity (columns) of every histogram (rows),
+                         a single histogram can be given as a 1D array
+
+       Returns:
+           the reduced factorial moments, one row per order (m1 to m4) and
+           one column per histogram
+    """
+
+    frequencies = numpy.atleast_2d( numpy.asarray( frequencies, dtype = numpy.float64 ) )
+    n = numpy.arange( frequencies.shape[ -1 ], dtype = numpy.float64 )
+
+    # the binomial coefficients C(n, r) for r = 1 to 4
+    binomials = numpy.empty( ( 4, len( n ) ) )
+    binomials[ 0 ] = n
+    for order in range( 1, 4 ) :
+
+        binomials[ order ] = binomials[ order - 1 ] * ( n - order ) / ( order + 1 )
+
+    return ( binomials @ frequencies.T ) / numpy.sum( frequencies, axis = -1 )
+
+def feynmanMoments( frequencies, gatewidths ) :
+    """Calculate the reduced factorial moments, Y, Y1 and Y2 of many Feynman
+       histograms at once
+
+       Arguments:
+           frequencies : the count frequency (unnormalized) of every
+                         multiplicity (columns) of every histogram (rows)
+           gatewidths : the gate width of every histogram (in nanoseconds)
+
+       Returns:
+           a dictionary holding arrays of the reduced factorial moments 'm1'
+           to 'm4', the variance to mean ratio minus one 'Y', 'Y1' and 'Y2'
+           and their uncertainties 'dY1' and 'dY2', with one value per
+           histogram
+    """
+
+    frequencies = numpy.atleast_2d( numpy.asarray( frequencies, dtype = numpy.float64 ) )
+    m1, m2, m3, m4 = reducedFactorialMoments( frequencies )
+    tau = numpy.asarray( gatewidths, dtype = numpy.float64 ) * 1e-9
+    N = numpy.sum( frequencies, axis = -1 )
+
+    with numpy.errstate( divide = 'ignore', invalid = 'ignore' ) :
+
+        dy1 = numpy.sqrt( ( 2. * m2 + m1 * ( 1. - m1 ) ) / ( N - 1 ) ) / tau
+
+        # Equation 29 instead of Equation 25
+        variance = ( 6. * m4 - 6. * m3 * m1 + 6. * m3 - m2 ** 2 + 4. * m2 * m1 ** 2
+                     - 4. * m2 * m1 + m2 - m1 ** 4 + m1 ** 3 )
+        dy2 = numpy.where( variance > 0, numpy.sqrt( numpy.maximum( variance, 0. ) / ( N - 1 ) ) / tau, 0. )
+        y = 2. * m2 / m1 - m1
+
+    return { 'm1' : m1, 'm2' : m2, 'm3' : m3, 'm4' : m4, 'Y' : y,
+             'Y1' : m1 / tau, 'dY1' : dy1,
+             'Y2' : ( m2 - m1 * m1 / 2. ) / tau, 'dY2' : dy2 }
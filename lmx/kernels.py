@@ -0,0 +1,298 @@
+# standard imports
+
+# third party imports
+import numpy
+
+try :
+
+    import numba
+    NUMBA = True
+
+except ImportError :
+
+    NUMBA = False
+
+# local imports
+
+# the backend names accepted by setBackend, 'auto' uses numba when it is installed
+BACKENDS = ( 'auto', 'numba', 'numpy' )
+
+# codes of the Rossi-alpha time difference methods in the compiled kernel
+METHODS = { 'aa' : 0, 'cc' : 1, 'dd' : 2 }
+CHANNEL_BANK = 3
+
+backend = 'numba' if NUMBA else 'numpy'
+
+def setBackend( name : str = 'auto' ) :
+    """Select the backend of the sequential kernels
+
+       The compiled (numba) kernels are only available when numba is
+       installed. Asking for them without numba falls back to the NumPy
+       and Python implementations.
+
+       Arguments:
+           name : 'auto', 'numba' or 'numpy'
+
+       Returns:
+           the backend in use
+
+       Exceptions:
+           ValueError : unknown backend name
+    """
+
+    global backend
+
+    if name not in BACKENDS :
+
+        raise ValueError( 'Unknown kernel backend \'{}\', expected one of {}'.format( name, ', '.join( BACKENDS ) ) )
+
+    if name == 'numba' and not NUMBA :
+
+        print( ' numba is not installed, using the numpy kernel backend.' )
+
+    backend = 'numba' if NUMBA and name != 'numpy' else 'numpy'
+    return backend
+
+def compiled() :
+    """Return whether or not the compiled kernels are in use"""
+
+    return backend == 'numba'
+
+def jit( function ) :
+    """Compile a kernel with numba, or return it unchanged without numba"""
+
+    if NUMBA :
+
+        return numba.njit( cache = True, nogil = True )( function )
+
+    return function
+
+@jit
+def grow( array, size ) :
+    """Return the array extended with zeros to at least the given size"""
+
+    if size <= len( array ) :
+
+        return array
+
+    larger = numpy.zeros( max( size, 2 * len( array ) ), dtype = array.dtype )
+    larger[ : len( array ) ] = array
+    return larger
+
+@jit
+def timeDifsKernel( times, channels, reset_time, method, digital_delay, final ) :
+    """Rossi-alpha time differences, one pair at a time
+
+       A line by line translation of the sequential loop in
+       RossiAlpha/engine.py. The channel bank of every data point is an
+       array stamped with the number of the data point instead of a set.
+
+       Arguments:
+           times : the event times (float64)
+           channels : the channel of each event (integers)
+           reset_time : the maximum time difference
+           method : the method code (see METHODS and CHANNEL_BANK)
+           digital_delay : the digital delay (only used by the dd method)
+           final : whether or not these are the last events of the measurement
+
+       Returns:
+           the time differences and the index of the first data point
+           that was not calculated
+    """
+
+    n = len( times )
+    diffs = numpy.zeros( 1024, dtype = numpy.float64 )
+    size = 0
+    low = 0
+    high = 0
+    if n > 0 :
+
+        low = channels.min()
+        high = channels.max()
+
+    bank = numpy.zeros( high - low + 1, dtype = numpy.int64 )
+    visit = 0
+    i = 0
+    prevent = False
+    while i < n :
+
+        anchor = i
+        start = size
+        closed = False
+        visit += 1
+        for j in range( i + 1, n ) :
+
+            if times[ j ] - times[ i ] > reset_time :
+
+                closed = True
+                break
+
+            if method == 0 or channels[ j ] != channels[ i ] :
+
+                if method <= 1 or bank[ channels[ j ] - low ] != visit :
+
+                    diffs = grow( diffs, size + 1 )
+                    diffs[ size ] = times[ j ] - times[ i ]
+                    size += 1
+
+                elif method == 2 :
+
+                    # skip to the first data point after the digital delay
+                    stamped = times[ i ]
+                    while i < n and times[ i ] < stamped + digital_delay :
+
+                        i += 1
+
+                    prevent = True
+                    if i == n :
+
+                        break
+
+                if method != 0 :
+
+                    bank[ channels[ j ] - low ] = visit
+
+        if not final and ( not closed or i == n ) :
+
+            return diffs[ : start ].copy(), anchor
+
+        if not prevent :
+
+            i += 1
+
+        else :
+
+            prevent = False
+
+    return diffs[ : size ].copy(), n
+
+def timeDifs( times : numpy.ndarray, channels : numpy.ndarray, reset_time : float,
+              method : str = 'aa', digital_delay : float = None, final : bool = True ) :
+    """Calculate Rossi-alpha time differences with the compiled kernel
+
+       Arguments:
+           times : the event times
+           channels : the channel of each event
+           reset_time : the maximum time difference
+           method : 'aa', 'cc', 'dd' or any other name for the channel bank method
+           digital_delay : the digital delay (only used by the dd method)
+           final : whether or not these are the last events of the measurement
+
+       Returns:
+           the time differences and the index of the first data point
+           that was not calculated
+    """
+
+    diffs, resume = timeDifsKernel( numpy.ascontiguousarray( times, dtype = numpy.float64 ),
+                                    numpy.ascontiguousarray( channels, dtype = numpy.int64 ),
+                                    float( reset_time ), METHODS.get( method, CHANNEL_BANK ),
+                                    float( digital_delay or 0 ), final )
+    return diffs, int( resume )
+
+@jit
+def sequentialBinningKernel( times, gatewidth ) :
+    """Number of gates (from the first gate up to the gate of the last
+       event) holding each number of events, see lmx/feynman/SequentialBinning.py
+
+       Arguments:
+           times : the sorted event times (float64)
+           gatewidth : the gate width
+
+       Returns:
+           the frequency of every number of events per gate
+    """
+
+    frequency = numpy.zeros( 16, dtype = numpy.int64 )
+    top = 0
+    count = 0
+    current = 0
+    for time in times :
+
+        gate = int( time / gatewidth )
+        if gate == current :
+
+            count += 1
+
+        else :
+
+            # the gates before the current event have no hits
+            frequency[ 0 ] += gate - current - 1
+            frequency = grow( frequency, count + 1 )
+            frequency[ count ] += 1
+            top = max( top, count )
+            current = gate
+            count = 1
+
+    # account for the last gate
+    frequency = grow( frequency, count + 1 )
+    frequency[ count ] += 1
+    top = max( top, count )
+
+    return frequency[ : top + 1 ].copy()
+
+def sequentialBinning( times : numpy.ndarray, gatewidth : float ) :
+    """Bin sorted event times into gates with the compiled kernel
+
+       Arguments:
+           times : the sorted event times
+           gatewidth : the gate width
+
+       Returns:
+           the frequency of every number of events per gate (as an array)
+    """
+
+    return sequentialBinningKernel( numpy.ascontiguousarray( times, dtype = numpy.float64 ), float( gatewidth ) )
+
+@jit
+def randomCountsKernel( times, tau ) :
+    """Number of gates holding each number of events, counted the way
+       FeynmanY.randomCounts does (empty gates are not counted and the last
+       gate is only counted if it holds more than one event)
+
+       Arguments:
+           times : the sorted event times (float64, at least one)
+           tau : the gate width
+
+       Returns:
+           the frequency of every number of events per gate
+    """
+
+    frequencies = numpy.zeros( 16, dtype = numpy.int64 )
+    top = -1
+    count = 1
+    prev = int( times[ 0 ] / tau )
+    for k in range( 1, len( times ) ) :
+
+        cur = int( times[ k ] / tau )
+        if cur == prev :
+
+            count += 1
+
+        else :
+
+            frequencies = grow( frequencies, count + 1 )
+            frequencies[ count ] += 1
+            top = max( top, count )
+            count = 1
+            prev = cur
+
+    if count != 1 :
+
+        frequencies = grow( frequencies, count + 1 )
+        frequencies[ count ] += 1
+        top = max( top, count )
+
+    return frequencies[ : top + 1 ].copy()
+
+def randomCounts( times : numpy.ndarray, tau : float ) :
+    """Count the events per random trigger gate with the compiled kernel
+
+       Arguments:
+           times : the sorted event times (at least one)
+           tau : the gate width
+
+       Returns:
+           the frequency of every number of events per gate (as an array)
+    """
+
+    return randomCountsKernel( numpy.ascontiguousarray( times, dtype = numpy.float64 ), float( tau ) )
@@ -118,3 +118,173 @@ class RossiBinningTypeIII:
         for hist_bin in range(bins):
             hist[hist_bin] += td_hold.count(hist_bin)
         return hist
+
+
+# ------------------------------------------------------------------------
+# array implementations: the same histograms computed with NumPy on an
+# array of event times instead of looping over a list of Events
+
+
+BLOCK_EVENTS = 1 << 20  # number of window starts handled at once
+CHUNK_PAIRS = 1 << 22  # number of time differences expanded at once
+
+
+def eventTimes(events) -> np.ndarray:
+    """ Get the event times as an array
+
+        Arguments:
+            events: list of Event types or an array of event times
+
+        Returns:
+            times: the event times
+    """
+    if isinstance(events, np.ndarray):
+        return events
+    return np.array([event.time for event in events])
+
+
+def checkArguments(times: np.ndarray, reset_time: float, bins: int):
+    """ Check the arguments given to the array binning classes """
+    if len(times) == 0:
+        raise ValueError("Must provide a list of Events")
+    if reset_time <= 0:
+        raise ValueError("reset time must be greater than 0")
+    if bins <= 0:
+        raise ValueError("Bin quantity must be greater than 0")
+
+
+def windowHistogram(times: np.ndarray, starts: np.ndarray, ends: np.ndarray, bin_width: float,
+                    hist: np.ndarray, chunk_pairs: int = CHUNK_PAIRS):
+    """ Add the time differences between every window start and the events
+        that follow it, up to (but excluding) the window end, to a histogram
+
+        Arguments:
+            times: sorted event times
+            starts: index of the event opening each window
+            ends: index one past the last event of each window (> starts)
+            bin_width: width of the histogram bins
+            hist: the frequencies to add to (modified in place)
+            chunk_pairs: maximum number of time differences held at once
+    """
+    counts = ends - starts - 1
+    total = np.cumsum(counts)
+    first = 0
+    while first < len(starts):
+        # the windows whose time differences fit in the chunk (at least one window)
+        last = max(int(np.searchsorted(total, total[first] - counts[first] + chunk_pairs, side='right')), first + 1)
+        sizes = counts[first:last]
+        earlier = np.repeat(starts[first:last], sizes)
+        later = earlier + 1 + np.arange(len(earlier)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        digits = ((times[later] - times[earlier]) / bin_width).astype(np.int64)
+        if len(digits) and digits.max() >= len(hist):
+            raise IndexError("time difference outside of the histogram")
+        hist += np.bincount(digits, minlength=len(hist))
+        first = last
+
+
+class RossiBinningTypeIArray:
+    def __init__(self):
+        pass
+
+    def __call__(self, events, reset_time: float, bins: int):
+        """ Type I Binning on arrays: gives the same histogram as RossiBinningTypeI.
+            The window ends are found with one searchsorted call per block of
+            events and the time differences are counted with bincount.
+
+            Arguments:
+                events: list of Event types or array of event times (sorted)
+                reset_time: window (in nanoseconds)
+                bins: number of bins to split up the window
+
+            Returns:
+                hist: unprocessed frequencies of time differences
+        """
+        times = eventTimes(events)
+        checkArguments(times, reset_time, bins)
+
+        bin_width = reset_time / bins
+        limit = bins * 3
+        hist = np.zeros(bins, dtype=np.int64)
+        # only windows whose search limit lies inside the list are used
+        for first in range(0, max(len(times) - limit, 0), BLOCK_EVENTS):
+            starts = np.arange(first, min(first + BLOCK_EVENTS, len(times) - limit))
+            ends = np.searchsorted(times, times[starts] + reset_time, side='left')
+            ends = np.clip(ends, starts + 1, starts + limit)
+            windowHistogram(times, starts, ends, bin_width, hist)
+        return hist.tolist()
+
+
+class RossiBinningTypeIIArray:
+    def __init__(self):
+        pass
+
+    def __call__(self, events, reset_time: float, bins: int):
+        """ Type II Binning on arrays: the next window opens on the first event
+            after the end of the previous one. Like Type I, a window is only
+            used if its search limit lies inside the list. The window ends are
+            found with searchsorted and only the jump from window to window
+            is followed in Python.
+
+            Arguments:
+                events: list of Event types or array of event times (sorted)
+                reset_time: window (in nanoseconds)
+                bins: number of bins to split up the window
+
+            Returns:
+                hist: unprocessed frequencies of time differences
+        """
+        times = eventTimes(events)
+        checkArguments(times, reset_time, bins)
+
+        bin_width = reset_time / bins
+        limit = bins * 3
+        hist = np.zeros(bins, dtype=np.int64)
+        stop = len(times) - limit
+        now = 0
+        while now < stop:
+            # window ends for a block of possible window starts
+            candidates = np.arange(now, min(now + BLOCK_EVENTS, stop))
+            ends = np.searchsorted(times, times[candidates] + reset_time, side='left')
+            ends = np.clip(ends, candidates + 1, candidates + limit)
+            jumps = (ends + 1).tolist()
+            base = now
+            starts = []
+            while now < base + len(jumps):
+                starts.append(now)
+                now = jumps[now - base]
+            starts = np.array(starts, dtype=np.int64)
+            windowHistogram(times, starts, ends[starts - base], bin_width, hist)
+        return hist.tolist()
+
+
+class RossiBinningTypeIIIArray:
+    def __init__(self):
+        pass
+
+    def __call__(self, events, reset_time: float, bins: int):
+        """ Type III Binning on arrays: gives the same histogram as RossiBinningTypeIII,
+            pairing the events with strided slices and counting with bincount
+
+            Arguments:
+                events: list of Event types or array of event times (sorted)
+                reset_time: window (in nanoseconds)
+                bins: number of bins to split up the window
+
+            Returns:
+                hist: unprocessed frequencies of time differences
+        """
+        times = eventTimes(events)
+        checkArguments(times, reset_time, bins)
+
+        bin_width = reset_time / bins
+        pairs = len(times) // 2
+        digits = ((times[1:2 * pairs:2] - times[0:2 * pairs:2]) / bin_width).astype(np.int64)
+        # differences outside of the window are not counted
+        digits = digits[(digits >= 0) & (digits < bins)]
+        return np.bincount(digits, minlength=bins).tolist()
+
+
+# binning classes selectable by name in the RossiHistogramCalculator
+BINNINGS = {'I': RossiBinningTypeIArray,
+            'II': RossiBinningTypeIIArray,
+            'III': RossiBinningTypeIIIArray}
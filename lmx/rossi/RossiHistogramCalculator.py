@@ -1,9 +1,12 @@
 # standard imports
-from typing import List, Callable
+from typing import List, Callable, Union
 import sys
 
 sys.path.append(r"C:\Users\352798\python")
 
+# third party imports
+import numpy as np
+
 # local imports
 # noinspection PyUnresolvedReferences
 from lmx.Event import Event
@@ -13,29 +16,40 @@ from lmx.rossi.RossiHistogram import *
 
 class RossiHistogramCalculator:
 
-    def __init__(self, event_list: List[Event], binning: Callable = RossiBinningTypeI()):
+    def __init__(self, event_list: Union[List[Event], np.ndarray], binning: Union[str, Callable] = 'I'):
         """ Initialize Rossi Histogram Calculator
 
                 Arguments:
-                    event_list: list of Event types
+                    event_list: list of Event types or array of event times
                     binning   : automatically does Type I binning
-                                but II and III binning also supported
+                                but II and III binning also supported,
+                                either by name ('I', 'II' or 'III', which
+                                use the array implementations) or as a
+                                binning object such as RossiBinningTypeI()
 
-                Exceptions: none
+                Exceptions:
+                    ValueError: unknown binning name
 
                 Returns: RossiHistogramCalculator Class type
         """
+        if isinstance(binning, str):
+            if binning not in BINNINGS:
+                raise ValueError('Unknown binning type ' + binning + ', expected one of ' + ', '.join(BINNINGS))
+            binning = BINNINGS[binning]()
         self._binning = binning
         self.events = event_list
-        self.events.sort(key=lambda event: event.time)
+        if isinstance(self.events, np.ndarray):
+            self._events = np.sort(self.events, kind='stable')
+        else:
+            self.events.sort(key=lambda event: event.time)
 
     @property
     def events(self):
         return self._events
 
     @events.setter
-    def events(self, events: List[Event]):
-        if not events:
+    def events(self, events: Union[List[Event], np.ndarray]):
+        if events is None or len(events) == 0:
             raise ValueError('The events must be defined and cannot be empty.')
 
         self._events = events
@@ -10,6 +10,9 @@ import sys
 from scipy.optimize import curve_fit
 from scipy.signal import savgol_filter
 
+# local imports
+from lmx.feynman.moments import frequencyArray, reducedFactorialMoments
+
 
 def omega2_single(B,gatewidths):
     
@@ -112,49 +115,10 @@ def reduced_factorial_moments(feynman_data):
     
     """ Calculates reduced factorial moments using Equations 3-6. """
     
-    first_reduced_factorial_moment_list = []
-    second_reduced_factorial_moment_list = []
-    third_reduced_factorial_moment_list = []
-    fourth_reduced_factorial_moment_list = []
-    n_list = []
+    m1, m2, m3, m4 = reducedFactorialMoments(frequencyArray(feynman_data))
+    n_list = [list(range(0,len(current_histogram))) for current_histogram in feynman_data]
     
-    for current_histogram in feynman_data:
-        
-        n = [i for i in range(0,len(current_histogram))]
-        
-        sum_Cn = sum(current_histogram)
-        
-        m1_products = []
-        for i in range(0, len(current_histogram)):
-            m1_products.append(n[i] * current_histogram[i])
-        # Equation 3
-        m1 = sum(m1_products)/sum_Cn
-        
-        m2_products = []
-        for i in range(1, len(current_histogram)):
-            m2_products.append(n[i] * n[i-1] * current_histogram[i])
-        # Equation 4
-        m2 = sum(m2_products)/(2*sum_Cn)
-        
-        m3_products = []
-        for i in range(2, len(current_histogram)):
-            m3_products.append(n[i] * n[i-1] * n[i-2] * current_histogram[i])
-        # Equation 5
-        m3 = sum(m3_products)/(6*sum_Cn)
-        
-        m4_products = []
-        for i in range(3, len(current_histogram)):
-            m4_products.append(n[i] * n[i-1] * n[i-2] * n[i-3] * current_histogram[i])
-        # Equation 6
-        m4 = sum(m4_products)/(24*sum_Cn)
-        
-        first_reduced_factorial_moment_list.append(m1)
-        second_reduced_factorial_moment_list.append(m2)
-        third_reduced_factorial_moment_list.append(m3)
-        fourth_reduced_factorial_moment_list.append(m4)
-        n_list.append(n)
-        
-    return first_reduced_factorial_moment_list, second_reduced_factorial_moment_list, third_reduced_factorial_moment_list, fourth_reduced_factorial_moment_list, n_list
+    return m1.tolist(), m2.tolist(), m3.tolist(), m4.tolist(), n_list
 
 
 def factorial_moments(feynman_data):
@@ -0,0 +1,81 @@
+# standard imports
+import unittest
+
+# third party imports
+import numpy
+
+# local imports
+from lmx.decoder import decodeBody, decodeBlock
+from lmx.factory import readLMXFile, readLMXFile_old
+from lmx.LMXStream import LMXStream
+
+class TestDecoder( unittest.TestCase ) :
+    """unit test for the vectorized LMX decoder."""
+
+    def test_flags( self ) :
+
+        # event, rollover, multi-detector event, zero flag, stop, event, end, trailing event
+        numbers = numpy.array( [ 4, 0, 1, 5, 0, 0, 0, 2, 2, 0, 4294967295, 8 ], dtype = numpy.uint32 )
+        ticks = numpy.array( [ 10, 100, 0, 3, 7, 7, 9, 9, 4, 6, 6, 1 ], dtype = numpy.uint32 )
+
+        times, detectors, finaltime = decodeBody( numbers, ticks, 2.0, quiet = True )
+
+        self.assertEqual( detectors.tolist(), [ 3, 1, 3, 2 ] )
+        self.assertEqual( times.tolist(), [ 20.0, 206.0, 206.0, 208.0 ] )
+        self.assertEqual( finaltime, 212.0 )
+
+    def test_no_end_flag( self ) :
+
+        numbers = numpy.array( [ 1, 0 ], dtype = numpy.uint32 )
+        ticks = numpy.array( [ 5, 6 ], dtype = numpy.uint32 )
+
+        times, detectors, finaltime = decodeBody( numbers, ticks, 1.0, quiet = True )
+
+        self.assertEqual( detectors.tolist(), [ 1 ] )
+        self.assertEqual( times.tolist(), [ 5.0 ] )
+        self.assertEqual( finaltime, None )
+
+    def test_matches_sequential_reader( self ) :
+
+        filename = 'lmx/test/resources/2017_01_26_184649_stripped.lmx'
+
+        self.assertEqual( readLMXFile( filename ).events, readLMXFile_old( filename ).events )
+
+    def test_blocks( self ) :
+
+        # the rollover marker and its flag land in different blocks
+        numbers = numpy.array( [ 4, 0, 1, 5, 0, 0, 0, 2, 2, 0, 4294967295, 8 ], dtype = numpy.uint32 )
+        ticks = numpy.array( [ 10, 100, 0, 3, 7, 7, 9, 9, 4, 6, 6, 1 ], dtype = numpy.uint32 )
+        whole = decodeBody( numbers, ticks, 2.0, quiet = True )
+
+        for size in range( 1, len( numbers ) + 1 ) :
+
+            state = ( 0, None )
+            times, detectors = [], []
+            for start in range( 0, len( numbers ), size ) :
+
+                blockTimes, blockDetectors, finaltime, state = decodeBlock( numbers[ start : start + size ],
+                                                                            ticks[ start : start + size ],
+                                                                            2.0, state, quiet = True )
+                times.extend( blockTimes.tolist() )
+                detectors.extend( blockDetectors.tolist() )
+                if finaltime is not None :
+
+                    break
+
+            self.assertEqual( times, whole[ 0 ].tolist() )
+            self.assertEqual( detectors, whole[ 1 ].tolist() )
+            self.assertEqual( finaltime, whole[ 2 ] )
+
+    def test_stream( self ) :
+
+        filename = 'lmx/test/resources/2017_01_26_184649_stripped.lmx'
+        stream = LMXStream( filename, blockSize = 4 )
+        times = numpy.concatenate( [ block[ 0 ] for block in stream ] )
+
+        self.assertEqual( times.tolist(), [ event.time for event in readLMXFile_old( filename ).events ] )
+        self.assertEqual( stream.finaltime, 32888332800. )
+
+if __name__ == '__main__' :
+
+    unittest.main()
@@ -0,0 +1,63 @@
+# standard imports
+import unittest
+
+# third party imports
+import numpy
+
+# local imports
+import Event as evt
+from FeynmanY import feynman as fey
+
+class TestFeynmanGaps( unittest.TestCase ) :
+    """unit test for the Feynman Y live intervals of measurements with and without gaps."""
+
+    def test_offset_times( self ) :
+
+        # a measurement without gaps that does not start at t = 0
+        rng = numpy.random.default_rng( 0 )
+        times = numpy.sort( rng.uniform( 5e8, 1.5e9, 20000 ) )
+        tau = 1e6
+        intervals = fey.liveIntervals( times )
+        self.assertEqual( len( intervals[ 0 ] ), 1 )
+
+        # every gate from the first to the last event, as without intervals
+        expected = fey.FeynmanY().randomCountsAll( evt.EventArray( times, None ), [ tau ], times[ -1 ] - times[ 0 ] )[ 0 ]
+        self.assertLess( abs( expected[ 0 ] ), 0.01 )
+        result = fey.FeynmanY().randomCountsAll( evt.EventArray( times, None ), [ tau ], -1, 1, True, False, intervals )[ 0 ]
+        self.assertEqual( result, expected )
+        self.assertEqual( fey.FeynmanY().randomCounts( evt.EventArray( times, None ), tau, -1, intervals ), expected )
+
+        # streamed in blocks
+        counter = fey.GateCounter( [ tau ] )
+        for block in numpy.array_split( times, 7 ) :
+
+            counter.update( block )
+
+        self.assertEqual( counter.probabilities( live = True )[ 0 ], expected )
+
+    def test_gaps( self ) :
+
+        # two offset measurement ranges with a long gap between them
+        rng = numpy.random.default_rng( 1 )
+        times = numpy.sort( numpy.concatenate( ( rng.uniform( 5e8, 1.5e9, 20000 ),
+                                                 rng.uniform( 5e13, 5e13 + 1e9, 20000 ) ) ) )
+        tau = 1e6
+        intervals = fey.liveIntervals( times )
+        self.assertEqual( len( intervals[ 0 ] ), 2 )
+        # only the gates between the edge gates of each range are live
+        live = sum( int( end / tau ) - int( start / tau ) - 1 for start, end in zip( *intervals ) )
+        self.assertEqual( fey.liveGates( intervals, tau ), live )
+        self.assertLess( live, 2000 )
+
+        result = fey.FeynmanY().randomCountsAll( evt.EventArray( times, None ), [ tau ], -1, 1, True, False, intervals )[ 0 ]
+        self.assertLess( abs( result[ 0 ] ), 0.01 )
+        counter = fey.GateCounter( [ tau ] )
+        for block in numpy.array_split( times, 7 ) :
+
+            counter.update( block )
+
+        numpy.testing.assert_allclose( counter.probabilities( live = True )[ 0 ], result )
+
+if __name__ == '__main__' :
+
+    unittest.main()
@@ -0,0 +1,60 @@
+# standard imports
+import unittest
+
+# third party imports
+import numpy
+
+# local imports
+from lmx import kernels
+from lmx.Event import Event
+from lmx.feynman.SequentialBinning import SequentialBinning
+
+class TestKernels( unittest.TestCase ) :
+    """unit test for the optionally compiled sequential kernels."""
+
+    def tearDown( self ) :
+
+        kernels.setBackend( 'auto' )
+
+    def test_backend( self ) :
+
+        self.assertEqual( kernels.setBackend( 'numpy' ), 'numpy' )
+        self.assertFalse( kernels.compiled() )
+        self.assertEqual( kernels.setBackend( 'auto' ), 'numba' if kernels.NUMBA else 'numpy' )
+        self.assertRaises( ValueError, kernels.setBackend, 'gpu' )
+
+    def test_sequential_binning( self ) :
+
+        rng = numpy.random.default_rng( 0 )
+        for trial in range( 20 ) :
+
+            times = numpy.cumsum( rng.integers( 0, 30, rng.integers( 0, 200 ) ) ).astype( numpy.float64 )
+            events = [ Event( 1, time ) for time in times.tolist() ]
+            for width in [ 1., 7., 33. ] :
+
+                kernels.setBackend( 'numpy' )
+                expected = SequentialBinning()( events, width )
+                self.assertEqual( kernels.sequentialBinning( times, width ).tolist(), expected )
+                kernels.setBackend( 'auto' )
+                self.assertEqual( SequentialBinning()( events, width ), expected )
+
+    def test_time_differences( self ) :
+
+        # two channels alternating, the second event of each pair 2 later
+        times = numpy.array( [ 0., 2., 10., 12., 20., 22. ] )
+        channels = numpy.array( [ 1, 2, 1, 2, 1, 2 ] )
+
+        diffs, resume = kernels.timeDifs( times, channels, 10., 'aa' )
+        self.assertEqual( diffs.tolist(), [ 2., 10., 8., 10., 2., 10., 8., 10., 2. ] )
+        self.assertEqual( resume, 6 )
+
+        diffs, resume = kernels.timeDifs( times, channels, 10., 'cc' )
+        self.assertEqual( diffs.tolist(), [ 2., 8., 2., 8., 2. ] )
+
+        # the last windows are still open when more events are coming
+        diffs, resume = kernels.timeDifs( times, channels, 10., 'aa', final = False )
+        self.assertEqual( resume, 3 )
+
+if __name__ == '__main__' :
+
+    unittest.main()
@@ -0,0 +1,61 @@
+# standard imports
+import unittest
+import math
+
+# third party imports
+import numpy
+
+# local imports
+from lmx.feynman import moments
+from lmx.feynman.FeynmanHistogram import FeynmanHistogram
+
+class TestMoments( unittest.TestCase ) :
+    """unit test for the vectorized Feynman moments."""
+
+    def test_frequency_array( self ) :
+
+        array = moments.frequencyArray( [ [ 1, 2 ], [ 3, 4, 5 ] ] )
+        self.assertEqual( array.tolist(), [ [ 1., 2., 0. ], [ 3., 4., 5. ] ] )
+
+    def test_reduced_factorial_moments( self ) :
+
+        rng = numpy.random.default_rng( 0 )
+        frequencies = rng.integers( 0, 100, ( 5, 8 ) )
+        result = moments.reducedFactorialMoments( frequencies )
+        self.assertEqual( result.shape, ( 4, 5 ) )
+        for row, frequency in enumerate( frequencies ) :
+
+            for order in range( 1, 5 ) :
+
+                expected = sum( math.comb( n, order ) * count for n, count in enumerate( frequency ) ) / sum( frequency )
+                self.assertAlmostEqual( result[ order - 1, row ], expected, places = 10 )
+
+    def test_feynman_moments( self ) :
+
+        frequencies = [ [ 50, 30, 12, 5, 2, 1 ], [ 20, 30, 25, 15 ] ]
+        result = moments.feynmanMoments( moments.frequencyArray( frequencies ), [ 100., 200. ] )
+        for index, frequency in enumerate( frequencies ) :
+
+            histogram = FeynmanHistogram( [ 100., 200. ][ index ], frequency )
+
+            # the raw moments of FeynmanHistogram give the same reduced moments
+            m1 = histogram.factorial_moment( 1 )
+            m2 = ( histogram.factorial_moment( 2 ) - m1 ) / 2.
+            self.assertAlmostEqual( result[ 'm1' ][ index ], m1 )
+            self.assertAlmostEqual( result[ 'm2' ][ index ], m2 )
+
+            tau = histogram.gatewidth * 1e-9
+            N = histogram.number_gates
+            self.assertAlmostEqual( result[ 'Y1' ][ index ] * tau, m1 )
+            self.assertAlmostEqual( result[ 'dY1' ][ index ] * tau,
+                                    math.sqrt( ( 2. * m2 + m1 * ( 1. - m1 ) ) / ( N - 1 ) ) )
+            self.assertAlmostEqual( result[ 'Y2' ][ index ] * tau, m2 - m1 * m1 / 2. )
+            self.assertAlmostEqual( result[ 'Y' ][ index ], histogram.variance_to_mean )
+            self.assertEqual( histogram.Y1, ( result[ 'Y1' ][ index ], result[ 'dY1' ][ index ] ) )
+            self.assertEqual( histogram.Y2, ( result[ 'Y2' ][ index ], result[ 'dY2' ][ index ] ) )
+
+        self.assertRaises( NotImplementedError, histogram.reduced_factorial_moment, 5 )
+
+if __name__ == '__main__' :
+
+    unittest.main()
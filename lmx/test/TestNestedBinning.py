@@ -0,0 +1,44 @@
+# standard imports
+import unittest
+
+# third party imports
+import numpy
+
+# local imports
+from lmx.Event import Event
+from lmx.feynman.NestedBinning import NestedBinning
+from lmx.feynman.SequentialBinning import SequentialBinning
+from lmx.feynman.FeynmanHistogramCalculator import FeynmanHistogramCalculator
+
+class TestNestedBinning( unittest.TestCase ) :
+    """unit test for the NestedBinning class."""
+
+    def test_binning( self ) :
+
+        rng = numpy.random.default_rng( 1 )
+        for trial in range( 20 ) :
+
+            times = numpy.cumsum( rng.integers( 0, 30, rng.integers( 1, 200 ) ) ).astype( numpy.float64 )
+            events = [ Event( 1, time ) for time in times.tolist() ]
+            binning = NestedBinning( 2. )
+            for multiple in [ 1, 2, 3, 7, 50, 1000 ] :
+
+                self.assertEqual( binning( events, 2. * multiple ),
+                                  SequentialBinning()( events, 2. * multiple ) )
+
+        self.assertRaises( ValueError, binning, events, 3. )
+        self.assertRaises( ValueError, NestedBinning, 0. )
+
+    def test_calculator( self ) :
+
+        events = [ Event( 1, time ) for time in [ 3., 4., 15., 16., 17., 40. ] ]
+        calculator = FeynmanHistogramCalculator( events )
+        histograms = calculator.calculateNested( [ 5., 10., 20. ] )
+        self.assertEqual( [ histogram.gatewidth for histogram in histograms ], [ 5., 10., 20. ] )
+        self.assertEqual( [ histogram.frequency for histogram in histograms ],
+                          [ calculator.calculate( width ).frequency for width in [ 5., 10., 20. ] ] )
+        self.assertEqual( histograms[ 0 ].frequency, [ 6, 1, 1, 1 ] )
+
+if __name__ == '__main__' :
+
+    unittest.main()
@@ -0,0 +1,83 @@
+# standard imports
+import bisect
+import unittest
+
+# third party imports
+import numpy
+
+# local imports
+from lmx.Event import Event
+from lmx.rossi.RossiBinning import RossiBinningTypeI, RossiBinningTypeIII, \
+                                   RossiBinningTypeIArray, RossiBinningTypeIIArray, RossiBinningTypeIIIArray
+from lmx.rossi.RossiHistogramCalculator import RossiHistogramCalculator
+
+class TestRossiBinning( unittest.TestCase ) :
+    """unit test for the array implementations of the Rossi-alpha binning."""
+
+    def events( self, number, seed ) :
+
+        rng = numpy.random.default_rng( seed )
+        times = numpy.sort( rng.integers( 0, number * 20, number ) * 0.5 )
+        return times, [ Event( 1, time ) for time in times.tolist() ]
+
+    def test_type_one( self ) :
+
+        for seed in range( 5 ) :
+
+            times, events = self.events( 2000, seed )
+            for reset, bins in [ ( 100., 10 ), ( 37.5, 7 ), ( 1000., 50 ), ( 5., 1 ) ] :
+
+                expected = RossiBinningTypeI()( events, reset, bins )
+                self.assertEqual( RossiBinningTypeIArray()( times, reset, bins ), expected )
+                self.assertEqual( RossiBinningTypeIArray()( events, reset, bins ), expected )
+
+    def test_type_two( self ) :
+
+        def reference( times, reset, bins ) :
+
+            # non overlapping windows, each starting after the end of the previous one
+            width = reset / bins
+            limit = bins * 3
+            hist = [ 0 ] * bins
+            now = 0
+            while now + limit < len( times ) :
+
+                pos = bisect.bisect_left( times, times[ now ] + reset, lo = now + 1, hi = now + limit )
+                for time in times[ now + 1 : pos ] :
+
+                    hist[ int( ( time - times[ now ] ) / width ) ] += 1
+                now = pos + 1
+            return hist
+
+        for seed in range( 5 ) :
+
+            times, events = self.events( 2000, seed )
+            for reset, bins in [ ( 100., 10 ), ( 37.5, 7 ), ( 1000., 50 ), ( 5., 1 ) ] :
+
+                self.assertEqual( RossiBinningTypeIIArray()( times, reset, bins ),
+                                  reference( times.tolist(), reset, bins ) )
+
+    def test_type_three( self ) :
+
+        for seed in range( 5 ) :
+
+            times, events = self.events( 2001, seed )
+            for reset, bins in [ ( 100., 10 ), ( 37.5, 7 ), ( 5., 1 ) ] :
+
+                self.assertEqual( RossiBinningTypeIIIArray()( times, reset, bins ),
+                                  RossiBinningTypeIII()( events, reset, bins ) )
+
+    def test_calculator( self ) :
+
+        times, events = self.events( 500, 0 )
+        shuffled = numpy.random.default_rng( 1 ).permutation( times )
+        expected = RossiHistogramCalculator( events, RossiBinningTypeI() ).calculate( 50., 10 ).frequency
+
+        self.assertEqual( RossiHistogramCalculator( list( events ) ).calculate( 50., 10 ).frequency, expected )
+        self.assertEqual( RossiHistogramCalculator( shuffled, 'I' ).calculate( 50., 10 ).frequency, expected )
+        self.assertRaises( ValueError, RossiHistogramCalculator, times, 'IV' )
+        self.assertRaises( ValueError, RossiHistogramCalculator, numpy.array( [] ) )
+
+if __name__ == '__main__' :
+
+    unittest.main()
@@ -0,0 +1,42 @@
+# standard imports
+import unittest
+
+# third party imports
+import numpy
+
+# local imports
+from RossiAlpha import fitting
+
+class TestRossiJacobians( unittest.TestCase ) :
+    """unit test for the closed-form Jacobians of the Rossi-alpha fit models."""
+
+    def finiteDifferences( self, function, x, parameters ) :
+
+        # central differences with respect to each parameter
+        columns = []
+        for index in range( len( parameters ) ) :
+
+            step = 1e-6 * max( abs( parameters[ index ] ), 1. )
+            upper = list( parameters )
+            lower = list( parameters )
+            upper[ index ] += step
+            lower[ index ] -= step
+            columns.append( ( function( x, *upper ) - function( x, *lower ) ) / ( 2. * step ) )
+
+        return numpy.stack( columns, axis = -1 )
+
+    def test_jacobians( self ) :
+
+        x = numpy.linspace( 0., 500., 101 )
+        for a, b, c in [ ( 200., -0.02, 15. ), ( 3., -0.001, 0. ), ( 1e4, -0.1, 250. ) ] :
+
+            numpy.testing.assert_allclose( fitting.exp_decay_3_param_jacobian( x, a, b, c ),
+                                           self.finiteDifferences( fitting.exp_decay_3_param, x, [ a, b, c ] ),
+                                           rtol = 1e-6, atol = 1e-9 * a )
+            numpy.testing.assert_allclose( fitting.exp_decay_2_param_jacobian( x, a, b ),
+                                           self.finiteDifferences( fitting.exp_decay_2_param, x, [ a, b ] ),
+                                           rtol = 1e-6, atol = 1e-9 * a )
+
+if __name__ == '__main__' :
+
+    unittest.main()
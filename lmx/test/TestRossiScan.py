@@ -0,0 +1,35 @@
+# standard imports
+import unittest
+
+# third party imports
+import numpy
+
+# local imports
+from RossiAlpha import batchFit
+from RossiAlpha import poissonFit
+
+class TestRossiScan( unittest.TestCase ) :
+    """unit test for the Rossi-alpha fit window scan."""
+
+    def test_workers( self ) :
+
+        rng = numpy.random.default_rng( 0 )
+        centers = numpy.arange( 5., 500., 10. )
+        counts = rng.poisson( 200. * numpy.exp( -0.02 * centers ) + 20. ).astype( float )
+        fit_mins = centers[ 2 : 14 ]
+        fit_maxs = centers[ 20 : ]
+
+        # splitting the rows across workers does not change any fit
+        for fitter in [ None, poissonFit.fitHistograms ] :
+
+            expected = batchFit.scanWindows( counts, centers, fit_mins, fit_maxs, None, 1, fitter )
+            for workers in [ 2, 5 ] :
+
+                result = batchFit.scanWindows( counts, centers, fit_mins, fit_maxs, None, workers, fitter )
+                for key in expected :
+
+                    numpy.testing.assert_array_equal( result[ key ], expected[ key ] )
+
+if __name__ == '__main__' :
+
+    unittest.main()
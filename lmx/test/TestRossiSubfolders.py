@@ -0,0 +1,71 @@
+# standard imports
+import copy
+import json
+import os
+import unittest
+
+# third party imports
+import numpy
+import matplotlib
+matplotlib.use( 'Agg' )
+
+# local imports
+from RossiAlpha import fitting
+from RossiAlpha import plots
+
+class TestRossiSubfolders( unittest.TestCase ) :
+    """unit test for repeated Rossi-alpha subfolder histogram and fit passes."""
+
+    def settings( self ) :
+
+        path = os.path.join( os.path.dirname( __file__ ), os.pardir, os.pardir, 'settings', 'default.json' )
+        with open( path ) as file :
+
+            settings = json.load( file )
+
+        settings[ 'Input/Output Settings' ][ 'Input file/folder' ] = 'data/folder'
+        settings[ 'Input/Output Settings' ][ 'Save figures' ] = False
+        settings[ 'Input/Output Settings' ][ 'Save outputs' ] = False
+        settings[ 'General Settings' ][ 'Show plots' ] = False
+        settings[ 'General Settings' ][ 'Verbose iterations' ] = True
+        settings[ 'RossiAlpha Settings' ][ 'Time difference method' ] = [ 'aa', 'cc' ]
+        settings[ 'RossiAlpha Settings' ][ 'Bin width' ] = 10
+        settings[ 'RossiAlpha Settings' ][ 'Reset time' ] = 500
+        settings[ 'RossiAlpha Settings' ][ 'Fit minimum' ] = 30
+        settings[ 'RossiAlpha Settings' ][ 'Fit maximum' ] = 500
+        return settings
+
+    def binned( self, numFolders, seed ) :
+
+        # the subfolder histograms, as folderAnalyzer keeps them when binning
+        rng = numpy.random.default_rng( seed )
+        centers = numpy.arange( 5., 500., 10. )
+        counts = [ [ rng.poisson( 200. * numpy.exp( -0.02 * centers ) + 20. ) for _ in range( numFolders ) ]
+                   for _ in range( 2 ) ]
+        totals = [ plots.RossiHistogramAccumulator() for _ in range( 2 ) ]
+        for total, methodCounts in zip( totals, counts ) :
+
+            for folderCounts in methodCounts :
+
+                total.add( folderCounts )
+
+        return { 'Time differences' : [], 'Time difference method' : [ 'aa', 'cc' ],
+                 'Histogram counts' : counts, 'Histogram totals' : totals }
+
+    def test_two_passes( self ) :
+
+        settings = self.settings()
+        hist = { 'Histogram' : [], 'Uncertainty' : [], 'Bin width' : None, 'Subplots' : [], 'Folder counts' : [] }
+        fit = { 'Best fit' : [], 'Fit minimum' : [], 'Fit maximum' : [], 'Window scan' : [], 'Resampling' : [] }
+
+        # a plot pass then a fit pass, as in one session with verbose iterations on
+        for numFolders, seed in [ ( 3, 0 ), ( 4, 1 ) ] :
+
+            plots.folderHistogram( self.binned( numFolders, seed ), hist, numFolders, copy.deepcopy( settings ), '' )
+            self.assertEqual( len( hist[ 'Subplots' ] ), numFolders * 2 )
+            fitting.folderFit( fit, hist, copy.deepcopy( settings ), '', numFolders )
+            self.assertEqual( len( fit[ 'Best fit' ] ), 2 )
+
+if __name__ == '__main__' :
+
+    unittest.main()
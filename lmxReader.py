@@ -1,104 +1,21 @@
-import sys
 import re
-import numpy
-from tqdm import tqdm
-import math
-from Event import Event
+from Event import EventArray
+from lmx.decoder import readBody, decodeBody
+from lmx.LMXStream import LMXStream
 
 
 
 #--------------------------------------------------------
 def readData(file, ticklength, counts):
 
-    def readPair(lmxfile):
+    # decode the whole binary body at once
+    times, detectors, finaltime = decodeBody(*readBody(file), ticklength)
+    if finaltime is not None:
+        print('End of measurement. Measurement time (ns): ', finaltime)
+    else:
+        finaltime = 0.0
 
-        # numberstring = lmxfile.read(4)
-        # tickstring = lmxfile.read(4)
-
-        # if numberstring:
-        try:
-            number = int.from_bytes(lmxfile.read(4),
-                                    byteorder=sys.byteorder,
-                                    signed=False)
-            tick = int.from_bytes(lmxfile.read(4),
-                                    byteorder=sys.byteorder,
-                                    signed=False)
-
-            return number, tick  # , numberstring, tickstring
-
-        except:
-
-            return None, None  # , numberstring, tickstring
-
-    def getDetectorIndices(number):
-
-        indices = []
-        i = 1
-        while number:
-
-            if number & 1: indices.append(i)
-            number >>= 1
-            i += 1
-
-        return indices
-
-    events = []
-    addclock = 0
-
-    finaltime = 0.0
-
-    while True:
-
-        number, tick = readPair(file)
-
-        if number:
-
-            # accumulate time
-            time = (tick + addclock) * ticklength
-
-            # loop over indices
-            for index in getDetectorIndices(number):
-                events.append(Event(time,index))
-                # pbar.update(10)
-
-        elif number == 0:
-
-            # flag, flagtick, flagstring, flagtickstring = readPair( lmxfile )
-            flag, flagtick = readPair(file)
-
-            # rollover flag
-            if flag == 1:
-
-                print('ROOOOOLLLLLLL OOOOOVEEEEER')
-                addclock = addclock + tick
-
-            # stop recording flag
-            elif flag == 2:
-
-                print('active mode: stop recording data')
-
-            # start recording flag
-            elif flag == 3:
-
-                print('active mode: start recording data')
-
-            # end of measurement flag
-            elif flag == 4294967295:
-
-                finaltime = (flagtick + addclock) * ticklength
-                print('End of measurement. Measurement time (ns): ', finaltime)
-                break
-
-            else:
-
-                print('unknown flag or no event during tick?', flag, flagtick)
-
-        else:
-
-            print('Unexpected end of file')
-            break
-
-    return events, finaltime
+    return EventArray(times, detectors), finaltime
 
 
 
@@ -226,7 +143,47 @@ def readLMXFile(fileName):
         # read the events
         events, endtime = readData(lmxfile, tickLength, internalScaler)
     lmxfile.close()
+    return events.toEventList()
+
+
+
+def readLMXArray(fileName):
+
+    '''Reads an LMX file into an EventArray, with the
+    detector index of each event as its channel.'''
+
+    print('Opening file \'' + fileName + '\'')
+    with open(fileName, 'rb') as lmxfile:
+
+        # read the header
+        tickLength, internalScaler = readHeader(lmxfile)
+
+        # verify required data
+        if not tickLength:
+            raise RuntimeError('Tick length not found in header, '
+                               + 'cannot convert to absolute time')
+
+        # read the events
+        events, endtime = readData(lmxfile, tickLength, internalScaler)
     return events
 
 
 
+def iterLMXArrays(fileName, blockSize = None):
+
+    '''Memory-maps an LMX file and yields its events as
+    time-ordered EventArray blocks, without ever holding
+    the whole measurement in memory.
+
+    Inputs:
+    - fileName: the path of the LMX file.
+    - blockSize: the number of binary pairs decoded per block.
+    If not given, uses the LMXStream default.
+
+    Outputs:
+    - a generator of EventArrays, with the detector
+    index of each event as its channel.'''
+
+    stream = LMXStream(fileName) if blockSize is None else LMXStream(fileName, blockSize)
+    for times, detectors in stream:
+        yield EventArray(times, detectors)
@@ -0,0 +1,378 @@
+'''The shared loader for list-mode text data. Reads the
+time column (and optionally the channel column) of a
+whitespace separated file in large chunks into typed
+arrays. Chunks are split on line boundaries and parsed
+on a thread pool, with only a few chunks held in memory
+at once. Used by RossiAlpha, FeynmanY, and CohnAlpha.
+
+Parsed columns can be kept in a sidecar cache of .npy
+files keyed by the input's path, size, modification time,
+and column settings. Later loads memory-map the cached
+columns instead of parsing the text again.
+
+Imported as "ld" (loader)
+'''
+
+
+
+# Necessary imports.
+import io
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+
+# The default number of bytes of text parsed by each chunk.
+CHUNK_BYTES = 64 * 1024 * 1024
+# The time representations that the loader can produce.
+TIME_TYPES = ('float64', 'float32', 'int64')
+# The file endings of the two cached columns.
+CACHE_TIMES = '.times.npy'
+CACHE_CHANNELS = '.channels.npy'
+
+
+
+def chunkOffsets(path: str, chunkBytes: int = CHUNK_BYTES):
+
+    '''Splits a text file into byte ranges that each
+    begin and end on a line boundary.
+
+    Inputs:
+    - path: the path of the text file.
+    - chunkBytes: the approximate size of each byte range.
+
+    Outputs:
+    - a list of (start, end) byte offsets covering the file.'''
+
+
+    size = os.path.getsize(path)
+    offsets = []
+    start = 0
+    with open(path, 'rb') as file:
+        while start < size:
+            # Jump ahead by the chunk size and finish the current line.
+            file.seek(min(start + chunkBytes, size))
+            file.readline()
+            end = min(file.tell(), size)
+            offsets.append((start, end))
+            start = end
+    return offsets
+
+
+
+def parseChunk(path: str,
+               start: int,
+               end: int,
+               timeCol: int = 0,
+               channelCol: int = None,
+               timeType: str = 'float64',
+               tickLength: float = 1.0):
+
+    '''Parses one byte range of a text file into typed arrays.
+
+    Inputs:
+    - path: the path of the text file.
+    - start: the byte offset of the first line in the range.
+    - end: the byte offset just past the last line in the range.
+    - timeCol: the column holding the time data.
+    - channelCol: the column holding the channel data. If
+    not given, no channel data is read.
+    - timeType: the representation of the times; one of float64,
+    float32, or int64 (an integer number of clock ticks).
+    - tickLength: the length of a clock tick in the input time
+    units. Only used when timeType is int64.
+
+    Outputs:
+    - times: the array of times for this range.
+    - channels: the int16 array of channels for this range, or None.'''
+
+
+    # Read the raw bytes for this range.
+    with open(path, 'rb') as file:
+        file.seek(start)
+        raw = file.read(end - start)
+    dtypes = {timeCol: np.float64} if channelCol is None else {timeCol: np.float64, channelCol: np.int16}
+    # An empty range has no rows to parse.
+    if raw.strip() == b'':
+        data = pd.DataFrame({col: np.empty(0, dtype=dtype) for col, dtype in dtypes.items()})
+    else:
+        # Parse with the C engine (which releases the GIL while tokenizing)
+        # and its high precision converter so values match Python's float().
+        data = pd.read_csv(io.BytesIO(raw),
+                           sep=r'\s+',
+                           header=None,
+                           usecols=list(dtypes),
+                           dtype=dtypes,
+                           engine='c',
+                           float_precision='high')
+    times = data[timeCol].to_numpy(dtype=np.float64)
+    # Convert the times into the requested representation.
+    if timeType == 'float32':
+        times = times.astype(np.float32)
+    elif timeType == 'int64':
+        times = np.rint(times / tickLength).astype(np.int64)
+    channels = None if channelCol is None else data[channelCol].to_numpy(dtype=np.int16)
+    return times, channels
+
+
+
+def iterChunks(path: str,
+               timeCol: int = 0,
+               channelCol: int = None,
+               timeType: str = 'float64',
+               tickLength: float = 1.0,
+               chunkBytes: int = CHUNK_BYTES,
+               workers: int = None):
+
+    '''Yields the columns of a text file one chunk at a time,
+    in file order. At most two chunks per worker are parsed
+    or waiting at once, bounding the memory used.
+
+    Inputs:
+    - path: the path of the text file.
+    - timeCol: the column holding the time data.
+    - channelCol: the column holding the channel data. If
+    not given, no channel data is read.
+    - timeType: the representation of the times; one
+    of float64 (default), float32, or int64.
+    - tickLength: the length of a clock tick in the input time
+    units. Only used when timeType is int64.
+    - chunkBytes: the approximate number of bytes per chunk.
+    - workers: the number of parsing threads. If not
+    given, uses the number of available CPUs.
+
+    Outputs:
+    - a generator of (times, channels) array pairs.'''
+
+
+    if timeType not in TIME_TYPES:
+        raise ValueError('The time type must be one of ' + ', '.join(TIME_TYPES) + '.')
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    offsets = chunkOffsets(path, chunkBytes)
+    # With a single chunk or worker there is nothing to overlap.
+    if workers == 1 or len(offsets) <= 1:
+        for start, end in offsets:
+            yield parseChunk(path, start, end, timeCol, channelCol, timeType, tickLength)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, end in offsets:
+            # Wait on the oldest chunk once enough are in flight.
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(pool.submit(parseChunk, path, start, end, timeCol, channelCol, timeType, tickLength))
+        while pending:
+            yield pending.popleft().result()
+
+
+
+def readColumns(path: str,
+                timeCol: int = 0,
+                channelCol: int = None,
+                timeType: str = 'float64',
+                tickLength: float = 1.0,
+                chunkBytes: int = CHUNK_BYTES,
+                workers: int = None,
+                cacheDir: str = None,
+                cacheLimit: float = None):
+
+    '''Reads the time (and channel) columns of a whole text file.
+
+    Inputs:
+    - path: the path of the text file.
+    - timeCol: the column holding the time data.
+    - channelCol: the column holding the channel data. If
+    not given, no channel data is read.
+    - timeType: the representation of the times; one
+    of float64 (default), float32, or int64.
+    - tickLength: the length of a clock tick in the input time
+    units. Only used when timeType is int64.
+    - chunkBytes: the approximate number of bytes per chunk.
+    - workers: the number of parsing threads. If not
+    given, uses the number of available CPUs.
+    - cacheDir: the folder holding the column cache. If not
+    given, the file is always parsed and nothing is cached.
+    - cacheLimit: the maximum size of the cache in megabytes. If
+    not given, the cache is never evicted.
+
+    Outputs:
+    - times: the array of times (read-only and memory-mapped if cached).
+    - channels: the int16 array of channels, or None.'''
+
+
+    # Use the cached columns if this exact file was parsed before.
+    if cacheDir is not None:
+        entry = cacheEntry(path, cacheDir, timeCol, channelCol, timeType, tickLength)
+        cached = readCache(entry, channelCol is not None)
+        if cached is not None:
+            return cached
+    timeChunks = []
+    channelChunks = []
+    for times, channels in iterChunks(path, timeCol, channelCol, timeType, tickLength, chunkBytes, workers):
+        timeChunks.append(times)
+        channelChunks.append(channels)
+    # Join the chunks, keeping the requested types for empty files.
+    if len(timeChunks) == 0:
+        times = np.empty(0, dtype=timeType)
+        channels = None if channelCol is None else np.empty(0, dtype=np.int16)
+        return times, channels
+    times = np.concatenate(timeChunks)
+    channels = None if channelCol is None else np.concatenate(channelChunks)
+    # Store the parsed columns for next time. The columns are
+    # already parsed, so a cache that cannot be written is skipped.
+    if cacheDir is not None:
+        try:
+            writeCache(entry, times, channels, cacheLimit)
+        except OSError as error:
+            print('WARNING: could not cache the columns of ' + path + ' (' + str(error) + '). Continuing without the cache.')
+    return times, channels
+
+
+
+def cacheSettings(io: dict):
+
+    '''Gets the cache folder and size limit from the Input/Output
+    Settings. Settings files without the cache keys disable caching.
+
+    Inputs:
+    - io: the Input/Output Settings dictionary.
+
+    Outputs:
+    - cacheDir: the cache folder, or None if caching is off.
+    - cacheLimit: the cache size limit in megabytes, or None.'''
+
+
+    if not io.get('Cache input data', False):
+        return None, None
+    cacheDir = io.get('Cache directory')
+    if cacheDir is None:
+        cacheDir = os.path.join(io.get('Save directory') or './data', 'cache')
+    return cacheDir, io.get('Cache size limit')
+
+
+
+def cacheEntry(path: str,
+               cacheDir: str,
+               timeCol: int = 0,
+               channelCol: int = None,
+               timeType: str = 'float64',
+               tickLength: float = 1.0):
+
+    '''Builds the cache file prefix for an input file. The prefix
+    is made of a hash of the path and column settings followed
+    by a hash of the file's size and modification time, so an
+    edited file never matches its old cache entry.
+
+    Inputs:
+    - path: the path of the text file.
+    - cacheDir: the folder holding the column cache.
+    - the remaining inputs are the same as readColumns.
+
+    Outputs:
+    - the path prefix of the cache files for this input.'''
+
+
+    stats = os.stat(path)
+    source = json.dumps([os.path.abspath(path), timeCol, channelCol, timeType, tickLength])
+    state = json.dumps([stats.st_size, stats.st_mtime_ns])
+    return os.path.join(os.path.abspath(cacheDir),
+                        hashlib.sha1(source.encode()).hexdigest()[:16]
+                        + '_'
+                        + hashlib.sha1(state.encode()).hexdigest()[:16])
+
+
+
+def readCache(entry: str, hasChannels: bool):
+
+    '''Memory-maps the cached columns for a cache entry.
+
+    Inputs:
+    - entry: the cache file prefix from cacheEntry.
+    - hasChannels: whether the channel column is needed.
+
+    Outputs:
+    - the (times, channels) pair, or None if the entry is not cached.'''
+
+
+    if not os.path.exists(entry + CACHE_TIMES) or (hasChannels and not os.path.exists(entry + CACHE_CHANNELS)):
+        return None
+    try:
+        times = np.load(entry + CACHE_TIMES, mmap_mode='r')
+        channels = np.load(entry + CACHE_CHANNELS, mmap_mode='r') if hasChannels else None
+    except (OSError, ValueError):
+        return None
+    # Mark the entry as recently used for eviction, if the cache is writable.
+    try:
+        os.utime(entry + CACHE_TIMES)
+    except OSError:
+        pass
+    return times, channels
+
+
+
+def writeCache(entry: str, times: np.ndarray, channels: np.ndarray = None, cacheLimit: float = None):
+
+    '''Saves parsed columns to the cache, removes stale entries for
+    the same input, and evicts the least recently used entries
+    until the cache fits in its size limit.
+
+    Inputs:
+    - entry: the cache file prefix from cacheEntry.
+    - times: the parsed times.
+    - channels: the parsed channels, or None.
+    - cacheLimit: the maximum size of the cache in megabytes. If
+    not given, the cache is never evicted.
+
+    Exceptions:
+    - OSError: the cache folder cannot be written to.'''
+
+
+    folder, name = os.path.split(entry)
+    source = name[:name.index('_') + 1]
+    os.makedirs(folder, exist_ok=True)
+    # Write each column to a temporary file first so that
+    # an interrupted run never leaves a partial entry.
+    for column, ending in ((channels, CACHE_CHANNELS), (times, CACHE_TIMES)):
+        if column is not None:
+            try:
+                with open(entry + ending + '.tmp', 'wb') as file:
+                    np.save(file, column)
+                os.replace(entry + ending + '.tmp', entry + ending)
+            except OSError:
+                # Do not leave a partial file behind (ex: a full disk).
+                if os.path.exists(entry + ending + '.tmp'):
+                    os.remove(entry + ending + '.tmp')
+                raise
+    # Group the cache files by entry, newest use first.
+    entries = {}
+    for filename in os.listdir(folder):
+        if filename.endswith(CACHE_TIMES) or filename.endswith(CACHE_CHANNELS):
+            prefix = filename[:filename.index('.')]
+            # Another run may have evicted the file since it was listed.
+            try:
+                stats = os.stat(os.path.join(folder, filename))
+            except FileNotFoundError:
+                continue
+            used, size = entries.get(prefix, (0, 0))
+            entries[prefix] = (max(used, stats.st_mtime), size + stats.st_size)
+    order = sorted(entries, key=lambda prefix: entries[prefix][0], reverse=True)
+    total = 0
+    for prefix in order:
+        total += entries[prefix][1]
+        # Drop entries for older versions of this input and,
+        # past the size limit, any less recently used entries.
+        stale = prefix != name and prefix.startswith(source)
+        over = cacheLimit is not None and total > cacheLimit * 1024 * 1024 and prefix != name
+        if stale or over:
+            for ending in (CACHE_TIMES, CACHE_CHANNELS):
+                try:
+                    os.remove(os.path.join(folder, prefix + ending))
+                except FileNotFoundError:
+                    pass
+            total -= entries[prefix][1]
@@ -558,7 +558,9 @@ def fySplit(window: Tk, parameters: set.Settings):
                          parameters.settings['Histogram Visual Settings'],
                          parameters.settings['Line Fitting Settings'],
                          parameters.settings['Scatter Plot Settings'],
-                         window)
+                         window,
+                         parameters.settings['General Settings'].get('Kernel backend', 'auto'),
+                         parameters.settings['General Settings'].get('Workers', 1))
     gui.feynmanYMenu()
     log(message='Successfully ran Feynman Y analysis on file:\n'
         +parameters.settings['Input/Output Settings']['Input file/folder'],